@@ -0,0 +1,160 @@
+"""Alert benchmark: evaluation cost against the number of rules
+
+Simulates a day of quarter-hourly prices in all four regions: an interval
+event every 15 minutes per region and a publication event at 13:00. The
+rules are mostly thresholds and percentages that today's prices never reach,
+plus a fixed set that do fire, so every rule count fires the same alerts and
+the remaining cost is finding them. The indexed engine is compared with a
+linear scan over every rule. The run fails if the engine's cost per event
+grows faster than the square root of the rule count.
+
+    python benchmarks/alerts.py --rules 100 1000 10000 100000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.fake_prices import make_day
+from utils.alerts import AlertEngine, Rule
+from utils.price_series import PriceSeries
+
+REGIONS = (1, 2, 3, 4)
+# Rules that fire during the simulated day, the same for every rule count
+ACTIVE_RULES = [f"SE{region} {rule}" for region in REGIONS for rule in (
+    "below 0.75", "above 1.0", "tomorrow above today by 1%", "tomorrow below today by 1%",
+    "cheapest 3h in 15 min", "cheapest 1h in 60 min")]
+
+
+def make_rules(count, seed=0):
+    """The active rules plus dormant ones that never match the simulated prices"""
+    rng = random.Random(seed)
+    rules = [Rule.parse(text) for text in ACTIVE_RULES]
+    while len(rules) < count:
+        region = rng.choice(REGIONS)
+        kind = rng.random()
+        if kind < 0.4:
+            text = f"SE{region} above {rng.uniform(3, 10):.2f}"
+        elif kind < 0.8:
+            text = f"SE{region} below {rng.uniform(-2, -0.5):.2f}"
+        else:
+            text = f"SE{region} tomorrow above today by {rng.randint(200, 1000)}%"
+        rules.append(Rule.parse(text))
+    return rules
+
+
+class LinearScan:
+    """Reference evaluator checking every rule at every event"""
+
+    def __init__(self, rules):
+        self.rules = rules
+        self.satisfied = set()
+        self.fired_windows = set()
+        self.series = {}
+
+    def on_prices(self, region, today, tomorrow, now):
+        self.series[region] = PriceSeries.concat([today, tomorrow])
+        fired = []
+        change = (tomorrow.mean - today.mean) / abs(today.mean) * 100 if tomorrow else None
+        for rule in self.rules:
+            if rule.region == region and rule.kind == 'tomorrow' and change is not None:
+                if (change >= rule.value if rule.direction == 'above' else -change >= rule.value):
+                    fired.append(rule)
+        return fired + self.on_interval(region, now)
+
+    def on_interval(self, region, now):
+        from utils.optimizer import cheapest_window
+        series = self.series[region]
+        price = series.price_at(now)
+        index = series.index_at(now)
+        fired = []
+        for rule in self.rules:
+            if rule.region != region:
+                continue
+            if rule.kind == 'threshold':
+                hit = price < rule.value if rule.direction == 'below' else price > rule.value
+                if hit and rule.id not in self.satisfied:
+                    fired.append(rule)
+                    self.satisfied.add(rule.id)
+                elif not hit:
+                    self.satisfied.discard(rule.id)
+            elif rule.kind == 'cheapest':
+                window = cheapest_window(series, rule.hours,
+                                         after=datetime.fromtimestamp(series.ends[index]))
+                if (window and 0 <= window['start'] - now <= rule.value * 60
+                        and (rule.id, window['start']) not in self.fired_windows):
+                    fired.append(rule)
+                    self.fired_windows.add((rule.id, window['start']))
+        return fired
+
+
+def simulate(evaluator, days):
+    """Run one day of events; returns (events, alerts, seconds)"""
+    today, tomorrow = days
+    first = int(today.starts[0])
+    publish = first + 13 * 3600
+    events = alerts = 0
+    start = time.perf_counter()
+    for region in REGIONS:
+        alerts += len(evaluator.on_prices(region, today, None, now=first + 1))
+    for step in range(1, 96):
+        now = first + step * 900 + 1
+        for region in REGIONS:
+            if now - 900 < publish <= now:
+                alerts += len(evaluator.on_prices(region, today, tomorrow, now=now))
+            else:
+                alerts += len(evaluator.on_interval(region, now=now))
+            events += 1
+        if isinstance(evaluator, AlertEngine):
+            due = evaluator.next_due()
+            while due is not None and due <= now:
+                alerts += len(evaluator.on_due(now=due))
+                due = evaluator.next_due()
+    return events, alerts, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rules', type=int, nargs='+', default=[100, 1000, 10000, 100000])
+    parser.add_argument('--no-scan', action='store_true', help="Skip the linear scan reference")
+    args = parser.parse_args()
+
+    day = datetime(2025, 3, 3)
+    today = PriceSeries.from_json(make_day(day, points=96))
+    tomorrow = PriceSeries.from_json(make_day(day + timedelta(days=1), points=96))
+    # A clearly more expensive tomorrow, so the percentage rules have something to match
+    tomorrow = PriceSeries(tomorrow.starts, tomorrow.prices * 1.2, tomorrow.ends)
+
+    print(f"{'rules':>8}{'alerts':>8}{'engine':>14}{'scan':>14}")
+    costs = []
+    for count in args.rules:
+        rules = make_rules(count)
+        engine = AlertEngine()
+        for rule in rules:
+            engine.add(rule)
+        events, alerts, seconds = simulate(engine, (today, tomorrow))
+        per_event = seconds / events * 1e6
+        costs.append(per_event)
+
+        scan = "-"
+        if not args.no_scan and count <= 10000:
+            scan_events, _, scan_seconds = simulate(LinearScan(rules), (today, tomorrow))
+            scan = f"{scan_seconds / scan_events * 1e6:.1f} µs"
+        print(f"{count:>8}{alerts:>8}{per_event:>11.1f} µs{scan:>14}")
+
+    growth = costs[-1] / costs[0]
+    allowed = (args.rules[-1] / args.rules[0]) ** 0.5
+    ok = growth <= allowed
+    print(f"engine cost grew {growth:.1f}x for {args.rules[-1] / args.rules[0]:.0f}x the rules "
+          f"(allowed {allowed:.1f}x)")
+    print("OK (sublinear)" if ok else "COST GROWS TOO FAST")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
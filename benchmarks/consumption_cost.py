@@ -0,0 +1,120 @@
+"""Consumption cost benchmark: throughput and memory against input size
+
+Writes quarter-hourly meter CSVs of growing length for several meters, fills
+a temporary archive with hourly fake prices for the same days and runs the
+cost calculation on each file in a fresh interpreter. Memory is bounded by the
+chunk size, so once every input spans several chunks the peak memory growth
+should stay flat; the run fails if the largest input needs more than twice
+the memory of the smallest.
+
+    python benchmarks/consumption_cost.py --days 90 365 1095 --meters 4
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.fake_prices import make_day
+
+FIRST_DAY = date(2022, 1, 1)
+# Memory growth below this is noise from the allocator and imports
+MIN_GROWTH_MB = 8
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process"""
+    try:
+        import resource
+    except ImportError:
+        # Windows
+        import psutil
+        return psutil.Process().memory_info().peak_wset / 2 ** 20
+    # ru_maxrss is in kilobytes on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2 ** 20 if sys.platform == 'darwin' else peak / 2 ** 10
+
+
+def write_archive(path, days):
+    from utils.archive import PriceArchive
+    archive = PriceArchive(path)
+    for i in range(days):
+        day = FIRST_DAY + timedelta(days=i)
+        archive.append_day(day, 3, make_day(day))
+
+
+def write_readings(path, days, meters):
+    start = datetime(FIRST_DAY.year, FIRST_DAY.month, FIRST_DAY.day).astimezone()
+    step = timedelta(minutes=15)
+    with open(path, 'w') as f:
+        f.write("time,meter,kwh\n")
+        for i in range(days * 96):
+            stamp = (start + step * i).astimezone().isoformat()
+            for meter in range(meters):
+                f.write(f"{stamp},{meter},{0.05 + (i * 7 + meter) % 13 / 40:.3f}\n")
+
+
+def child(archive_path, csv_path, chunk_size):
+    """Cost one file; prints a JSON line"""
+    from utils.archive import PriceArchive
+    from utils.consumption import CostCalculator
+
+    calculator = CostCalculator(PriceArchive(archive_path), 3)
+    baseline = peak_rss_mb()
+    start = time.perf_counter()
+    calculator.process_csv(csv_path, chunk_size)
+    rows = calculator.monthly()
+    elapsed = time.perf_counter() - start
+    print(json.dumps({
+        'rows': calculator.rows,
+        'seconds': elapsed,
+        'growth_mb': peak_rss_mb() - baseline,
+        'cost': sum(row['cost'] for row in rows),
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--days', type=int, nargs='+', default=[90, 365, 1095])
+    parser.add_argument('--meters', type=int, default=4)
+    parser.add_argument('--chunk-size', type=int, default=20_000)
+    parser.add_argument('--child', nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(*args.child, args.chunk_size)
+        return 0
+
+    with tempfile.TemporaryDirectory() as tmp:
+        archive_path = os.path.join(tmp, 'archive')
+        write_archive(archive_path, max(args.days))
+
+        print(f"{'days':>6}{'rows':>12}{'time':>10}{'rows/s':>12}{'memory':>10}")
+        growth = []
+        for days in args.days:
+            csv_path = os.path.join(tmp, f'readings_{days}.csv')
+            write_readings(csv_path, days, args.meters)
+            output = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), '--child', archive_path, csv_path,
+                 '--chunk-size', str(args.chunk_size)],
+                capture_output=True, text=True, check=True
+            ).stdout
+            r = json.loads(output.strip().splitlines()[-1])
+            growth.append(r['growth_mb'])
+            print(f"{days:>6}{r['rows']:>12}{r['seconds']:>8.2f} s{r['rows'] / r['seconds']:>12.0f}"
+                  f"{r['growth_mb']:>7.1f} MB")
+            os.remove(csv_path)
+
+    ok = growth[-1] <= max(2 * growth[0], MIN_GROWTH_MB)
+    print("OK (memory independent of input size)" if ok else "MEMORY GROWS WITH INPUT")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,150 @@
+"""Expand/collapse benchmark: frame times of the size animation
+
+The widget runs with the offscreen Qt platform against a prefilled cache and
+an unreachable upstream. The animation is stepped one 60 Hz frame at a time,
+and each frame is timed from setting the animation time until every resulting
+resize, layout and paint event has been processed. The full-resolution graph
+render when the animation finishes is reported separately; it is the one
+render an expand is allowed.
+
+Afterwards the expanded widget is resized frame by frame as if its edge were
+dragged, and the graph has to keep within the same budget until the resize
+stops, then render once.
+
+    python benchmarks/expand_animation.py --cycles 5 --graph-backend matplotlib
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.startup import prepare_cache
+
+# Every animation frame has to fit in one 60 Hz frame, the slowest one fails the run
+FRAME_BUDGET_MS = 16.0
+FRAME_MS = 1000 / 60
+
+
+def settle(app, seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        app.processEvents()
+
+
+def run_animation(app, widget):
+    """Step one expand or collapse; returns (frame times, final render) in ms"""
+    widget.toggle_size()
+    animation = widget.animation
+    animation.pause()
+
+    frames = []
+    step = 1
+    while True:
+        elapsed = min(animation.duration(), round(step * FRAME_MS))
+        start = time.perf_counter()
+        if elapsed < animation.duration():
+            animation.setCurrentTime(elapsed)
+            app.processEvents()
+            frames.append((time.perf_counter() - start) * 1000)
+        else:
+            # Reaching the end finishes the animation and renders the graph
+            animation.setCurrentTime(elapsed)
+            app.processEvents()
+            return frames, (time.perf_counter() - start) * 1000
+        step += 1
+
+
+def run_resize(app, widget, frames=60):
+    """Drag-resize the expanded widget; returns (frame times, final render ms, full renders)"""
+    canvas = getattr(widget.price_graph, 'canvas', None)
+    renders = canvas.renders if canvas is not None else 0
+    base = widget.size()
+    # As during the animation; the shadow blur alone would exceed the frame budget
+    widget.container.graphicsEffect().setEnabled(False)
+    times = []
+    for step in range(frames):
+        # Out and back again, a few pixels per frame
+        offset = step if step < frames // 2 else frames - step
+        start = time.perf_counter()
+        widget.resize(base.width() + offset * 4, base.height() + offset * 3)
+        app.processEvents()
+        times.append((time.perf_counter() - start) * 1000)
+        settle(app, FRAME_MS / 1000)
+
+    # Wait for the resize to settle; the final render is the only full one
+    start = time.perf_counter()
+    while canvas is not None and canvas.resizing:
+        app.processEvents()
+    app.processEvents()
+    final = (time.perf_counter() - start) * 1000
+    widget.container.graphicsEffect().setEnabled(True)
+    renders = canvas.renders - renders if canvas is not None else 0
+    return times, final, renders
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--cycles', type=int, default=5, help="Number of expand/collapse pairs")
+    parser.add_argument('--graph-backend', choices=('matplotlib', 'painter'), default='matplotlib')
+    args = parser.parse_args()
+
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    from PyQt6.QtWidgets import QApplication
+    from components.price_display import ElprisWidget
+    from utils.api import ElprisAPI
+    from utils.cache import PriceCache
+
+    app = QApplication(sys.argv[:1])
+    with tempfile.TemporaryDirectory() as cache_dir:
+        prepare_cache(cache_dir)
+        api = ElprisAPI(
+            base_url="http://127.0.0.1:9/{year}/{date}_SE{region}.json",
+            cache=PriceCache(os.path.join(cache_dir, 'prices.sqlite3'))
+        )
+        widget = ElprisWidget(api=api, graph_backend=args.graph_backend)
+        widget.show()
+
+        # Let the failed refresh finish and the off-screen render run
+        settle(app, widget.PRERENDER_DELAY_MS / 1000 + 1.0)
+
+        results = {'expand': ([], []), 'collapse': ([], [])}
+        for _ in range(args.cycles):
+            for name in ('expand', 'collapse'):
+                frames, final = run_animation(app, widget)
+                results[name][0].extend(frames)
+                results[name][1].append(final)
+                settle(app, 0.1)
+
+        # Expanded again for the drag
+        run_animation(app, widget)
+        settle(app, 0.1)
+        resize_frames, resize_final, resize_renders = run_resize(app, widget)
+
+        widget.scheduler.stop()
+        widget.fetcher.shutdown()
+        api.close()
+
+    ok = True
+    for name, (frames, finals) in results.items():
+        frames = sorted(frames)
+        p95 = frames[int(len(frames) * 0.95)]
+        print(f"{name:<9} frames: median {statistics.median(frames):5.2f} ms, "
+              f"p95 {p95:5.2f} ms, max {frames[-1]:5.2f} ms, "
+              f"final render {statistics.median(finals):6.1f} ms")
+        ok = ok and frames[-1] <= FRAME_BUDGET_MS
+    frames = sorted(resize_frames)
+    print(f"{'resize':<9} frames: median {statistics.median(frames):5.2f} ms, "
+          f"p95 {frames[int(len(frames) * 0.95)]:5.2f} ms, max {frames[-1]:5.2f} ms, "
+          f"final render {resize_final:6.1f} ms ({resize_renders} full render)")
+    ok = ok and frames[-1] <= FRAME_BUDGET_MS
+    print(f"OK (every frame within {FRAME_BUDGET_MS:.0f} ms)" if ok else "OVER BUDGET")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,36 @@
+"""Deterministic fake price data in the elprisetjustnu.se response format"""
+import math
+from datetime import datetime, timedelta
+
+
+def make_day(date, region=3, points=24):
+    """
+    Price records for one local day
+
+    Args:
+        date (date or datetime): Day to generate
+        region (int): Price region (1-4), shifts the price level
+        points (int): Intervals per day, 24 for hourly or 96 for quarter-hourly.
+            DST days get one hour's worth fewer or more
+    """
+    midnight = datetime(date.year, date.month, date.day).astimezone()
+    next_midnight = (datetime(date.year, date.month, date.day) + timedelta(days=1)).astimezone()
+    step = timedelta(minutes=24 * 60 // points)
+    seed = date.toordinal() * 7 + region
+    records = []
+    for i in range((next_midnight - midnight) // step):
+        start = (midnight + step * i).astimezone()
+        hour = i * 24 / points
+        # Morning and evening peaks plus some day-to-day variation
+        price = (0.4 + 0.1 * region
+                 + 0.3 * math.exp(-((hour - 8) ** 2) / 6)
+                 + 0.4 * math.exp(-((hour - 18) ** 2) / 8)
+                 + 0.1 * math.sin(seed + i * 0.7))
+        records.append({
+            'SEK_per_kWh': round(price, 5),
+            'EUR_per_kWh': round(price / 11.5, 5),
+            'EXR': 11.5,
+            'time_start': start.isoformat(),
+            'time_end': (start + step).astimezone().isoformat(),
+        })
+    return records
@@ -0,0 +1,122 @@
+"""Graph backend benchmark: memory and redraw latency of matplotlib vs QPainter
+
+Each backend runs in a fresh interpreter with the offscreen Qt platform, so
+the memory figures include everything the backend imports. A full redraw is
+a data change (new PriceSeries objects) followed by a synchronous repaint; a
+marker update is update_now() followed by a repaint, which is what happens at
+every interval boundary.
+
+    python benchmarks/graph_backends.py --redraws 50 --points 96
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BACKENDS = ('matplotlib', 'painter')
+
+
+def rss_bytes():
+    """Resident set size of this process, or None where it cannot be read"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        return None
+
+
+def child(backend, redraws, points):
+    """Measure one backend; prints a JSON line"""
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    sys.path.insert(0, ROOT)
+    from datetime import datetime, timedelta
+    from PyQt6.QtWidgets import QApplication
+    from benchmarks.fake_prices import make_day
+    from utils.price_series import PriceSeries
+
+    app = QApplication(sys.argv[:1])
+    now = datetime.now()
+    today = make_day(now, points=points)
+    tomorrow = make_day(now + timedelta(days=1), points=points)
+    baseline = rss_bytes()
+
+    start = time.perf_counter()
+    if backend == 'painter':
+        from components.painter_graph import PainterPriceGraph as graph_class
+    else:
+        from components.price_graph import PriceGraph as graph_class
+    graph = graph_class()
+    graph.resize(800, 300)
+    graph.show()
+    graph.update_graph(PriceSeries.from_json(today), PriceSeries.from_json(tomorrow))
+    graph.repaint()
+    app.processEvents()
+    first_draw = time.perf_counter() - start
+    loaded = rss_bytes()
+
+    full = []
+    for i in range(redraws):
+        series_today = PriceSeries.from_json(today)
+        series_tomorrow = PriceSeries.from_json(tomorrow)
+        highlight = {'start': int(series_today.starts[i % points]),
+                     'end': int(series_today.ends[(i + 2) % points])}
+        start = time.perf_counter()
+        graph.update_graph(series_today, series_tomorrow, highlight=highlight)
+        graph.repaint()
+        full.append(time.perf_counter() - start)
+
+    marker = []
+    for _ in range(redraws):
+        start = time.perf_counter()
+        graph.update_now()
+        graph.repaint()
+        marker.append(time.perf_counter() - start)
+
+    print(json.dumps({
+        'backend': backend,
+        'first_draw_ms': first_draw * 1000,
+        'full_redraw_ms': statistics.median(full) * 1000,
+        'marker_update_ms': statistics.median(marker) * 1000,
+        'rss_mb': None if baseline is None else (loaded - baseline) / 2 ** 20,
+        'matplotlib_loaded': 'matplotlib' in sys.modules,
+    }))
+    graph.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--redraws', type=int, default=50)
+    parser.add_argument('--points', type=int, default=24, help="Intervals per day (24 or 96)")
+    parser.add_argument('--backends', nargs='+', choices=BACKENDS, default=list(BACKENDS))
+    parser.add_argument('--child', choices=BACKENDS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child, args.redraws, args.points)
+        return 0
+
+    print(f"{'backend':<12}{'first draw':>12}{'full redraw':>13}{'marker':>10}{'memory':>10}")
+    for backend in args.backends:
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--child', backend,
+             '--redraws', str(args.redraws), '--points', str(args.points)],
+            capture_output=True, text=True, check=True
+        ).stdout
+        r = json.loads(output.strip().splitlines()[-1])
+        memory = "n/a" if r['rss_mb'] is None else f"{r['rss_mb']:.1f} MB"
+        print(f"{backend:<12}{r['first_draw_ms']:>9.1f} ms{r['full_redraw_ms']:>10.2f} ms"
+              f"{r['marker_update_ms']:>7.2f} ms{memory:>10}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
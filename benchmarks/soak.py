@@ -0,0 +1,203 @@
+"""Soak test: the widget through years of simulated days within a memory budget
+
+The widget runs with the offscreen Qt platform against the local stub server.
+The widget, its API client and the server share a SimulatedClock, and the
+harness moves it from one scheduled event to the next: every interval
+boundary, the midnight refresh, the poll after the 13:00 publication and any
+retries. Each event is handled exactly as it would be at that time, including
+the off-screen graph render that follows new data, so thousands of days pass
+quickly and every DST transition in the range comes by. The time zone is
+Europe/Stockholm, whatever the host uses. The graph renders take most of the
+time, roughly a second per simulated day on a laptop; --no-graph leaves them
+out for a quick check of the data path.
+
+After a warm-up, peak RSS, live Python objects and the widget's Qt child
+objects are sampled. The run fails when any of them grows by more than its
+budget, or when the 99th percentile of refresh latency (midnight and
+publication events, fetch and render included) exceeds its budget.
+
+    python benchmarks/soak.py --days 2000 --rss-budget 20
+"""
+import argparse
+import gc
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.consumption_cost import peak_rss_mb
+
+FETCH_TIMEOUT = 30.0
+
+
+def wait_idle(app, widget):
+    """Process events until the fetch started by the last event has been handled"""
+    from PyQt6.QtCore import QEventLoop
+
+    deadline = time.perf_counter() + FETCH_TIMEOUT
+    while widget.fetcher.is_busy():
+        if time.perf_counter() > deadline:
+            raise RuntimeError("Fetch did not finish")
+        app.processEvents(QEventLoop.ProcessEventsFlag.AllEvents, 5)
+    app.processEvents()
+
+
+def sample(widget):
+    """(peak RSS MB, Python objects, Qt objects) after a full collection"""
+    from PyQt6.QtCore import QObject
+
+    gc.collect()
+    return peak_rss_mb(), len(gc.get_objects()), len(widget.findChildren(QObject))
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))] if values else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--days', type=int, default=2000, help="Simulated days")
+    parser.add_argument('--start', type=lambda value: datetime.strptime(value, "%Y-%m-%d"),
+                        default=datetime(2024, 1, 1), help="First simulated day, YYYY-MM-DD")
+    parser.add_argument('--points', type=int, default=24, choices=(24, 96),
+                        help="Price intervals per day")
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument('--expanded', action='store_true',
+                       help="Keep the widget expanded so the live graph redraws at every event")
+    group.add_argument('--no-graph', action='store_true',
+                       help="Skip the off-screen graph renders of the compact widget")
+    parser.add_argument('--warmup-days', type=int, default=60,
+                        help="Days before the baseline sample, for caches and the forecast to fill")
+    parser.add_argument('--report-days', type=int, default=250, help="Days between progress lines")
+    parser.add_argument('--rss-budget', type=float, default=20.0, help="Allowed RSS growth in MB")
+    parser.add_argument('--objects-budget', type=int, default=20000,
+                        help="Allowed growth in live Python objects")
+    parser.add_argument('--qt-objects-budget', type=int, default=0,
+                        help="Allowed growth in Qt objects owned by the widget")
+    parser.add_argument('--latency-budget', type=float, default=1000.0,
+                        help="Allowed p99 refresh latency in ms")
+    args = parser.parse_args()
+
+    os.environ['TZ'] = 'Europe/Stockholm'
+    if hasattr(time, 'tzset'):
+        time.tzset()
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    from PyQt6.QtWidgets import QApplication
+    from benchmarks.stub_server import StubServer
+    from components.price_display import ElprisWidget
+    from utils.api import ElprisAPI
+    from utils.archive import PriceArchive
+    from utils.cache import PriceCache
+    from utils.clock import SimulatedClock
+
+    app = QApplication(sys.argv[:1])
+    # Just after midnight, as if the widget was started then
+    clock = SimulatedClock(args.start + timedelta(seconds=30))
+    end = (args.start + timedelta(days=args.days)).timestamp()
+    warmup = (args.start + timedelta(days=args.warmup_days)).timestamp()
+
+    latencies = {'boundary': [], 'refresh': []}
+    samples = []
+    gaps = []
+    failed = False
+    with tempfile.TemporaryDirectory() as data_dir, StubServer(args.points, clock=clock) as stub:
+        api = ElprisAPI(
+            base_url=stub.base_url,
+            cache=PriceCache(os.path.join(data_dir, 'prices.sqlite3'), clock=clock),
+            archive=PriceArchive(os.path.join(data_dir, 'archive')),
+            clock=clock
+        )
+        widget = ElprisWidget(api=api, clock=clock)
+        widget.show()
+        wait_idle(app, widget)
+        if args.expanded:
+            widget.toggle_size()
+            widget.animation.setCurrentTime(widget.animation.duration())
+            app.processEvents()
+
+        # The harness fires the scheduler's events itself, at simulated times
+        scheduler = widget.scheduler
+        scheduler.watchdog.stop()
+        next_report = warmup
+        started = time.perf_counter()
+        events = 0
+        while True:
+            due, kind = min((at, kind) for at, kind in ((scheduler.boundary_at, 'boundary'),
+                                                        (scheduler.poll_at, 'poll'))
+                            if at is not None)
+            if due >= end:
+                break
+            clock.set(due)
+            scheduler.boundary_timer.stop()
+            scheduler.poll_timer.stop()
+
+            generation = widget.fetcher.generation
+            start = time.perf_counter()
+            if kind == 'boundary':
+                scheduler._on_boundary()
+            else:
+                scheduler._on_poll()
+            wait_idle(app, widget)
+            # The off-screen render the prerender timer would start after this event
+            if widget.prerender_timer.isActive():
+                widget.prerender_timer.stop()
+                if not args.no_graph:
+                    widget.prerender_graph()
+            elapsed = (time.perf_counter() - start) * 1000
+            events += 1
+            # Every interval has a price, also around DST transitions and midnight
+            if widget.view_model.get('current_price', '–') == '–':
+                gaps.append(clock.now())
+            if due < warmup:
+                continue
+            latencies['refresh' if widget.fetcher.generation != generation else 'boundary'].append(elapsed)
+
+            if due >= next_report:
+                rss, objects, qt_objects = sample(widget)
+                samples.append((clock.now(), rss, objects, qt_objects))
+                refresh = latencies['refresh']
+                print(f"{clock.now():%Y-%m-%d}  rss {rss:6.1f} MB  objects {objects:7d}  "
+                      f"Qt {qt_objects:4d}  refresh p50 {percentile(refresh, 0.5):6.1f} ms "
+                      f"p99 {percentile(refresh, 0.99):6.1f} ms", flush=True)
+                next_report = due + args.report_days * 86400
+
+        if not widget.prices_today or widget.prices_today.start_time(0).date() != clock.now().date():
+            print(f"Widget shows the wrong day at {clock.now():%Y-%m-%d %H:%M}")
+            failed = True
+        if gaps:
+            print(f"No current price at {len(gaps)} events, first at {gaps[0]:%Y-%m-%d %H:%M}")
+            failed = True
+
+        seconds = time.perf_counter() - started
+        rss, objects, qt_objects = sample(widget)
+        samples.append((clock.now(), rss, objects, qt_objects))
+        scheduler.stop()
+        widget.fetcher.shutdown()
+        widget.close()
+        api.close()
+
+    _, rss0, objects0, qt0 = samples[0]
+    growth = {
+        'rss': (rss - rss0, args.rss_budget, "MB"),
+        'objects': (objects - objects0, args.objects_budget, ""),
+        'qt_objects': (qt_objects - qt0, args.qt_objects_budget, ""),
+        'latency_p99': (percentile(latencies['refresh'], 0.99), args.latency_budget, "ms"),
+    }
+    print(f"{args.days} days, {events} events in {seconds:.0f} s "
+          f"({args.days / seconds:.1f} days/s), "
+          f"re-render p99 {percentile(latencies['boundary'], 0.99):.1f} ms")
+    for name, (value, budget, unit) in growth.items():
+        over = value > budget
+        failed = failed or over
+        print(f"{name:<12}{value:>10.1f} {unit:<3} budget {budget:g} {unit}{'  OVER' if over else ''}")
+    print("OVER BUDGET" if failed else "OK (within budget)")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
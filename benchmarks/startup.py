@@ -0,0 +1,121 @@
+"""Startup benchmark: import time and time to first paint of the widget
+
+Every run starts a fresh interpreter with the offscreen Qt platform and a
+cache that already holds today's prices, which is what a normal restart looks
+like. The upstream URL points at a closed local port, so any network access
+on the startup path would show up as a missing first paint rather than as a
+fast one.
+
+    python benchmarks/startup.py --runs 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Target budget in seconds, medians above these fail the benchmark
+IMPORT_BUDGET = 0.6
+FIRST_PAINT_BUDGET = 1.0
+
+
+def child(cache_dir):
+    """Measure one cold start; prints a JSON line"""
+    start = time.perf_counter()
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    sys.path.insert(0, ROOT)
+
+    from PyQt6.QtCore import QEvent, QObject, QTimer
+    from PyQt6.QtWidgets import QApplication
+    from components.price_display import ElprisWidget
+    from utils.api import ElprisAPI
+    from utils.cache import PriceCache
+    imported = time.perf_counter()
+
+    app = QApplication(sys.argv[:1])
+    api = ElprisAPI(
+        base_url="http://127.0.0.1:9/{year}/{date}_SE{region}.json",
+        cache=PriceCache(os.path.join(cache_dir, 'prices.sqlite3'))
+    )
+    result = {}
+
+    class PaintWatcher(QObject):
+        def eventFilter(self, obj, event):
+            if event.type() == QEvent.Type.Paint and 'first_paint_s' not in result:
+                result['first_paint_s'] = time.perf_counter() - start
+                QTimer.singleShot(0, app.quit)
+            return False
+
+    widget = ElprisWidget(api=api)
+    watcher = PaintWatcher()
+    widget.installEventFilter(watcher)
+    widget.show()
+    QTimer.singleShot(5000, app.quit)
+    app.exec()
+
+    result.update({
+        'import_s': imported - start,
+        'had_data': widget.prices_today is not None,
+        'matplotlib_loaded': 'matplotlib' in sys.modules,
+    })
+    widget.fetcher.shutdown()
+    print(json.dumps(result))
+
+
+def prepare_cache(cache_dir):
+    """Store yesterday, today and tomorrow for every region"""
+    sys.path.insert(0, ROOT)
+    from datetime import datetime, timedelta
+    from benchmarks.fake_prices import make_day
+    from utils.cache import PriceCache
+
+    cache = PriceCache(os.path.join(cache_dir, 'prices.sqlite3'))
+    now = datetime.now()
+    for offset in (-1, 0, 1):
+        day = now + timedelta(days=offset)
+        for region in (1, 2, 3, 4):
+            cache.put(day, region, make_day(day, region))
+    cache.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--child', metavar='CACHE_DIR', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child)
+        return 0
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        prepare_cache(cache_dir)
+        runs = []
+        for _ in range(args.runs):
+            output = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), '--child', cache_dir],
+                capture_output=True, text=True, check=True
+            ).stdout
+            runs.append(json.loads(output.strip().splitlines()[-1]))
+
+    import_s = statistics.median(r['import_s'] for r in runs)
+    paint_s = statistics.median(r.get('first_paint_s', float('inf')) for r in runs)
+    print(f"import:      {import_s * 1000:7.1f} ms (budget {IMPORT_BUDGET * 1000:.0f} ms)")
+    print(f"first paint: {paint_s * 1000:7.1f} ms (budget {FIRST_PAINT_BUDGET * 1000:.0f} ms)")
+    print(f"cached data shown: {all(r['had_data'] for r in runs)}, "
+          f"matplotlib loaded: {any(r['matplotlib_loaded'] for r in runs)}")
+
+    ok = (import_s <= IMPORT_BUDGET and paint_s <= FIRST_PAINT_BUDGET
+          and all(r['had_data'] for r in runs)
+          and not any(r['matplotlib_loaded'] for r in runs))
+    print("OK" if ok else "OVER BUDGET")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,124 @@
+"""Local stand-in for the elprisetjustnu.se API, serving fake_prices data"""
+import json
+import random
+import re
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from benchmarks.fake_prices import make_day
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    PRICE_RE = re.compile(r'/(\d{4})/(\d{2}-\d{2})_SE(\d)\.json$')
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        stub = self.server.stub
+        with stub.lock:
+            stub.requests += 1
+            failing = stub.random.random() < stub.error_rate
+            slow = stub.random.random() < stub.slow_rate
+        if stub.delay:
+            time.sleep(stub.delay)
+        if slow:
+            time.sleep(stub.slow_delay)
+        if failing:
+            self.send_response(503)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        match = self.PRICE_RE.search(self.path)
+        if not match:
+            self.send_response(404)
+            self.end_headers()
+            return
+        year, month_day, region = match.groups()
+        day = datetime.strptime(f"{year}-{month_day}", "%Y-%m-%d")
+        if not stub.is_published(day):
+            self.send_response(404)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        body = json.dumps(make_day(day, int(region), stub.points)).encode('utf-8')
+
+        etag = f'"{year}-{month_day}-SE{region}-{stub.points}"'
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class StubServer:
+    """
+    Price API on a free local port, running on a background thread
+
+    Args:
+        points (int): Intervals per day in the responses, 24 or 96
+        delay (float): Seconds to wait before answering, to simulate latency
+        error_rate (float): Fraction of requests answered with 503
+        slow_rate (float): Fraction of requests delayed by another slow_delay seconds
+        slow_delay (float): Extra delay of slow requests
+        seed (int): Seed of the fault injection
+        clock (Clock, optional): When given, tomorrow is only served from
+            PUBLISH_HOUR of this clock's day and later days never; otherwise
+            every day is served
+    """
+
+    # Tomorrow's prices are published at this hour
+    PUBLISH_HOUR = 13
+
+    def __init__(self, points=24, delay=0.0, error_rate=0.0, slow_rate=0.0, slow_delay=2.0, seed=0,
+                 clock=None):
+        self.points = points
+        self.clock = clock
+        self.delay = delay
+        self.error_rate = error_rate
+        self.slow_rate = slow_rate
+        self.slow_delay = slow_delay
+        self.random = random.Random(seed)
+        self.requests = 0
+        self.lock = threading.Lock()
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), _StubHandler)
+        self._server.daemon_threads = True
+        self._server.stub = self
+        self._thread = None
+
+    def is_published(self, day):
+        if self.clock is None:
+            return True
+        now = self.clock.now()
+        ahead = (day.date() - now.date()).days
+        return ahead <= 0 or (ahead == 1 and now.hour >= self.PUBLISH_HOUR)
+
+    @property
+    def base_url(self):
+        """ElprisAPI base_url pointing at this server"""
+        port = self._server.server_address[1]
+        return f"http://127.0.0.1:{port}/api/v1/prices/{{year}}/{{date}}_SE{{region}}.json"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
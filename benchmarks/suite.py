@@ -0,0 +1,380 @@
+"""Benchmark suite for the refresh path, compared against stored baselines
+
+Covers the steps between the network and the screen:
+
+    fetch     ElprisAPI.fetch_prices against a local stub server: cold
+              downloads, conditional revalidation (304) and cache hits
+    parse     PriceSeries.from_json
+    stats     the ElprisWidget statistics: comparison with yesterday, the
+              cheapest window and the view model
+    content   ElprisWidget.update_content after a data change, compact and
+              expanded
+    graph     update_graph with new data and the current-time marker update,
+              for both graph backends
+    forecast  PriceForecaster training on a year of archived days, adding
+              one more day and producing the 7-day outlook
+
+Cases vary the resolution (24 or 96 points per day) and, where it applies,
+the number of days. Each case reports the median time of several runs.
+Results are compared with benchmarks/baselines.json, and a case that is slower
+than its baseline by more than its threshold is reported as a regression.
+
+    python benchmarks/suite.py                  # compare with the baselines
+    python benchmarks/suite.py -k graph         # only cases containing "graph"
+    python benchmarks/suite.py --save           # store the results as baselines
+    python benchmarks/suite.py --output run.json
+"""
+import argparse
+import copy
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines.json')
+
+RESOLUTIONS = (24, 96)
+DAY_COUNTS = (1, 7, 30)
+GRAPH_BACKENDS = ('matplotlib', 'painter')
+# Archived days the forecaster trains on
+TRAINING_DAYS = 365
+
+# Allowed slowdown relative to the baseline; network cases are noisier
+DEFAULT_THRESHOLD = 1.5
+GROUP_THRESHOLDS = {'fetch': 2.0}
+
+# Differences below this are treated as noise however large the ratio
+MIN_DELTA_MS = 0.25
+
+
+def measure(func, repeat, setup=None):
+    """Median wall time of func in milliseconds; setup runs untimed before each call"""
+    times = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        func()
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times)
+
+
+def past_days(count):
+    """The count days up to and including yesterday, oldest first"""
+    yesterday = datetime.now() - timedelta(days=1)
+    return [yesterday - timedelta(days=i) for i in range(count - 1, -1, -1)]
+
+
+class Suite:
+    def __init__(self, repeat, pattern=None):
+        self.repeat = repeat
+        self.pattern = pattern
+        self.results = {}
+
+    def wanted(self, name):
+        return self.pattern is None or self.pattern in name
+
+    def run(self, name, func, setup=None, repeat=None):
+        if not self.wanted(name):
+            return
+        self.results[name] = measure(func, repeat or self.repeat, setup)
+        print(f"  {name:<40}{self.results[name]:>10.3f} ms", flush=True)
+
+    def fetch_cases(self, stub):
+        from utils.api import ElprisAPI
+        from utils.cache import PriceCache
+
+        api = ElprisAPI(base_url=stub.base_url, cache=PriceCache(':memory:'))
+        for points in RESOLUTIONS:
+            stub.points = points
+            for count in DAY_COUNTS:
+                days = past_days(count)
+
+                def fetch_all(revalidate=False):
+                    for day in days:
+                        api.fetch_prices(day, 3, revalidate=revalidate)
+
+                def fresh_cache():
+                    api.cache.close()
+                    api.cache = PriceCache(':memory:')
+
+                label = f"[{points}pt,{count}d]"
+                self.run(f"fetch.cold{label}", fetch_all, setup=fresh_cache)
+                # The last cold run left every day cached
+                self.run(f"fetch.revalidate{label}", lambda: fetch_all(revalidate=True))
+                self.run(f"fetch.cached{label}", fetch_all)
+        api.close()
+
+    def parse_cases(self):
+        from benchmarks.fake_prices import make_day
+        from utils.price_series import PriceSeries
+
+        for points in RESOLUTIONS:
+            for count in DAY_COUNTS:
+                records = [make_day(day, 3, points) for day in past_days(count)]
+                self.run(f"parse[{points}pt,{count}d]",
+                         lambda: [PriceSeries.from_json(day) for day in records])
+
+    def stats_cases(self, widget):
+        from benchmarks.fake_prices import make_day
+        from utils.price_series import PriceSeries
+
+        now = datetime.now()
+        for points in RESOLUTIONS:
+            for count in DAY_COUNTS:
+                # A series spanning count days, ending with tomorrow
+                days = [now + timedelta(days=i) for i in range(2 - count, 2)]
+                arrays = PriceSeries.concat(
+                    [PriceSeries.from_json(make_day(day, 3, points)) for day in days])
+                yesterday = PriceSeries.from_json(make_day(now - timedelta(days=1), 3, points))
+
+                def fresh_series():
+                    # Statistics are cached per series, so every run gets new objects
+                    widget.prices_today = PriceSeries(arrays.starts, arrays.prices, arrays.ends)
+                    widget.prices_yesterday = PriceSeries(
+                        yesterday.starts, yesterday.prices, yesterday.ends)
+                    widget.prices_tomorrow = None
+
+                def statistics_pass():
+                    widget.get_current_price_comparison()
+                    widget.cheapest_window = widget.find_cheapest_window()
+                    widget.build_view_model()
+
+                self.run(f"stats[{points}pt,{count}d]", statistics_pass, setup=fresh_series)
+
+    def content_cases(self, app, widget):
+        from benchmarks.fake_prices import make_day
+        from utils.price_series import PriceSeries
+
+        now = datetime.now()
+        for points in RESOLUTIONS:
+            records = {name: make_day(now + timedelta(days=offset), 3, points)
+                       for name, offset in (('yesterday', -1), ('today', 0), ('tomorrow', 1))}
+
+            def fresh_data():
+                widget.prices_yesterday = PriceSeries.from_json(records['yesterday'])
+                widget.prices_today = PriceSeries.from_json(records['today'])
+                widget.prices_tomorrow = PriceSeries.from_json(records['tomorrow'])
+
+            for expanded in (False, True):
+                if expanded != widget.expanded:
+                    widget.toggle_size()
+                    widget.animation.setCurrentTime(widget.animation.duration())
+                    app.processEvents()
+                mode = 'expanded' if expanded else 'compact'
+                self.run(f"content.{mode}[{points}pt]", widget.update_content, setup=fresh_data)
+        if widget.expanded:
+            widget.toggle_size()
+            widget.animation.setCurrentTime(widget.animation.duration())
+        widget.prerender_timer.stop()
+
+    def graph_cases(self, app):
+        from benchmarks.fake_prices import make_day
+        from utils.price_series import PriceSeries
+
+        now = datetime.now()
+        for backend in GRAPH_BACKENDS:
+            if not any(self.wanted(f"graph.{kind}[{backend},")
+                       for kind in ('draw', 'now')):
+                continue
+            if backend == 'painter':
+                from components.painter_graph import PainterPriceGraph as graph_class
+            else:
+                from components.price_graph import PriceGraph as graph_class
+            graph = graph_class()
+            graph.resize(958, 253)
+            graph.show()
+            # Repaints are dropped until the window has been exposed
+            app.processEvents()
+
+            for points in RESOLUTIONS:
+                today = make_day(now, 3, points)
+                tomorrow = make_day(now + timedelta(days=1), 3, points)
+                data = {}
+
+                def fresh_data():
+                    data['today'] = PriceSeries.from_json(today)
+                    data['tomorrow'] = PriceSeries.from_json(tomorrow)
+
+                def draw():
+                    graph.update_graph(data['today'], data['tomorrow'])
+                    graph.repaint()
+
+                def now_marker():
+                    graph.update_now()
+                    graph.repaint()
+
+                label = f"[{backend},{points}pt]"
+                self.run(f"graph.draw{label}", draw, setup=fresh_data)
+                self.run(f"graph.now{label}", now_marker)
+            graph.close()
+            app.processEvents()
+
+    def forecast_cases(self):
+        from benchmarks.fake_prices import make_day
+        from utils.archive import PriceArchive
+        from utils.forecast import PriceForecaster, hourly_profile
+        from utils.price_series import PriceSeries
+
+        for points in RESOLUTIONS:
+            names = {kind: f"forecast.{kind}[{points}pt]" for kind in ('update', 'outlook')}
+            names['train'] = f"forecast.train[{points}pt,{TRAINING_DAYS}d]"
+            if not any(self.wanted(name) for name in names.values()):
+                continue
+
+            path = tempfile.mkdtemp()
+            archive = PriceArchive(path)
+            *history, newest = past_days(TRAINING_DAYS + 1)
+            for day in history:
+                archive.append_day(day, 3, make_day(day, 3, points))
+            trained = PriceForecaster()
+            trained.update_from_archive(archive, 3)
+            newest_records = make_day(newest, 3, points)
+            data = {}
+
+            def train():
+                PriceForecaster().update_from_archive(archive, 3)
+
+            def fresh_forecaster():
+                data['forecaster'] = copy.deepcopy(trained)
+
+            def add_day():
+                # What the widget does when a new day has been archived
+                series = PriceSeries.from_json(newest_records)
+                data['forecaster'].update(newest, hourly_profile(series.starts, series.prices))
+
+            self.run(names['train'], train, repeat=3)
+            self.run(names['update'], add_day, setup=fresh_forecaster)
+            self.run(names['outlook'], lambda: trained.forecast(7))
+            del archive
+            shutil.rmtree(path, ignore_errors=True)
+
+
+def make_widget(stub):
+    """Compact widget on a memory cache that already holds the current days"""
+    from benchmarks.fake_prices import make_day
+    from components.price_display import ElprisWidget
+    from utils.api import ElprisAPI
+    from utils.cache import PriceCache
+
+    cache = PriceCache(':memory:')
+    now = datetime.now()
+    for offset in (-1, 0, 1):
+        day = now + timedelta(days=offset)
+        for region in ElprisAPI.REGIONS:
+            cache.put(day, region, make_day(day, region))
+    widget = ElprisWidget(api=ElprisAPI(base_url=stub.base_url, cache=cache))
+    widget.scheduler.stop()
+    widget.show()
+    return widget
+
+
+def load_baselines(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def save_baselines(path, results):
+    cases = {}
+    for name, median_ms in sorted(results.items()):
+        group = name.split('.')[0].split('[')[0]
+        cases[name] = {
+            'median_ms': round(median_ms, 4),
+            'threshold': GROUP_THRESHOLDS.get(group, DEFAULT_THRESHOLD),
+        }
+    baselines = load_baselines(path) or {}
+    baselines.setdefault('cases', {}).update(cases)
+    baselines.update({
+        'machine': platform.platform(),
+        'python': platform.python_version(),
+        'updated': datetime.now().isoformat(timespec='seconds'),
+        'min_delta_ms': MIN_DELTA_MS,
+    })
+    with open(path, 'w') as f:
+        json.dump(baselines, f, indent=2)
+        f.write('\n')
+
+
+def compare(results, baselines):
+    """Print each case against its baseline; returns the names of regressions"""
+    cases = baselines.get('cases', {})
+    min_delta = baselines.get('min_delta_ms', MIN_DELTA_MS)
+    if baselines.get('machine') != platform.platform():
+        print(f"Note: baselines were recorded on {baselines.get('machine')}")
+
+    regressions = []
+    print(f"\n{'case':<40}{'baseline':>12}{'now':>12}{'ratio':>8}")
+    for name, median_ms in results.items():
+        baseline = cases.get(name)
+        if baseline is None:
+            print(f"{name:<40}{'-':>12}{median_ms:>9.3f} ms{'new':>8}")
+            continue
+        ratio = median_ms / baseline['median_ms'] if baseline['median_ms'] else float('inf')
+        regressed = (ratio > baseline.get('threshold', DEFAULT_THRESHOLD)
+                     and median_ms - baseline['median_ms'] > min_delta)
+        if regressed:
+            regressions.append(name)
+        print(f"{name:<40}{baseline['median_ms']:>9.3f} ms{median_ms:>9.3f} ms{ratio:>7.2f}x"
+              f"{'  REGRESSION' if regressed else ''}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('-k', dest='pattern', help="Only run cases whose name contains this")
+    parser.add_argument('--repeat', type=int, default=7, help="Runs per case, the median is kept")
+    parser.add_argument('--baselines', default=BASELINE_PATH)
+    parser.add_argument('--save', action='store_true', help="Store the results as the new baselines")
+    parser.add_argument('--output', help="Also write the results to this JSON file")
+    args = parser.parse_args()
+
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    from PyQt6.QtWidgets import QApplication
+    from benchmarks.stub_server import StubServer
+
+    app = QApplication(sys.argv[:1])
+    suite = Suite(args.repeat, args.pattern)
+    with StubServer() as stub:
+        print("fetch / parse / stats")
+        suite.fetch_cases(stub)
+        suite.parse_cases()
+        widget = make_widget(stub)
+        suite.stats_cases(widget)
+        print("content / graph")
+        suite.content_cases(app, widget)
+        suite.graph_cases(app)
+        print("forecast")
+        suite.forecast_cases()
+        widget.fetcher.shutdown()
+        widget.api.close()
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'machine': platform.platform(), 'results': suite.results}, f, indent=2)
+    if args.save:
+        save_baselines(args.baselines, suite.results)
+        print(f"\nSaved {len(suite.results)} baselines to {args.baselines}")
+        return 0
+
+    baselines = load_baselines(args.baselines)
+    if baselines is None:
+        print(f"\nNo baselines at {args.baselines}, run with --save to create them")
+        return 0
+    regressions = compare(suite.results, baselines)
+    print(f"\n{len(regressions)} regression(s)" if regressions else "\nNo regressions")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,83 @@
+"""Tail latency benchmark: fetch_prices against an unreliable upstream
+
+The stub server answers a share of the requests with 503 and delays another
+share, and each client configuration fetches the same set of days. The report
+shows the latency percentiles and the success rate of every configuration, and
+the run fails if any call took longer than the deadline allows.
+
+    python benchmarks/tail_latency.py --calls 200 --error-rate 0.1 --slow-rate 0.05
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.stub_server import StubServer
+from utils.api import ElprisAPI
+from utils.cache import PriceCache
+
+DEADLINE = 3.0
+# Scheduling slack on top of the deadline before a call counts as unbounded
+SLACK = 0.25
+
+CONFIGS = {
+    'plain': {'retries': 0},
+    'retry': {'retries': 2},
+    'retry+hedge': {'retries': 2, 'hedge_after': 0.15},
+}
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def run_config(stub, calls, options):
+    api = ElprisAPI(base_url=stub.base_url, cache=PriceCache(':memory:'), deadline=DEADLINE,
+                    **options)
+    jobs = [(datetime.now() - timedelta(days=1 + i // 4), 1 + i % 4) for i in range(calls)]
+    latencies = []
+    successes = 0
+    # fetch_prices reports every failure on stdout
+    with contextlib.redirect_stdout(io.StringIO()):
+        for day, region in jobs:
+            start = time.perf_counter()
+            if api.fetch_prices(day, region):
+                successes += 1
+            latencies.append(time.perf_counter() - start)
+    api.close()
+    return latencies, successes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--calls', type=int, default=200)
+    parser.add_argument('--error-rate', type=float, default=0.1)
+    parser.add_argument('--slow-rate', type=float, default=0.05)
+    parser.add_argument('--slow-delay', type=float, default=1.0)
+    args = parser.parse_args()
+
+    print(f"{'config':<13}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}{'success':>10}")
+    ok = True
+    for name, options in CONFIGS.items():
+        # Same seed, so every configuration meets the same faults
+        with StubServer(delay=0.005, error_rate=args.error_rate, slow_rate=args.slow_rate,
+                        slow_delay=args.slow_delay, seed=1) as stub:
+            latencies, successes = run_config(stub, args.calls, options)
+        ms = [latency * 1000 for latency in latencies]
+        print(f"{name:<13}{percentile(ms, 0.5):>6.0f} ms{percentile(ms, 0.95):>6.0f} ms"
+              f"{percentile(ms, 0.99):>6.0f} ms{max(ms):>6.0f} ms"
+              f"{successes / args.calls:>9.0%}")
+        ok = ok and max(latencies) <= DEADLINE + SLACK
+    print(f"OK (every call within the {DEADLINE:g} s deadline)" if ok else "DEADLINE EXCEEDED")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,220 @@
+"""Command line tools for the price data, usable without starting the widget"""
+import argparse
+import sys
+from datetime import datetime
+from utils.api import ElprisAPI
+from utils.archive import PriceArchive
+
+
+def parse_date(value):
+    return datetime.strptime(value, "%Y-%m-%d")
+
+
+def backfill(args):
+    """Download a date range of price history into the local cache and archive"""
+    archive = PriceArchive(args.archive)
+    api = ElprisAPI(rate_limit=args.rate, archive=archive)
+
+    def report(stats):
+        done = stats['fetched'] + stats['skipped'] + stats['failed']
+        print(
+            f"{done}/{stats['total']} dagar "
+            f"({stats['fetched']} hämtade, {stats['skipped']} fanns redan, {stats['failed']} fel) "
+            f"{stats['days_per_second']:.1f} dagar/s, {stats['bytes'] / 1e6:.1f} MB",
+            flush=True
+        )
+
+    try:
+        stats = api.fetch_range(
+            args.start, args.end,
+            regions=args.regions,
+            max_in_flight=args.max_in_flight,
+            progress=report
+        )
+    except KeyboardInterrupt:
+        print("Avbruten, hämtade dagar är sparade och hoppas över nästa gång")
+        return 1
+    finally:
+        api.close()
+        # Concurrent downloads arrive out of order; restore day order for fast queries
+        archive.compact()
+    return 1 if stats['failed'] else 0
+
+
+def archive_info(args):
+    """Show what the local price archive contains"""
+    archive = PriceArchive(args.archive)
+    if args.compact:
+        archive.compact()
+    for region in archive.regions():
+        days = sorted(archive.days(region))
+        if not days:
+            continue
+        timestamps, prices = archive.query(region, days[0], days[-1])
+        print(f"SE{region}: {len(days)} dagar {days[0]} - {days[-1]}, "
+              f"{len(prices)} priser, snitt {prices.mean():.3f} kr/kWh"
+              f"{'' if archive.is_sorted(region) else ' (ej kompakterad)'}")
+    return 0
+
+
+def cost(args):
+    """What metered consumption cost at spot price, per day or month"""
+    from utils.consumption import CostCalculator
+
+    archive = PriceArchive(args.archive)
+    api = ElprisAPI(archive=archive) if args.fetch_missing else None
+    calculator = CostCalculator(archive, args.region, api=api, interval_minutes=args.interval)
+    try:
+        for path in args.files:
+            calculator.process_csv(path, args.chunk_size, args.time_column, args.kwh_column,
+                                   args.meter_column)
+    finally:
+        if api is not None:
+            api.close()
+
+    period = 'day' if args.daily else 'month'
+    rows = calculator.daily() if args.daily else calculator.monthly()
+    if args.output:
+        import csv
+        with open(args.output, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0]) if rows else ['meter', period])
+            writer.writeheader()
+            writer.writerows(rows)
+
+    print(f"{'Mätare':<14}{'Period':<12}{'kWh':>10}{'Kostnad':>11}{'Snittpris':>11}"
+          f"{'Platt pris':>11}{'Besparing':>11}")
+    unpriced = 0.0
+    for row in rows:
+        unpriced += row['unpriced_kwh']
+        print(f"{row['meter'] or '-':<14}{row[period]:<12}{row['kwh']:>10.1f}{row['cost']:>8.2f} kr"
+              f"{row['avg_price']:>11.3f}{row['flat_price']:>11.3f}{row['savings']:>8.2f} kr")
+    if unpriced:
+        print(f"{unpriced:.1f} kWh saknar pris i arkivet och är inte medräknade "
+              f"(kör backfill eller använd --fetch-missing)")
+    print(f"{calculator.rows} mätvärden")
+    return 0
+
+
+def export(args):
+    """Render daily price charts for regions and a date range to PNG/SVG"""
+    from components.chart_export import export_charts
+
+    def report(stats):
+        done = stats['rendered'] + stats['failed']
+        print(f"{done}/{stats['todo']} diagram, {stats['charts_per_second']:.1f} diagram/s", flush=True)
+
+    archive = PriceArchive(args.archive)
+    try:
+        stats = export_charts(
+            args.output, args.start, args.end,
+            regions=args.regions,
+            formats=args.formats,
+            archive=archive,
+            jobs=args.jobs,
+            dpi=args.dpi,
+            window_hours=args.window_hours,
+            force=args.force,
+            progress=report if args.progress else None
+        )
+    except KeyboardInterrupt:
+        print("Avbruten, renderade diagram hoppas över nästa gång")
+        return 1
+    print(f"{stats['rendered']} renderade, {stats['skipped']} redan aktuella, "
+          f"{stats['missing']} saknar priser, {stats['failed']} fel "
+          f"på {stats['seconds']:.1f} s ({stats['charts_per_second']:.1f} diagram/s)")
+    if stats['missing']:
+        print("Dagar som saknas i arkivet kan hämtas med backfill")
+    return 1 if stats['failed'] else 0
+
+
+def hub(args):
+    """Run the headless price hub until interrupted"""
+    from utils.hub import PriceHub, serve
+    from utils.metrics import metrics
+
+    # Served on /metrics
+    metrics.enable()
+
+    price_hub = PriceHub(ElprisAPI(archive=PriceArchive(args.archive)))
+    server = serve(price_hub, args.host, args.port)
+    price_hub.start()
+    print(f"Prishubb lyssnar på http://{args.host}:{server.server_address[1]}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+        price_hub.stop()
+        price_hub.api.close()
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Elpriser command line tools")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    parser_backfill = commands.add_parser('backfill', help="Download historical prices")
+    parser_backfill.add_argument('--start', type=parse_date, required=True, help="First day, YYYY-MM-DD")
+    parser_backfill.add_argument('--end', type=parse_date, default=datetime.now(), help="Last day, YYYY-MM-DD")
+    parser_backfill.add_argument('--regions', type=int, nargs='+', default=list(ElprisAPI.REGIONS),
+                                 choices=ElprisAPI.REGIONS, help="Price regions (1-4)")
+    parser_backfill.add_argument('--max-in-flight', type=int, default=8, help="Concurrent requests")
+    parser_backfill.add_argument('--rate', type=float, default=10.0, help="Requests per second per host")
+    parser_backfill.add_argument('--archive', help="Archive directory. Defaults to the user cache directory")
+    parser_backfill.set_defaults(func=backfill)
+
+    parser_archive = commands.add_parser('archive', help="Show the local price archive")
+    parser_archive.add_argument('--archive', help="Archive directory. Defaults to the user cache directory")
+    parser_archive.add_argument('--compact', action='store_true', help="Sort and compact before reading")
+    parser_archive.set_defaults(func=archive_info)
+
+    parser_cost = commands.add_parser('cost', help="Cost of metered consumption at spot price")
+    parser_cost.add_argument('files', nargs='+', help="Meter CSV files")
+    parser_cost.add_argument('--region', type=int, default=3, choices=ElprisAPI.REGIONS,
+                             help="Price region (1-4) of the meters")
+    parser_cost.add_argument('--daily', action='store_true', help="Report per day instead of per month")
+    parser_cost.add_argument('--output', help="Also write the report as CSV")
+    parser_cost.add_argument('--interval', type=int, help="Minutes per reading. Detected by default")
+    parser_cost.add_argument('--chunk-size', type=int, default=100_000, help="Rows processed at a time")
+    parser_cost.add_argument('--time-column', default='time', help="Column with the interval start")
+    parser_cost.add_argument('--kwh-column', default='kwh', help="Column with the consumption")
+    parser_cost.add_argument('--meter-column', default='meter', help="Column with the meter id, if any")
+    parser_cost.add_argument('--fetch-missing', action='store_true',
+                             help="Download days missing from the archive")
+    parser_cost.add_argument('--archive', help="Archive directory. Defaults to the user cache directory")
+    parser_cost.set_defaults(func=cost)
+
+    parser_export = commands.add_parser('export', help="Render daily price charts to PNG/SVG")
+    parser_export.add_argument('--start', type=parse_date, required=True, help="First day, YYYY-MM-DD")
+    parser_export.add_argument('--end', type=parse_date, default=datetime.now(), help="Last day, YYYY-MM-DD")
+    parser_export.add_argument('--regions', type=int, nargs='+', default=list(ElprisAPI.REGIONS),
+                               choices=ElprisAPI.REGIONS, help="Price regions (1-4)")
+    parser_export.add_argument('--formats', nargs='+', default=['png'], choices=['png', 'svg'],
+                               help="Output formats")
+    parser_export.add_argument('--output', default='charts', help="Output directory")
+    parser_export.add_argument('--jobs', type=int, help="Worker processes. Defaults to the number of CPUs")
+    parser_export.add_argument('--dpi', type=int, default=100, help="PNG resolution")
+    parser_export.add_argument('--window-hours', type=float, default=3,
+                               help="Cheapest block to highlight, 0 for none")
+    parser_export.add_argument('--force', action='store_true', help="Render charts that are up to date")
+    parser_export.add_argument('--progress', action='store_true', help="Report every rendered chart")
+    parser_export.add_argument('--archive', help="Archive directory. Defaults to the user cache directory")
+    parser_export.set_defaults(func=export)
+
+    parser_hub = commands.add_parser('hub', help="Serve prices to widgets on the local network")
+    parser_hub.add_argument('--host', default='127.0.0.1', help="Address to listen on")
+    parser_hub.add_argument('--port', type=int, default=8765, help="Port to listen on")
+    parser_hub.add_argument('--archive', help="Archive directory. Defaults to the user cache directory")
+    parser_hub.set_defaults(func=hub)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,74 @@
+from PyQt6.QtCore import QObject, QTimer, Qt, pyqtSignal
+from PyQt6.QtWidgets import QApplication, QStyle, QSystemTrayIcon
+from utils.alerts import AlertEngine
+from utils.clock import system_clock
+
+
+class AlertNotifier(QObject):
+    """Evaluates price alerts on the widget's price events and shows desktop notifications
+
+    The engine only runs when prices arrive or an interval starts; the one
+    timer is set to the moment the next cheapest-window rule is due.
+    """
+
+    alert = pyqtSignal(object)
+
+    def __init__(self, rules, parent=None, clock=None):
+        """
+        Args:
+            rules (list): Rule texts or compiled rules, see utils.alerts
+            parent (QObject, optional): Parent object
+            clock (Clock, optional): Time the rules are evaluated at
+        """
+        super().__init__(parent)
+        self.clock = clock or system_clock
+        self.engine = AlertEngine(callback=self.alert.emit, clock=self.clock)
+        for rule in rules:
+            self.engine.add(rule)
+        self.alert.connect(self.notify)
+
+        self.due_timer = QTimer(self)
+        self.due_timer.setSingleShot(True)
+        self.due_timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self.due_timer.timeout.connect(self.on_due)
+
+        self.tray = None
+        if QSystemTrayIcon.isSystemTrayAvailable():
+            icon = QApplication.style().standardIcon(QStyle.StandardPixmap.SP_MessageBoxInformation)
+            self.tray = QSystemTrayIcon(icon, self)
+            self.tray.setToolTip("Elpris")
+
+    def prices_updated(self, region, today, tomorrow=None):
+        """New or refreshed prices for a region"""
+        self.engine.on_prices(region, today, tomorrow, now=self.clock.timestamp())
+        self._schedule()
+
+    def interval_started(self):
+        """A price interval started; the engine skips regions without prices"""
+        for region in range(1, 5):
+            self.engine.on_interval(region, now=self.clock.timestamp())
+        self._schedule()
+
+    def on_due(self):
+        self.engine.on_due(now=self.clock.timestamp())
+        self._schedule()
+
+    def _schedule(self):
+        due = self.engine.next_due()
+        if due is None:
+            self.due_timer.stop()
+            return
+        self.due_timer.start(max(0, int((due - self.clock.timestamp()) * 1000)))
+
+    def notify(self, alert):
+        if self.tray is not None:
+            self.tray.show()
+            self.tray.showMessage("Elpris", alert.message,
+                                  QSystemTrayIcon.MessageIcon.Information)
+        else:
+            print(alert.message)
+
+    def stop(self):
+        self.due_timer.stop()
+        if self.tray is not None:
+            self.tray.hide()
@@ -0,0 +1,148 @@
+"""Headless export of daily price charts to PNG/SVG on a process pool"""
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import timedelta
+import numpy as np
+from utils.archive import PriceArchive
+from utils.optimizer import cheapest_window
+from utils.price_series import PriceSeries
+
+# Bump when the chart layout changes, so existing files are rendered again
+CHART_VERSION = 1
+MANIFEST = '.manifest.json'
+
+# One chart per worker process, reused for every day it renders
+_chart = None
+
+
+def _init_worker(dpi):
+    global _chart
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from .price_chart import PriceChart
+
+    _chart = PriceChart(dpi=dpi, today_label='Pris')
+    FigureCanvasAgg(_chart.figure)
+
+
+def _render(task):
+    """Render one region and day to all requested formats"""
+    region, day, starts, prices, window_hours, paths = task
+    series = PriceSeries(starts, prices)
+    highlight = cheapest_window(series, window_hours) if window_hours else None
+    _chart.update(series, highlight=highlight, title=f"SE{region} {day}")
+    _chart.set_now(None)
+    for path in paths:
+        tmp = f"{path}.tmp"
+        _chart.save(tmp, format=os.path.splitext(path)[1][1:])
+        os.replace(tmp, path)
+    return paths
+
+
+def _digest(starts, prices, window_hours, dpi):
+    """Fingerprint of everything a chart depends on"""
+    digest = hashlib.sha1(f"{CHART_VERSION}:{window_hours}:{dpi}".encode())
+    digest.update(np.ascontiguousarray(starts).tobytes())
+    digest.update(np.ascontiguousarray(prices).tobytes())
+    return digest.hexdigest()
+
+
+def _load_manifest(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_manifest(path, manifest):
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w') as f:
+        json.dump(manifest, f, indent=0, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def export_charts(output, start, end, regions=(1, 2, 3, 4), formats=('png',), archive=None,
+                  jobs=None, dpi=100, window_hours=3, force=False, progress=None):
+    """
+    Render one chart per region and day from the price archive
+
+    Days are rendered in parallel on a process pool; each worker builds its
+    figure once and reuses it. Charts whose prices and settings are unchanged
+    since the last export are skipped, tracked in a manifest in the output
+    directory.
+
+    Args:
+        output (str): Output directory, files are named SE<region>_<day>.<format>
+        start (date or datetime): First day, inclusive
+        end (date or datetime): Last day, inclusive
+        regions (iterable): Price regions (1-4)
+        formats (iterable): 'png' and/or 'svg'
+        archive (PriceArchive, optional): Price history. Defaults to the user archive
+        jobs (int, optional): Worker processes. Defaults to the number of CPUs
+        dpi (int): Resolution of PNG output
+        window_hours (float): Cheapest block to highlight, 0 for none
+        force (bool): Render even if up to date
+        progress (callable, optional): Called with the stats dict after every chart
+
+    Returns:
+        dict: total, todo (not up to date), rendered, skipped, missing and
+            failed charts, seconds and charts_per_second
+    """
+    archive = archive or PriceArchive()
+    os.makedirs(output, exist_ok=True)
+    manifest_path = os.path.join(output, MANIFEST)
+    manifest = _load_manifest(manifest_path)
+
+    stats = {'total': 0, 'todo': 0, 'rendered': 0, 'skipped': 0, 'missing': 0, 'failed': 0,
+             'seconds': 0.0, 'charts_per_second': 0.0}
+    tasks = []
+    day = start
+    while day <= end:
+        for region in regions:
+            stats['total'] += 1
+            starts, prices = archive.query(region, day, day)
+            if not len(prices):
+                stats['missing'] += 1
+                continue
+            name = f"SE{region}_{day:%Y-%m-%d}"
+            paths = [os.path.join(output, f"{name}.{fmt}") for fmt in formats]
+            digest = _digest(starts, prices, window_hours, dpi)
+            if not force and manifest.get(name) == digest and all(os.path.exists(p) for p in paths):
+                stats['skipped'] += 1
+                continue
+            tasks.append((name, digest, (region, f"{day:%Y-%m-%d}", np.array(starts),
+                                         np.array(prices), window_hours, paths)))
+        day += timedelta(days=1)
+
+    stats['todo'] = len(tasks)
+    if not tasks:
+        return stats
+
+    began = time.perf_counter()
+    jobs = min(jobs or os.cpu_count() or 1, len(tasks))
+    try:
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                                 initargs=(dpi,)) as pool:
+            futures = {pool.submit(_render, task): (name, digest) for name, digest, task in tasks}
+            for future in as_completed(futures):
+                name, digest = futures[future]
+                try:
+                    future.result()
+                except Exception as e:
+                    print(f"Error rendering {name}: {e}")
+                    stats['failed'] += 1
+                    manifest.pop(name, None)
+                else:
+                    stats['rendered'] += 1
+                    manifest[name] = digest
+                stats['seconds'] = time.perf_counter() - began
+                stats['charts_per_second'] = stats['rendered'] / stats['seconds']
+                if progress:
+                    progress(stats)
+    finally:
+        # Keep what was rendered, also when interrupted
+        _save_manifest(manifest_path, manifest)
+    return stats
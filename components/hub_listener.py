@@ -0,0 +1,61 @@
+import threading
+import requests
+from PyQt6.QtCore import QObject, pyqtSignal
+
+
+class HubListener(QObject):
+    """Receives push updates from a price hub and re-emits them on the GUI thread
+
+    The hub is long-polled on a daemon thread. Emitting `updated` from there
+    is delivered to GUI-thread receivers as a queued call.
+    """
+
+    updated = pyqtSignal(int)
+
+    # Seconds the hub may hold a request, and the retry delay after errors
+    WAIT = 30
+    RETRY = 10
+
+    def __init__(self, hub_url, parent=None):
+        super().__init__(parent)
+        self.updates_url = hub_url.rstrip('/') + '/api/v1/updates'
+        self._stop = threading.Event()
+        self._session = None
+        self._thread = None
+
+    def start(self):
+        self._session = requests.Session()
+        self._thread = threading.Thread(target=self._run, args=(self._session, self._stop),
+                                        name='elpris-hub-listener', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop listening without waiting for the pending long-poll
+
+        Idle connections are closed; a request still in flight ends with its
+        timeout or the process, as the thread is a daemon and never holds up
+        exit.
+        """
+        self._stop.set()
+        if self._session is not None:
+            self._session.close()
+
+    def _run(self, session, stop):
+        version = None
+        while not stop.is_set():
+            try:
+                params = {} if version is None else {'since': version, 'timeout': self.WAIT}
+                response = session.get(self.updates_url, params=params, timeout=(3.05, self.WAIT + 10))
+                response.raise_for_status()
+                latest = response.json()['version']
+                if stop.is_set():
+                    break
+                if version is not None and latest > version:
+                    self.updated.emit(latest)
+                version = latest
+            except Exception as e:
+                if stop.is_set():
+                    break
+                print(f"Error listening to price hub: {e}")
+                stop.wait(self.RETRY)
+        session.close()
@@ -0,0 +1,61 @@
+from PyQt6.QtWidgets import QLabel
+from PyQt6.QtGui import QFont
+from PyQt6.QtCore import Qt, QTimer
+from datetime import datetime
+from utils.metrics import metrics
+
+
+class MetricsOverlay(QLabel):
+    """Debug overlay with the most recent timings and the counters
+
+    Floats over the bottom-left corner of its parent and refreshes itself
+    once a second while visible.
+    """
+
+    # Number of timings shown
+    LINES = 8
+
+    REFRESH_MS = 1000
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setFont(QFont("Consolas", 8))
+        self.setStyleSheet("""
+            QLabel {
+                background-color: rgba(0, 0, 0, 170);
+                color: #e0e0e0;
+                border-radius: 6px;
+                padding: 6px;
+            }
+        """)
+        # Clicks and drags go to the widget underneath
+        self.setAttribute(Qt.WidgetAttribute.WA_TransparentForMouseEvents)
+
+        self.timer = QTimer(self)
+        self.timer.setInterval(self.REFRESH_MS)
+        self.timer.timeout.connect(self.refresh)
+
+    def showEvent(self, event):
+        self.refresh()
+        self.timer.start()
+        super().showEvent(event)
+
+    def hideEvent(self, event):
+        self.timer.stop()
+        super().hideEvent(event)
+
+    def refresh(self):
+        lines = [f"{datetime.fromtimestamp(wall_time):%H:%M:%S} {name:<15}{ms:8.1f} ms"
+                 for wall_time, name, ms in metrics.last(self.LINES)]
+        counters = metrics.snapshot()['counters']
+        lines.append(
+            f"req {counters.get('requests', 0)}  "
+            f"{counters.get('bytes', 0) / 1024:.0f} kB  "
+            f"err {counters.get('errors', 0)}  "
+            f"cache {counters.get('cache_hits', 0)}/"
+            f"{counters.get('cache_hits', 0) + counters.get('cache_misses', 0)}"
+        )
+        self.setText("\n".join(lines))
+        self.adjustSize()
+        self.move(8, self.parentWidget().height() - self.height() - 8)
+        self.raise_()
@@ -0,0 +1,410 @@
+from PyQt6.QtWidgets import QWidget, QToolTip
+from PyQt6.QtGui import QPainter, QPainterPath, QPen, QColor, QFont, QPixmap, QBrush, QPolygonF
+from PyQt6.QtCore import Qt, QPointF, QRectF
+from datetime import datetime
+from utils.clock import system_clock
+from utils.metrics import metrics
+import numpy as np
+import time
+
+TODAY_COLOR = QColor('#0066CC')
+TOMORROW_COLOR = QColor('#CC0000')
+WINDOW_COLOR = QColor(46, 125, 50, 30)
+OUTLOOK_COLOR = QColor('#7b1fa2')
+OUTLOOK_BAND_COLOR = QColor(123, 31, 162, 38)
+GRID_COLOR = QColor(128, 128, 128, 40)
+AXIS_COLOR = QColor('#CCCCCC')
+TEXT_COLOR = QColor('#444444')
+
+
+class PainterPriceGraph(QWidget):
+    """Lightweight price graph drawn directly with QPainter
+
+    A drop-in alternative to PriceGraph with the same update_graph/update_now
+    interface, without loading matplotlib. Everything except the "now" marker
+    is rendered into a cached pixmap whenever the data or the size changes;
+    each paint then only blits that pixmap and draws the marker on top.
+
+    A forecast outlook for the following days is shown in a strip below the
+    day graph when one is given.
+    """
+
+    # Space around the plot area for tick labels and the legend
+    MARGIN_LEFT = 60
+    MARGIN_RIGHT = 150
+    MARGIN_TOP = 30
+    MARGIN_BOTTOM = 45
+
+    # Share of the plot height given to the outlook strip, and the space
+    # between it and the day graph for the day graph's axis labels
+    OUTLOOK_SHARE = 0.3
+    OUTLOOK_GAP = 45
+
+    def __init__(self, parent=None, clock=None):
+        super().__init__(parent)
+        self.clock = clock or system_clock
+        self.setMinimumHeight(200)
+        self.setMouseTracking(True)
+
+        # Timings of the most recent static render and paint, in milliseconds
+        self.last_draw_ms = None
+        self.last_blit_ms = None
+
+        self._today = None
+        self._tomorrow = None
+        self._highlight = None
+        self._outlook = None
+        self._static = None
+        self._font = QFont("Segoe UI", 9)
+
+    def update_graph(self, prices_today, prices_tomorrow=None, highlight=None, outlook=None):
+        """
+        Updates the graph content
+
+        Args:
+            prices_today (PriceSeries): Today's prices
+            prices_tomorrow (PriceSeries, optional): Tomorrow's prices if published
+            highlight (dict, optional): Window with 'start' and 'end' Unix
+                timestamps to highlight, e.g. the cheapest block
+            outlook (Outlook, optional): Forecast of the following days
+        """
+        if (prices_today is not self._today or prices_tomorrow is not self._tomorrow
+                or highlight != self._highlight or outlook is not self._outlook):
+            self._today = prices_today
+            self._tomorrow = prices_tomorrow
+            self._highlight = highlight
+            self._outlook = outlook
+            self._static = None
+        self.update()
+
+    def update_now(self):
+        """Repaint the current time marker over the cached static layer"""
+        self.update()
+
+    def clear_plot(self):
+        self._today = self._tomorrow = self._highlight = self._outlook = None
+        self._static = None
+        self.update()
+
+    def resizeEvent(self, event):
+        self._static = None
+        super().resizeEvent(event)
+
+    # Coordinate mapping
+
+    def _plot_rect(self):
+        width = max(1, self.width() - self.MARGIN_LEFT - self.MARGIN_RIGHT)
+        height = max(1, self.height() - self.MARGIN_TOP - self.MARGIN_BOTTOM)
+        if self._outlook:
+            height = max(1, height * (1 - self.OUTLOOK_SHARE) - self.OUTLOOK_GAP)
+        return QRectF(self.MARGIN_LEFT, self.MARGIN_TOP, width, height)
+
+    def _outlook_rect(self):
+        day = self._plot_rect()
+        top = day.bottom() + self.OUTLOOK_GAP
+        return QRectF(day.left(), top, day.width(),
+                      max(1, self.height() - self.MARGIN_BOTTOM - top))
+
+    def _ranges(self):
+        today = self._today
+        t0, t1 = float(today.starts[0]), float(today.ends[-1])
+        price_min, price_max = today.min, today.max
+        if self._tomorrow:
+            price_min = min(price_min, self._tomorrow.min)
+            price_max = max(price_max, self._tomorrow.max)
+        y0 = max(0, price_min * 0.9)
+        y1 = price_max * 1.1
+        if y1 <= y0:
+            y1 = y0 + 1
+        return t0, t1, y0, y1
+
+    def _mapper(self):
+        rect = self._plot_rect()
+        t0, t1, y0, y1 = self._ranges()
+        sx = rect.width() / (t1 - t0)
+        sy = rect.height() / (y1 - y0)
+
+        def to_x(t):
+            return rect.left() + (np.asarray(t, dtype=np.float64) - t0) * sx
+
+        def to_y(price):
+            return rect.bottom() - (np.asarray(price, dtype=np.float64) - y0) * sy
+
+        return rect, to_x, to_y
+
+    # Rendering
+
+    def _render_static(self):
+        start = time.perf_counter()
+        ratio = self.devicePixelRatioF()
+        pixmap = QPixmap(int(self.width() * ratio), int(self.height() * ratio))
+        pixmap.setDevicePixelRatio(ratio)
+        pixmap.fill(QColor('#f8f9fa'))
+
+        painter = QPainter(pixmap)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.setFont(self._font)
+        rect, to_x, to_y = self._mapper()
+        painter.fillRect(rect, Qt.GlobalColor.white)
+
+        self._draw_highlight(painter, rect, to_x)
+        self._draw_grid(painter, rect, to_x, to_y)
+
+        today = self._today
+        self._draw_series(painter, today.starts, today.ends, today.prices, today.mean,
+                          TODAY_COLOR, to_x, to_y, rect)
+        if self._tomorrow:
+            tomorrow = self._tomorrow
+            # Overlay tomorrow on today's axis, aligned at midnight
+            shift = tomorrow.starts[0] - today.starts[0]
+            self._draw_series(painter, tomorrow.starts - shift, tomorrow.ends - shift,
+                              tomorrow.prices, tomorrow.mean, TOMORROW_COLOR, to_x, to_y, rect,
+                              alpha=180)
+
+        self._draw_legend(painter, rect)
+        if self._outlook:
+            self._draw_outlook(painter, self._outlook_rect())
+        painter.end()
+
+        self._static = pixmap
+        self.last_draw_ms = (time.perf_counter() - start) * 1000
+        metrics.observe('graph_draw', self.last_draw_ms)
+
+    def _draw_highlight(self, painter, rect, to_x):
+        window = self._highlight
+        if not window:
+            return
+        t0, t1, _, _ = self._ranges()
+        parts = [(window['start'], window['end'])]
+        if self._tomorrow:
+            shift = float(self._tomorrow.starts[0] - self._today.starts[0])
+            parts.append((window['start'] - shift, window['end'] - shift))
+        for start, end in parts:
+            start, end = max(start, t0), min(end, t1)
+            if start < end:
+                x0, x1 = float(to_x(start)), float(to_x(end))
+                painter.fillRect(QRectF(x0, rect.top(), x1 - x0, rect.height()), WINDOW_COLOR)
+
+    def _draw_grid(self, painter, rect, to_x, to_y):
+        t0, t1, y0, y1 = self._ranges()
+        metrics = painter.fontMetrics()
+
+        # Vertical grid and tick labels at every local hour
+        painter.setPen(QPen(GRID_COLOR, 1, Qt.PenStyle.DashLine))
+        first_hour = int(np.ceil(t0 / 3600.0)) * 3600
+        for t in range(first_hour, int(t1) + 1, 3600):
+            x = float(to_x(t))
+            painter.setPen(QPen(GRID_COLOR, 1, Qt.PenStyle.DashLine))
+            painter.drawLine(QPointF(x, rect.top()), QPointF(x, rect.bottom()))
+            label = f"{datetime.fromtimestamp(t).hour:02d}"
+            painter.setPen(TEXT_COLOR)
+            painter.drawText(QPointF(x - metrics.horizontalAdvance(label) / 2,
+                                     rect.bottom() + metrics.height() + 2), label)
+
+        # Horizontal grid with roughly five price labels
+        step = self._nice_step((y1 - y0) / 5)
+        price = np.ceil(y0 / step) * step
+        while price <= y1:
+            y = float(to_y(price))
+            painter.setPen(QPen(GRID_COLOR, 1, Qt.PenStyle.DashLine))
+            painter.drawLine(QPointF(rect.left(), y), QPointF(rect.right(), y))
+            label = f"{price:.2f}"
+            painter.setPen(TEXT_COLOR)
+            painter.drawText(QPointF(rect.left() - metrics.horizontalAdvance(label) - 6,
+                                     y + metrics.ascent() / 2 - 1), label)
+            price += step
+
+        # Axes and axis titles
+        painter.setPen(QPen(AXIS_COLOR, 1))
+        painter.drawLine(rect.bottomLeft(), rect.bottomRight())
+        painter.drawLine(rect.bottomLeft(), rect.topLeft())
+        painter.setPen(TEXT_COLOR)
+        painter.drawText(QPointF(rect.center().x() - metrics.horizontalAdvance("Timme") / 2,
+                                 rect.bottom() + 2 * metrics.height() + 6), "Timme")
+        painter.save()
+        painter.translate(14, rect.center().y() + metrics.horizontalAdvance("kr/kWh") / 2)
+        painter.rotate(-90)
+        painter.drawText(QPointF(0, 0), "kr/kWh")
+        painter.restore()
+
+    @staticmethod
+    def _nice_step(raw):
+        magnitude = 10 ** np.floor(np.log10(raw)) if raw > 0 else 0.1
+        for factor in (1, 2, 2.5, 5, 10):
+            if raw <= factor * magnitude:
+                return factor * magnitude
+        return 10 * magnitude
+
+    def _draw_series(self, painter, starts, ends, prices, mean, color, to_x, to_y, rect, alpha=255):
+        xs = to_x(starts)
+        x_end = float(to_x(ends[-1]))
+        ys = to_y(prices)
+
+        # Step line: horizontal at each price, vertical at each boundary
+        path = QPainterPath(QPointF(float(xs[0]), float(ys[0])))
+        for i in range(len(xs)):
+            next_x = float(xs[i + 1]) if i + 1 < len(xs) else x_end
+            path.lineTo(QPointF(next_x, float(ys[i])))
+            if i + 1 < len(xs):
+                path.lineTo(QPointF(next_x, float(ys[i + 1])))
+
+        line_color = QColor(color)
+        line_color.setAlpha(alpha)
+        painter.setPen(QPen(line_color, 2))
+        painter.setBrush(Qt.BrushStyle.NoBrush)
+        painter.drawPath(path)
+
+        # Markers at each interval start, skipped when too dense to read
+        if rect.width() / max(1, len(xs)) >= 6:
+            painter.setPen(Qt.PenStyle.NoPen)
+            marker_color = QColor(color)
+            marker_color.setAlpha(180)
+            painter.setBrush(QBrush(marker_color))
+            for x, y in zip(xs, ys):
+                painter.drawEllipse(QPointF(float(x), float(y)), 2.5, 2.5)
+
+        # Average line
+        avg_color = QColor(color)
+        avg_color.setAlpha(128)
+        painter.setPen(QPen(avg_color, 1, Qt.PenStyle.DashLine))
+        y = float(to_y(mean))
+        painter.drawLine(QPointF(rect.left(), y), QPointF(rect.right(), y))
+
+    def _draw_outlook(self, painter, rect):
+        """Forecast mean as a dashed step line over its uncertainty band"""
+        outlook = self._outlook
+        t0, t1 = float(outlook.starts[0]), float(outlook.ends[-1])
+        low, high = float(outlook.lower.min()), float(outlook.upper.max())
+        margin = (high - low) * 0.1 or 0.1
+        low, high = low - margin, high + margin
+        sx = rect.width() / (t1 - t0)
+        sy = rect.height() / (high - low)
+        xs = rect.left() + (np.append(outlook.starts, outlook.ends[-1]) - t0) * sx
+
+        def to_y(price):
+            return rect.bottom() - (np.asarray(price, dtype=np.float64) - low) * sy
+
+        def steps(values):
+            # Corner points of a step line through values, left to right
+            ys = to_y(values)
+            return [QPointF(float(x), float(y))
+                    for i, y in enumerate(ys) for x in (xs[i], xs[i + 1])]
+
+        painter.fillRect(rect, Qt.GlobalColor.white)
+        metrics = painter.fontMetrics()
+
+        # Day boundaries with weekday labels
+        for day_start in outlook.day_starts:
+            x = float(rect.left() + (day_start - t0) * sx)
+            painter.setPen(QPen(GRID_COLOR, 1, Qt.PenStyle.DashLine))
+            painter.drawLine(QPointF(x, rect.top()), QPointF(x, rect.bottom()))
+            painter.setPen(TEXT_COLOR)
+            painter.drawText(QPointF(x + 4, rect.bottom() + metrics.height() + 2),
+                             datetime.fromtimestamp(int(day_start)).strftime('%a %d/%m'))
+
+        band = QPainterPath()
+        upper, lower = steps(outlook.upper), steps(outlook.lower)
+        band.addPolygon(QPolygonF(upper + lower[::-1]))
+        painter.fillPath(band, OUTLOOK_BAND_COLOR)
+
+        line = QPainterPath()
+        line.addPolygon(QPolygonF(steps(outlook.mean)))
+        painter.setPen(QPen(OUTLOOK_COLOR, 1.5, Qt.PenStyle.DashLine))
+        painter.setBrush(Qt.BrushStyle.NoBrush)
+        painter.drawPath(line)
+
+        # Price range labels and axes
+        painter.setPen(TEXT_COLOR)
+        for price in (low + margin, high - margin):
+            label = f"{price:.2f}"
+            painter.drawText(QPointF(rect.left() - metrics.horizontalAdvance(label) - 6,
+                                     float(to_y(price)) + metrics.ascent() / 2 - 1), label)
+        painter.setPen(QPen(AXIS_COLOR, 1))
+        painter.drawLine(rect.bottomLeft(), rect.bottomRight())
+        painter.drawLine(rect.bottomLeft(), rect.topLeft())
+
+        # Legend
+        x = rect.right() + 20
+        y = rect.center().y() - metrics.height() / 2
+        painter.setPen(QPen(OUTLOOK_COLOR, 2, Qt.PenStyle.DashLine))
+        painter.drawLine(QPointF(x, y), QPointF(x + 24, y))
+        painter.fillRect(QRectF(x, y + metrics.height() + 4 - 5, 24, 10), OUTLOOK_BAND_COLOR)
+        painter.setPen(TEXT_COLOR)
+        painter.drawText(QPointF(x + 32, y + metrics.ascent() / 2 - 1), "Prognos")
+        painter.drawText(QPointF(x + 32, y + metrics.height() + 4 + metrics.ascent() / 2 - 1),
+                         "Osäkerhet")
+
+    def _draw_legend(self, painter, rect):
+        entries = [("Idag", TODAY_COLOR, Qt.PenStyle.SolidLine),
+                   ("Idag snitt", TODAY_COLOR, Qt.PenStyle.DashLine)]
+        if self._tomorrow:
+            entries += [("Imorgon", TOMORROW_COLOR, Qt.PenStyle.SolidLine),
+                        ("Imorgon snitt", TOMORROW_COLOR, Qt.PenStyle.DashLine)]
+        if self._highlight:
+            entries.append(("Billigast", None, None))
+
+        metrics = painter.fontMetrics()
+        line_height = metrics.height() + 4
+        x = rect.right() + 20
+        y = rect.center().y() - line_height * len(entries) / 2
+        for label, color, style in entries:
+            if color is None:
+                painter.fillRect(QRectF(x, y - 5, 24, 10), QColor(46, 125, 50, 60))
+            else:
+                painter.setPen(QPen(color, 2, style))
+                painter.drawLine(QPointF(x, y), QPointF(x + 24, y))
+            painter.setPen(TEXT_COLOR)
+            painter.drawText(QPointF(x + 32, y + metrics.ascent() / 2 - 1), label)
+            y += line_height
+
+    def paintEvent(self, event):
+        if self._today is None or not len(self._today):
+            return
+        if self._static is None or self._static.size() != self.size() * self._static.devicePixelRatio():
+            self._render_static()
+
+        start = time.perf_counter()
+        painter = QPainter(self)
+        painter.drawPixmap(0, 0, self._static)
+        self._draw_now(painter)
+        painter.end()
+        self.last_blit_ms = (time.perf_counter() - start) * 1000
+
+    def _draw_now(self, painter):
+        now = self.clock.timestamp()
+        price = self._today.price_at(now)
+        if price is None:
+            return
+        rect, to_x, to_y = self._mapper()
+        x, y = float(to_x(now)), float(to_y(price))
+
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.setPen(QPen(QColor(102, 102, 102, 80), 1, Qt.PenStyle.DashLine))
+        painter.drawLine(QPointF(x, rect.top()), QPointF(x, rect.bottom()))
+        painter.setPen(Qt.PenStyle.NoPen)
+        painter.setBrush(QBrush(TODAY_COLOR))
+        painter.drawEllipse(QPointF(x, y), 5, 5)
+        painter.setFont(self._font)
+        painter.setPen(Qt.GlobalColor.black)
+        painter.drawText(QPointF(x + 10, y - 10), f"{price:.2f} kr/kWh")
+
+    def mouseMoveEvent(self, event):
+        """Tooltip with the prices of the interval under the cursor"""
+        if self._today is not None and len(self._today):
+            rect, _, _ = self._mapper()
+            pos = event.position()
+            if rect.contains(pos):
+                t0, t1, _, _ = self._ranges()
+                t = t0 + (pos.x() - rect.left()) / rect.width() * (t1 - t0)
+                index = self._today.index_at(t)
+                if index is not None:
+                    text = f"kl {self._today.interval_label(index)}: {self._today.prices[index]:.2f} kr/kWh"
+                    if self._tomorrow:
+                        shift = float(self._tomorrow.starts[0] - self._today.starts[0])
+                        tomorrow_price = self._tomorrow.price_at(t + shift)
+                        if tomorrow_price is not None:
+                            text += f"\nimorgon: {tomorrow_price:.2f} kr/kWh"
+                    QToolTip.showText(event.globalPosition().toPoint(), text, self)
+            else:
+                QToolTip.hideText()
+        event.ignore()
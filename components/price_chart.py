@@ -0,0 +1,339 @@
+import matplotlib.dates as mdates
+from matplotlib.figure import Figure
+from matplotlib.patches import Rectangle
+from matplotlib.ticker import FuncFormatter
+import numpy as np
+
+
+class PriceChart:
+    """Price chart built on a plain Matplotlib figure, without Qt
+
+    Axes, lines and styling are created once. update() only changes artist
+    data and axis limits, so one chart can be reused for any number of days.
+    PriceGraph shows it in the widget; headless exports save it to PNG or SVG.
+
+    The x-axis is real time, labelled in Swedish local time, so hourly,
+    quarter-hourly and DST days with 23 or 25 hours are all drawn correctly.
+
+    A forecast outlook for the following days is shown in a strip below the
+    day graph when one is given.
+    """
+
+    # Time zone of the price data, used for the hour labels
+    TIMEZONE = 'Europe/Stockholm'
+
+    # Axes positions (left, bottom, width, height) without and with the outlook
+    DAY_AXES = (0.1, 0.1, 0.7, 0.8)
+    DAY_AXES_WITH_OUTLOOK = (0.1, 0.52, 0.7, 0.4)
+    OUTLOOK_AXES = (0.1, 0.1, 0.7, 0.18)
+
+    def __init__(self, figsize=(10, 6), dpi=100, today_label='Idag', tomorrow_label='Imorgon'):
+        """
+        Args:
+            figsize (tuple): Figure size in inches
+            dpi (int): Figure resolution
+            today_label (str): Legend label of the first day
+            tomorrow_label (str): Legend label of the overlaid second day
+        """
+        self.today_label = today_label
+        self.tomorrow_label = tomorrow_label
+        self._series = None
+        self._has_tomorrow = None
+        self._outlook_band = None
+        self._create_figure(figsize, dpi)
+
+    def _create_figure(self, figsize, dpi):
+        """Creates the figure, axes and all artists once"""
+        self.figure = Figure(figsize=figsize, dpi=dpi)
+
+        ax = self.ax = self.figure.add_subplot(111)
+
+        # Configure background
+        ax.set_facecolor('white')
+        self.figure.patch.set_facecolor('#f8f9fa')
+        ax.grid(True, linestyle='-', alpha=0.1, color='gray')
+
+        # Today's prices
+        self.today_line, = ax.plot([], [], drawstyle='steps-post', color='#0066CC',
+                                   linewidth=2, label=self.today_label, zorder=2)
+        self.today_markers, = ax.plot([], [], 'o', color='#0066CC',
+                                      markersize=4, alpha=0.7, zorder=2)
+        # Average line for today
+        self.today_avg = ax.axhline(y=0, color='#0066CC', linestyle='--',
+                                    alpha=0.5, label=f'{self.today_label} snitt')
+
+        # Tomorrow's prices, hidden until published
+        self.tomorrow_line, = ax.plot([], [], drawstyle='steps-post', color='#CC0000',
+                                      linewidth=2, label=self.tomorrow_label, alpha=0.7, zorder=2)
+        self.tomorrow_markers, = ax.plot([], [], 'o', color='#CC0000',
+                                         markersize=4, alpha=0.7, zorder=2)
+        self.tomorrow_avg = ax.axhline(y=0, color='#CC0000', linestyle='--',
+                                       alpha=0.5, label=f'{self.tomorrow_label} snitt')
+
+        # Cheapest window, split into the part on today's and tomorrow's curve
+        self.today_window = Rectangle((0, 0), 0, 1, transform=ax.get_xaxis_transform(),
+                                      color='#2e7d32', alpha=0.12, zorder=1, visible=False)
+        self.tomorrow_window = Rectangle((0, 0), 0, 1, transform=ax.get_xaxis_transform(),
+                                         color='#2e7d32', alpha=0.12, zorder=1, visible=False,
+                                         hatch='//')
+        ax.add_patch(self.today_window)
+        ax.add_patch(self.tomorrow_window)
+        # Legend entry that stays visible while the window itself is hidden
+        self.window_legend = Rectangle((0, 0), 1, 1, color='#2e7d32', alpha=0.12,
+                                       label='Billigast')
+
+        # Current time and price, animated so a widget can blit them
+        self.now_marker, = ax.plot([], [], 'o', color='#0066CC',
+                                   markersize=10, zorder=3, animated=True)
+        self.now_line = ax.axvline(x=0, color='#666666', linestyle='--',
+                                   alpha=0.3, animated=True)
+        self.now_annotation = ax.annotate('', xy=(0, 0),
+                                          xytext=(10, 10), textcoords='offset points',
+                                          bbox=dict(boxstyle='round,pad=0.5', fc='none', ec='none', alpha=0.8),
+                                          zorder=4, animated=True)
+
+        def format_time(x, p):
+            time = mdates.num2date(x, tz=self.TIMEZONE)
+            return time.strftime('%H')
+
+        ax.xaxis.set_major_formatter(FuncFormatter(format_time))
+        ax.xaxis.set_major_locator(mdates.HourLocator(interval=1, tz=self.TIMEZONE))
+
+        # Add "Hour" as x-axis label
+        ax.set_xlabel('Timme', fontsize=10, color='#444444', labelpad=10)
+        ax.tick_params(axis='x', labelsize=9, pad=5)
+        ax.grid(True, which='major', linestyle='--', alpha=0.2)
+
+        # Y-axis formatting
+        ax.set_ylabel('kr/kWh', fontsize=10, color='#444444')
+        ax.tick_params(axis='y', labelsize=9)
+
+        # Remove excess frames
+        ax.spines['top'].set_visible(False)
+        ax.spines['right'].set_visible(False)
+        ax.spines['left'].set_color('#CCCCCC')
+        ax.spines['bottom'].set_color('#CCCCCC')
+
+        # Adjust figure size and margins - ONLY ONCE
+        self.figure.subplots_adjust(
+            left=0.1,    # More space on the left
+            right=0.8,   # More space on the right for the legend
+            bottom=0.1,
+            top=0.9
+        )
+
+        self._create_outlook_axes()
+
+    def _create_outlook_axes(self):
+        """Strip below the day graph with the forecast of the following days"""
+        ax = self.outlook_ax = self.figure.add_axes(self.OUTLOOK_AXES, visible=False)
+        ax.set_facecolor('white')
+        self.outlook_line, = ax.plot([], [], drawstyle='steps-post', color='#7b1fa2',
+                                     linewidth=1.5, linestyle='--', label='Prognos')
+        self.outlook_band_legend = Rectangle((0, 0), 1, 1, color='#7b1fa2', alpha=0.15,
+                                             label='Osäkerhet')
+
+        def format_day(x, p):
+            return mdates.num2date(x, tz=self.TIMEZONE).strftime('%a %d/%m')
+
+        ax.xaxis.set_major_locator(mdates.DayLocator(tz=self.TIMEZONE))
+        ax.xaxis.set_major_formatter(FuncFormatter(format_day))
+        ax.tick_params(axis='both', labelsize=8)
+        ax.grid(True, which='major', linestyle='--', alpha=0.2)
+        ax.set_ylabel('kr/kWh', fontsize=9, color='#444444')
+        for side in ('top', 'right'):
+            ax.spines[side].set_visible(False)
+        for side in ('left', 'bottom'):
+            ax.spines[side].set_color('#CCCCCC')
+        ax.legend(handles=[self.outlook_line, self.outlook_band_legend],
+                  bbox_to_anchor=(1.05, 0.5), loc='center left', facecolor='white',
+                  edgecolor='none', fontsize=9, framealpha=0.9)
+
+    def _update_legend(self, has_tomorrow):
+        """Rebuild the legend only when the set of visible series changes"""
+        if has_tomorrow == self._has_tomorrow:
+            return
+        self._has_tomorrow = has_tomorrow
+
+        handles = [self.today_line, self.today_avg]
+        if has_tomorrow:
+            handles += [self.tomorrow_line, self.tomorrow_avg]
+        handles.append(self.window_legend)
+
+        # Create legend with more space
+        self.ax.legend(
+            handles=handles,
+            bbox_to_anchor=(1.05, 0.5),
+            loc='center left',
+            facecolor='white',
+            edgecolor='none',
+            fontsize=9,
+            framealpha=0.9
+        )
+
+    @property
+    def series(self):
+        """Today's prices as last given to update(), or None"""
+        return self._series
+
+    def clear(self):
+        """Hides all data without destroying the axes"""
+        for artist in (self.today_line, self.today_markers, self.today_avg,
+                       self.tomorrow_line, self.tomorrow_markers, self.tomorrow_avg):
+            artist.set_visible(False)
+        self._set_outlook(None)
+        self._series = None
+
+    def update(self, prices_today, prices_tomorrow=None, highlight=None, outlook=None, title=None):
+        """
+        Sets the chart content without drawing it
+
+        Args:
+            prices_today (PriceSeries): Today's prices
+            prices_tomorrow (PriceSeries, optional): Tomorrow's prices if published
+            highlight (dict, optional): Window with 'start' and 'end' Unix
+                timestamps to highlight, e.g. the cheapest block
+            outlook (Outlook, optional): Forecast of the following days
+            title (str, optional): Title above the day graph
+        """
+        # Prepare data: interval starts plus the end of the last interval
+        time_points = self.to_num(np.append(prices_today.starts, prices_today.ends[-1]))
+
+        # Today's prices
+        prices = prices_today.prices
+        prices_extended = np.append(prices, prices[-1])
+        avg_price = prices_today.mean
+        self._series = prices_today
+
+        self.today_line.set_data(time_points, prices_extended)
+        self.today_markers.set_data(time_points[:-1], prices)
+        self.today_avg.set_ydata([avg_price, avg_price])
+        for artist in (self.today_line, self.today_markers, self.today_avg):
+            artist.set_visible(True)
+
+        # Tomorrow's prices if available
+        price_min, price_max = prices_today.min, prices_today.max
+        if prices_tomorrow:
+            tomorrow_prices = prices_tomorrow.prices
+            tomorrow_prices_extended = np.append(tomorrow_prices, tomorrow_prices[-1])
+            tomorrow_avg = prices_tomorrow.mean
+            # Overlay tomorrow on today's axis, aligned at midnight
+            shift = prices_tomorrow.starts[0] - prices_today.starts[0]
+            tomorrow_points = self.to_num(
+                np.append(prices_tomorrow.starts, prices_tomorrow.ends[-1]) - shift
+            )
+            price_min = min(price_min, prices_tomorrow.min)
+            price_max = max(price_max, prices_tomorrow.max)
+
+            self.tomorrow_line.set_data(tomorrow_points, tomorrow_prices_extended)
+            self.tomorrow_markers.set_data(tomorrow_points[:-1], tomorrow_prices)
+            self.tomorrow_avg.set_ydata([tomorrow_avg, tomorrow_avg])
+        for artist in (self.tomorrow_line, self.tomorrow_markers, self.tomorrow_avg):
+            artist.set_visible(bool(prices_tomorrow))
+        self._update_legend(bool(prices_tomorrow))
+
+        self._set_highlight(highlight, prices_today, prices_tomorrow)
+
+        # X-axis limits
+        self.ax.set_xlim(time_points[0], time_points[-1])
+
+        # Adjust y-axis limits
+        y_min = max(0, price_min * 0.9)
+        y_max = price_max * 1.1
+        self.ax.set_ylim(y_min, y_max)
+
+        self.ax.set_title(title or '', fontsize=11, color='#444444')
+        self._set_outlook(outlook)
+
+    def _set_outlook(self, outlook):
+        """Show the outlook strip, shrinking the day graph to make room, or hide it"""
+        if self._outlook_band is not None:
+            self._outlook_band.remove()
+            self._outlook_band = None
+        visible = bool(outlook)
+        self.outlook_ax.set_visible(visible)
+        self.ax.set_position(self.DAY_AXES_WITH_OUTLOOK if visible else self.DAY_AXES)
+        if not visible:
+            return
+
+        points = self.to_num(np.append(outlook.starts, outlook.ends[-1]))
+        self.outlook_line.set_data(points, np.append(outlook.mean, outlook.mean[-1]))
+        self._outlook_band = self.outlook_ax.fill_between(
+            points, np.append(outlook.lower, outlook.lower[-1]),
+            np.append(outlook.upper, outlook.upper[-1]),
+            step='post', color='#7b1fa2', alpha=0.15, linewidth=0)
+        self.outlook_ax.set_xlim(points[0], points[-1])
+        low, high = float(outlook.lower.min()), float(outlook.upper.max())
+        margin = (high - low) * 0.1 or 0.1
+        self.outlook_ax.set_ylim(low - margin, high + margin)
+
+    def _set_highlight(self, window, prices_today, prices_tomorrow):
+        """Place the highlight rectangles, shifting tomorrow's part onto today's axis"""
+        today_end = int(prices_today.ends[-1])
+        parts = ((self.today_window, int(prices_today.starts[0]), today_end, 0),)
+        if prices_tomorrow:
+            shift = int(prices_tomorrow.starts[0] - prices_today.starts[0])
+            parts += ((self.tomorrow_window, int(prices_tomorrow.starts[0]),
+                       int(prices_tomorrow.ends[-1]), shift),)
+        else:
+            self.tomorrow_window.set_visible(False)
+
+        for rect, day_start, day_end, shift in parts:
+            start = max(window['start'], day_start) if window else 0
+            end = min(window['end'], day_end) if window else 0
+            if start >= end:
+                rect.set_visible(False)
+                continue
+            x0, x1 = self.to_num([start - shift, end - shift])
+            rect.set_x(x0)
+            rect.set_width(x1 - x0)
+            rect.set_visible(True)
+
+    @staticmethod
+    def to_num(timestamps):
+        """Convert Unix seconds to Matplotlib date numbers"""
+        millis = (np.asarray(timestamps, dtype=np.float64) * 1000).astype(np.int64)
+        return mdates.date2num(millis.astype('datetime64[ms]'))
+
+    def set_now(self, timestamp):
+        """
+        Move the current time marker, line and annotation
+
+        Args:
+            timestamp (float): Unix seconds, or None to hide the marker
+
+        Returns:
+            bool: Whether the marker is visible
+        """
+        current_price = None
+        if timestamp is not None and self._series is not None:
+            current_price = self._series.price_at(timestamp)
+
+        # Outside today's intervals, e.g. right after midnight before a refresh
+        visible = current_price is not None
+        for artist in (self.now_marker, self.now_line, self.now_annotation):
+            artist.set_visible(visible)
+        if not visible:
+            return False
+
+        x = self.to_num([timestamp])[0]
+        self.now_marker.set_data([x], [current_price])
+        self.now_line.set_xdata([x, x])
+        self.now_annotation.xy = (x, current_price)
+        self.now_annotation.set_text(f'{current_price:.2f} kr/kWh')
+        return True
+
+    def draw_animated(self):
+        """Draw the current time artists on the figure's renderer, for blitting"""
+        for artist in (self.now_line, self.now_marker, self.now_annotation):
+            self.ax.draw_artist(artist)
+
+    def save(self, path, format=None):
+        """
+        Render the chart to a file
+
+        Args:
+            path (str): Output file
+            format (str, optional): 'png' or 'svg'. Defaults to the file extension
+        """
+        self.figure.savefig(path, format=format, facecolor=self.figure.get_facecolor())
@@ -1,12 +1,26 @@
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton, 
-                           QLabel, QGraphicsDropShadowEffect, QComboBox, QApplication)
-from PyQt6.QtGui import QFont, QColor
-from PyQt6.QtCore import Qt, QTimer, QPropertyAnimation, QEasingCurve, QSize, QPoint
+                           QLabel, QGraphicsDropShadowEffect, QComboBox, QApplication,
+                           QSizePolicy)
+from PyQt6.QtGui import QFont, QColor, QPainter
+from PyQt6.QtCore import (Qt, QPropertyAnimation, QAbstractAnimation, QEasingCurve, QSize,
+                          QPoint, QTimer)
 from .modern_frame import ModernFrame
-from .price_graph import PriceGraph
+from .price_fetcher import PriceFetcher
+from .refresh_scheduler import RefreshScheduler
+from .hub_listener import HubListener
+from .metrics_overlay import MetricsOverlay
+from .alert_notifier import AlertNotifier
 from utils.api import ElprisAPI
+from utils.archive import PriceArchive
+from utils.forecast import PriceForecaster
+from utils.hub import hub_base_url
+from utils.metrics import metrics
+from utils.optimizer import cheapest_window
+from utils.price_series import PriceSeries
+from utils.schedule import PUBLISH_HOUR
 from datetime import datetime, timedelta
 import locale
+import numpy as np
 
 try:
     locale.setlocale(locale.LC_TIME, 'sv_SE.UTF-8')
@@ -16,6 +30,13 @@ except:
     except:
         print("Kunde inte sätta svenskt locale")
 
+def same_prices(a, b):
+    """Whether two optional price series hold the same intervals and prices"""
+    if a is None or b is None:
+        return a is b
+    return (len(a) == len(b) and np.array_equal(a.starts, b.starts)
+            and np.array_equal(a.prices, b.prices))
+
 def format_date(date):
     """Platform-independent date formatting"""
     day = str(date.day)
@@ -53,19 +74,102 @@ class ExpandButton(QPushButton):
         """)
         self.setText("↕")
 
+class GraphPreview(QWidget):
+    """Pre-rendered graph image, scaled to fit while the widget animates"""
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.pixmap = None
+        # Follow the animated size instead of pushing the layout around
+        self.setSizePolicy(QSizePolicy.Policy.Ignored, QSizePolicy.Policy.Ignored)
+    
+    def set_pixmap(self, pixmap):
+        self.pixmap = pixmap
+        self.update()
+    
+    def paintEvent(self, event):
+        if self.pixmap is not None:
+            painter = QPainter(self)
+            painter.drawPixmap(self.rect(), self.pixmap)
+
 class ElprisWidget(QWidget):
-    def __init__(self):
+    # Marks view model fields that have never been applied
+    _UNSET = object()
+
+    # Graph implementations selectable with the graph_backend argument
+    GRAPH_BACKENDS = ('matplotlib', 'painter')
+    
+    # Idle time after a data change before the graph is pre-rendered
+    PRERENDER_DELAY_MS = 1000
+    
+    # Interval between metrics exports when a metrics_path is set
+    METRICS_EXPORT_MS = 15000
+
+    def __init__(self, api=None, prefetch_all_regions=True, cheapest_window_hours=3, hub_url=None,
+                 graph_backend='matplotlib', metrics_path=None, debug_overlay=False, outlook_days=7,
+                 alert_rules=None, clock=None):
         super().__init__()
         self.current_region = 3
+        self.hub_url = hub_url
+        self.metrics_path = metrics_path
+        self.debug_overlay = debug_overlay
+        if graph_backend not in self.GRAPH_BACKENDS:
+            raise ValueError(f"Unknown graph backend: {graph_backend}")
+        self.graph_backend = graph_backend
+        
+        # Length of the cheapest upcoming block shown for load scheduling
+        self.cheapest_window_hours = cheapest_window_hours
+        self.cheapest_window = None
+        
+        # Forecast prices up to this many days from today in the expanded graph
+        self.outlook_days = outlook_days
+        self.forecasters = {}
+        self.outlook = None
+        
+        # Every fetched day is also kept in the local price archive
+        if api is None:
+            base_url = hub_base_url(hub_url) if hub_url else None
+            api = ElprisAPI(base_url=base_url, archive=PriceArchive(), clock=clock)
+        self.api = api
+        # The widget and its API client agree on what time it is
+        self.clock = clock or api.clock
+        
+        # Keep every region in memory so switching region needs no network
+        self.prefetch_all_regions = prefetch_all_regions
+        self.region_prices = {}
         
         # Initialize price variables
         self.prices_today = None
         self.prices_tomorrow = None
         self.prices_yesterday = None
-        
-        # Initialize price graph
-        self.price_graph = PriceGraph(self)
-        self.price_graph.hide()
+        self.refreshing = False
+        # Set when the last refresh could not reach the upstream
+        self.stale = False
+        self.view_model = {}
+        
+        # Fetches run on a thread pool and report back through signals
+        self.fetcher = PriceFetcher(self.api, self)
+        self.fetcher.region_ready.connect(self.on_prices_ready)
+        self.fetcher.batch_finished.connect(self.on_batch_finished)
+        
+        # Price alerts, checked as prices arrive and at interval boundaries
+        self.alerts = AlertNotifier(alert_rules, self, clock=self.clock) if alert_rules else None
+        
+        # The graph (and matplotlib, for that backend) is only loaded once it is needed
+        self.price_graph = None
+        
+        # Once the graph exists (or with the cheap painter backend), it is rendered
+        # off-screen while compact whenever the data changes, so expanding shows a
+        # ready image instead of rendering during the animation. Before that the
+        # first expand pays for it, keeping matplotlib out of a compact-only session
+        self.graph_pixmap = None
+        self.shown_region = None
+        self.graph_preview = GraphPreview()
+        self.graph_preview.hide()
+        self.prerender_timer = QTimer(self)
+        self.prerender_timer.setSingleShot(True)
+        self.prerender_timer.setInterval(self.PRERENDER_DELAY_MS)
+        self.prerender_timer.timeout.connect(self.prerender_graph)
         
         # Set basic widget properties
         self.setWindowFlags(
@@ -85,8 +189,10 @@ class ElprisWidget(QWidget):
         self.setup_widget()
         self.setup_ui()
         self.setup_updates()
+        self.setup_metrics()
         
-        # Fetch initial data and update UI
+        # Show cached data right away, then refresh in the background
+        self.load_cached_prices()
         self.refresh_data()
 
     def setup_widget(self):
@@ -115,97 +221,295 @@ class ElprisWidget(QWidget):
         self.container_layout.setContentsMargins(20, 20, 20, 20)
         
         self.main_layout.addWidget(self.container)
+        
+        # The compact view is built once and updated in place
+        self.setup_price_display(self.container_layout)
 
     def setup_updates(self):
-        self.update_timer = QTimer(self)
-        self.update_timer.timeout.connect(self.refresh_data)
-        self.update_timer.start(900000)  # 15 minutes
+        # Re-render at price boundaries, only poll when new data is expected
+        # With a hub, its pushes replace our polls for missing data
+        self.scheduler = RefreshScheduler(self, clock=self.clock, poll_missing=not self.hub_url)
+        self.scheduler.boundary_reached.connect(lambda: self.update_content(data_changed=False))
+        self.scheduler.poll_due.connect(self.refresh_data)
+        if self.alerts:
+            self.scheduler.boundary_reached.connect(self.alerts.interval_started)
+        self.scheduler.start()
+        
+        # A price hub pushes newly published days instead of us polling for them
+        self.hub_listener = None
+        if self.hub_url:
+            self.hub_listener = HubListener(self.hub_url, self)
+            self.hub_listener.updated.connect(lambda version: self.refresh_data())
+            self.hub_listener.start()
+
+    def setup_metrics(self):
+        """Collect timings only when they are exported or shown"""
+        self.metrics_overlay = None
+        if not self.metrics_path and not self.debug_overlay:
+            return
+        metrics.enable()
+        
+        if self.metrics_path:
+            self.metrics_timer = QTimer(self)
+            self.metrics_timer.setInterval(self.METRICS_EXPORT_MS)
+            self.metrics_timer.timeout.connect(self.export_metrics)
+            self.metrics_timer.start()
+        
+        if self.debug_overlay:
+            self.metrics_overlay = MetricsOverlay(self)
+            self.metrics_overlay.show()
+
+    def export_metrics(self):
+        try:
+            metrics.export(self.metrics_path)
+        except OSError as e:
+            print(f"Error writing metrics: {e}")
+
+    def refresh_data(self, revalidate=False):
+        """
+        Start fetching all necessary price data in the background
+
+        Args:
+            revalidate (bool, optional): Confirm cached days with the server
+        """
+        if self.prefetch_all_regions:
+            # One batched cycle for all regions, current region first
+            self.fetcher.fetch(ElprisAPI.REGIONS, priority_region=self.current_region,
+                               revalidate=revalidate)
+        else:
+            self.fetcher.fetch(self.current_region, revalidate=revalidate)
+        
+        # Keep showing the current data while the fetch is running
+        self.set_refreshing(True)
+
+    def load_cached_prices(self):
+        """Show the current region from the local cache without any network I/O"""
+        now = self.clock.now()
+        results = {}
+        for day, date in (('yesterday', now - timedelta(days=1)),
+                          ('today', now),
+                          ('tomorrow', now + timedelta(days=1))):
+            records = self.api.cache.get(date, self.current_region)
+            results[day] = PriceSeries.from_json(records) if records else None
+        
+        if results['today']:
+            self.region_prices[self.current_region] = results
+            self.show_region(self.current_region)
+
+    def on_prices_ready(self, region, results):
+        """Receive fetched price data from the background fetcher"""
+        previous = self.region_prices.get(region)
+        if previous:
+            results = self.keep_known_days(previous, results)
+        self.region_prices[region] = results
+        if self.alerts:
+            self.alerts.prices_updated(region, results['today'], results['tomorrow'])
+        if region != self.current_region:
+            return
+        
+        self.show_region(region)
+
+    def keep_known_days(self, previous, results):
+        """Fill days a refresh could not deliver with earlier data for the same date"""
+        known = {series.start_time(0).date(): series
+                 for series in previous.values() if series is not None}
+        now = self.clock.now()
+        merged = dict(results)
+        for day, offset in (('yesterday', -1), ('today', 0), ('tomorrow', 1)):
+            if merged.get(day) is None:
+                merged[day] = known.get((now + timedelta(days=offset)).date())
+        return merged
+
+    def on_batch_finished(self, batch):
+        """Let the scheduler plan the next poll from what the batch delivered"""
+        # Keep showing the last good data, marked as stale, until a refresh succeeds
+        self.stale = self.fetcher.last_batch_failed
+        self.refresh_view()
+        self.scheduler.data_updated(
+            has_today=all(results['today'] for results in batch.values()),
+            has_tomorrow=all(results['tomorrow'] for results in batch.values())
+        )
+
+    def show_region(self, region):
+        """Re-render from the in-memory prices of a region"""
+        results = self.region_prices[region]
+        # Refreshes that confirm what is shown need no new graph render
+        data_changed = (region != self.shown_region
+                        or not same_prices(self.prices_today, results['today'])
+                        or not same_prices(self.prices_tomorrow, results['tomorrow']))
+        self.shown_region = region
+        self.prices_yesterday = results['yesterday']
+        self.prices_today = results['today']
+        self.prices_tomorrow = results['tomorrow']
+        self.refreshing = False
+        if self.prices_today:
+            # Flip the displayed price at the boundaries of the published resolution
+            self.scheduler.set_interval_minutes(self.prices_today.resolution)
+        with metrics.span('forecast'):
+            self.outlook = self.build_outlook(region)
+        self.update_content(data_changed=data_changed)
+
+    def build_outlook(self, region):
+        """Forecast for the days after the last published one, up to outlook_days from today"""
+        archive = self.api.archive
+        if not self.outlook_days or archive is None:
+            return None
+        forecaster = self.forecasters.get(region)
+        if forecaster is None:
+            forecaster = self.forecasters[region] = PriceForecaster(horizon=self.outlook_days)
+        # Trains on the whole history once, then only on newly archived days
+        forecaster.update_from_archive(archive, region)
+        if forecaster.last_day is None:
+            return None
+        days = self.clock.now().date().toordinal() + self.outlook_days - forecaster.last_day
+        return forecaster.forecast(days)
 
-    def refresh_data(self):
-        """Fetch all necessary price data"""
-        self.prices_today = ElprisAPI.fetch_prices(region=self.current_region)
-        self.prices_yesterday = ElprisAPI.fetch_yesterday_prices(region=self.current_region)
-        self.prices_tomorrow = ElprisAPI.fetch_prices_tomorrow(region=self.current_region)
-        self.update_content()
+    def set_refreshing(self, refreshing):
+        self.refreshing = refreshing
+        self.refresh_view()
 
     def get_current_price_comparison(self):
         """Calculate average price difference between today and yesterday"""
         if not self.prices_yesterday or not self.prices_today:
             return None
         
-        try:
-            # Calculate today's average
-            today_prices = [float(p['SEK_per_kWh']) for p in self.prices_today]
-            today_avg = sum(today_prices) / len(today_prices)
+        # Averages are computed once per series and shared with the graph
+        today_avg = self.prices_today.mean
+        yesterday_avg = self.prices_yesterday.mean
+        
+        if yesterday_avg == 0:
+            return None
             
-            # Calculate yesterday's average
-            yesterday_prices = [float(p['SEK_per_kWh']) for p in self.prices_yesterday]
-            yesterday_avg = sum(yesterday_prices) / len(yesterday_prices)
+        # Calculate percentage change with one decimal
+        percent_change = round(((today_avg - yesterday_avg) / yesterday_avg) * 100, 1)
+        return percent_change
+
+    def update_content(self, data_changed=True):
+        """
+        Re-render the view
+
+        Args:
+            data_changed (bool, optional): False at interval boundaries, where
+                only the time moved; the off-screen graph render is kept then
+                and refreshed on expand
+        """
+        with metrics.span('update_content'):
+            with metrics.span('cheapest_window'):
+                self.cheapest_window = self.find_cheapest_window()
             
-            if yesterday_avg == 0:
-                return None
-                
-            # Calculate percentage change with one decimal
-            percent_change = round(((today_avg - yesterday_avg) / yesterday_avg) * 100, 1)
-            return percent_change
+            if self.prices_today:
+                if data_changed:
+                    # The previous off-screen render no longer matches the data
+                    self.graph_pixmap = None
+                if self.animation.state() == QAbstractAnimation.State.Running:
+                    # on_animation_finished renders the latest data
+                    pass
+                elif self.expanded:
+                    self.show_price_graph()
+                elif data_changed and self.can_prerender():
+                    self.prerender_timer.start()
             
-        except (IndexError, KeyError, TypeError, ValueError) as e:
-            print(f"Error calculating price comparison: {e}")
+            self.refresh_view()
+
+    def find_cheapest_window(self):
+        """Cheapest upcoming block across today and tomorrow"""
+        if not self.prices_today or not self.cheapest_window_hours:
             return None
+        series = PriceSeries.concat([self.prices_today, self.prices_tomorrow])
+        return cheapest_window(series, self.cheapest_window_hours, after=self.clock.now())
 
-    def update_content(self):
-        if self.expanded:
-            self.price_graph.update_graph(self.prices_today, self.prices_tomorrow)
-        
-        # Clear container_layout but keep price_graph
-        while self.container_layout.count():
-            item = self.container_layout.takeAt(0)
-            if item.widget() and item.widget() != self.price_graph:
-                item.widget().deleteLater()
+    def format_window(self, window):
+        if window is None:
+            return ""
+        start = datetime.fromtimestamp(window['start'])
+        end = datetime.fromtimestamp(window['end'])
+        day = "imorgon " if start.date() > self.clock.now().date() else ""
+        return (f"Billigast {self.cheapest_window_hours:g} h: {day}kl {start:%H:%M}-{end:%H:%M}, "
+                f"{window['mean']:.2f} kr snitt")
 
+    def refresh_view(self):
+        """Apply the current view model to the compact view"""
+        with metrics.span('stats'):
+            view_model = self.build_view_model()
+        self.apply_view_model(view_model)
+
+    def build_view_model(self):
+        """Compute the text and state of every field in the compact view"""
         if not self.prices_today:
-            self.show_error_state()
-            return
+            return {
+                'state': 'loading' if self.refreshing else 'error',
+                'status': "Uppdaterar…" if self.refreshing else "",
+            }
 
-        # Create new content widget
-        self.content_widget = QWidget()
-        content_layout = QVBoxLayout(self.content_widget)
-        content_layout.setContentsMargins(0, 0, 0, 0)
-        content_layout.setSpacing(15)
-        
-        # Add price display
-        self.setup_price_display(content_layout)
+        series = self.prices_today
+        current_price = series.price_at(self.clock.now())
         
-        # Add content widget to container
-        self.container_layout.addWidget(self.content_widget)
+        # Get price comparison with yesterday
+        price_change = self.get_current_price_comparison()
+        if price_change is not None:
+            change_color = "#cc0000" if price_change > 0 else "#006621"
+            comparison = (f"{price_change:+.1f}% än igår", change_color)
+        else:
+            comparison = None
         
-        # If expanded, add the graph again
-        if self.expanded:
-            if self.price_graph.parent() != self:
-                self.price_graph.setParent(self)
-            self.container_layout.addWidget(self.price_graph)
-            self.price_graph.show()
+        if self.refreshing:
+            status = "Uppdaterar…"
+        elif self.stale:
+            status = "Kunde inte uppdatera, visar sparade priser"
+        else:
+            status = ""
+        
+        return {
+            'state': 'content',
+            'status': status,
+            'stale': self.stale,
+            'title': format_date(self.clock.now()),
+            'current_price': f"{current_price:.2f}" if current_price is not None else "–",
+            'comparison': comparison,
+            'max_price': f"{series.max:.2f} kr kl {series.interval_label(series.argmax)}",
+            'min_price': f"{series.min:.2f} kr kl {series.interval_label(series.argmin)}",
+            'avg_price': f"{series.mean:.2f} kr snitt",
+            'cheapest_window': self.format_window(self.cheapest_window),
+            'tomorrow_info': self.clock.now().hour < PUBLISH_HOUR,
+        }
 
-    def setup_price_display(self, layout):
-        """Set up the price display section with all components"""
-        if not self.prices_today:
-            self.show_error_state()
-            return
+    def apply_view_model(self, view_model):
+        """Touch only the widgets whose field changed since the last update"""
+        previous = self.view_model
+        for field, value in view_model.items():
+            if previous.get(field, self._UNSET) != value:
+                self._view_setters[field](value)
+        self.view_model = view_model
 
-        prices = [p['SEK_per_kWh'] for p in self.prices_today]
-        current_hour = datetime.now().hour
-        current_price = prices[current_hour]
-        avg_price = sum(prices) / len(prices)
+    def _set_state(self, state):
+        self.content_widget.setVisible(state == 'content')
+        self.loading_label.setVisible(state == 'loading')
+        self.error_widget.setVisible(state == 'error')
 
+    def _set_stale(self, stale):
+        # Grey out the price while it may be out of date
+        self.price_value_label.setStyleSheet("color: #999999;" if stale else "")
+
+    def _set_comparison(self, comparison):
+        if comparison is None:
+            self.comparison_label.hide()
+            return
+        text, color = comparison
+        self.comparison_label.setText(text)
+        self.comparison_label.setStyleSheet(f"color: {color};")
+        self.comparison_label.show()
+
+    def setup_price_display(self, layout):
+        """Build the price display section once; it is updated in place afterwards"""
         # Header with controls and region selector
         header_layout = QHBoxLayout()
         
         # Region selector
-        region_combo = QComboBox()
-        region_combo.addItems(['SE1 - Luleå', 'SE2 - Sundsvall', 'SE3 - Stockholm', 'SE4 - Malmö'])
-        region_combo.setCurrentIndex(self.current_region - 1)
-        region_combo.currentIndexChanged.connect(self.change_region)
-        region_combo.setStyleSheet("""
+        self.region_combo = QComboBox()
+        self.region_combo.addItems(['SE1 - Luleå', 'SE2 - Sundsvall', 'SE3 - Stockholm', 'SE4 - Malmö'])
+        self.region_combo.setCurrentIndex(self.current_region - 1)
+        self.region_combo.currentIndexChanged.connect(self.change_region)
+        self.region_combo.setStyleSheet("""
             QComboBox {
                 border: 1px solid #e0e0e0;
                 border-radius: 4px;
@@ -218,6 +522,9 @@ class ElprisWidget(QWidget):
             }
         """)
         
+        # Shown while a background refresh is running
+        self.status_label = StatLabel("", color="#999999", font_size=9)
+        
         expand_button = ExpandButton()
         expand_button.clicked.connect(self.toggle_size)
         
@@ -237,96 +544,117 @@ class ElprisWidget(QWidget):
         close_button.clicked.connect(self.close)
         close_button.setFixedSize(30, 30)
         
-        header_layout.addWidget(region_combo)
+        header_layout.addWidget(self.region_combo)
         header_layout.addStretch()
+        header_layout.addWidget(self.status_label)
         header_layout.addWidget(expand_button)
         header_layout.addWidget(close_button)
         layout.addLayout(header_layout)
         
+        # Everything below the header is hidden in the loading and error states
+        self.content_widget = QWidget()
+        content_layout = QVBoxLayout(self.content_widget)
+        content_layout.setContentsMargins(0, 0, 0, 0)
+        content_layout.setSpacing(15)
+        layout.addWidget(self.content_widget)
+        
         # Title
-        title = StatLabel(format_date(datetime.now()), font_size=24, is_bold=True, color="#000")
-        layout.addWidget(title)
+        self.title_label = StatLabel("", font_size=24, is_bold=True, color="#000")
+        content_layout.addWidget(self.title_label)
         
         # Subtitle
         subtitle = StatLabel("(utan moms och andra skatter)", color="#666666", font_size=14)
-        layout.addWidget(subtitle)
+        content_layout.addWidget(subtitle)
         
         # Current price section
         current_price_layout = QHBoxLayout()
         just_nu = StatLabel("Just nu", color="#006621", font_size=18, is_bold=True)
-        price_value = StatLabel(f"{current_price:.2f}", font_size=36, is_bold=True)
+        self.price_value_label = StatLabel("", font_size=36, is_bold=True)
         kr_kwh = StatLabel("kr/kWh", font_size=18, is_bold=True)
-        
-        # Get price comparison with yesterday
-        price_change = self.get_current_price_comparison()
-        if price_change is not None:
-            change_color = "#cc0000" if price_change > 0 else "#006621"
-            comparison_label = StatLabel(
-                f"{price_change:+.1f}% än igår",
-                color=change_color,
-                font_size=16,
-                is_bold=True
-            )
-            current_price_layout.addWidget(just_nu)
-            current_price_layout.addWidget(price_value)
-            current_price_layout.addWidget(kr_kwh)
-            current_price_layout.addSpacing(10)
-            current_price_layout.addWidget(comparison_label)
-        else:
-            current_price_layout.addWidget(just_nu)
-            current_price_layout.addWidget(price_value)
-            current_price_layout.addWidget(kr_kwh)
-        
+        self.comparison_label = StatLabel("", font_size=16, is_bold=True)
+        self.comparison_label.hide()
+        
+        current_price_layout.addWidget(just_nu)
+        current_price_layout.addWidget(self.price_value_label)
+        current_price_layout.addWidget(kr_kwh)
+        current_price_layout.addSpacing(10)
+        current_price_layout.addWidget(self.comparison_label)
         current_price_layout.addStretch()
-        layout.addLayout(current_price_layout)
+        content_layout.addLayout(current_price_layout)
         
         # Price range info
         price_range_layout = QHBoxLayout()
-        max_price_time = prices.index(max(prices))
-        min_price_time = prices.index(min(prices))
-        
         up_arrow = StatLabel("↑", color="#cc0000", font_size=16, is_bold=True)
-        max_price = StatLabel(f"{max(prices):.2f} kr kl {max_price_time:02d}-{(max_price_time+1):02d}", 
-                            color="#cc0000", font_size=16, is_bold=True)
+        self.max_price_label = StatLabel("", color="#cc0000", font_size=16, is_bold=True)
         
         down_arrow = StatLabel("↓", color="#006621", font_size=16, is_bold=True)
-        min_price = StatLabel(f"{min(prices):.2f} kr kl {min_price_time:02d}-{(min_price_time+1):02d}", 
-                            color="#006621", font_size=16, is_bold=True)
+        self.min_price_label = StatLabel("", color="#006621", font_size=16, is_bold=True)
         
-        avg_label = StatLabel(f"{avg_price:.2f} kr snitt", color="#666666", font_size=16, is_bold=True)
+        self.avg_label = StatLabel("", color="#666666", font_size=16, is_bold=True)
         
         price_range_layout.addWidget(up_arrow)
-        price_range_layout.addWidget(max_price)
+        price_range_layout.addWidget(self.max_price_label)
         price_range_layout.addSpacing(20)
         price_range_layout.addWidget(down_arrow)
-        price_range_layout.addWidget(min_price)
+        price_range_layout.addWidget(self.min_price_label)
         price_range_layout.addSpacing(20)
-        price_range_layout.addWidget(avg_label)
+        price_range_layout.addWidget(self.avg_label)
         price_range_layout.addStretch()
-        layout.addLayout(price_range_layout)
+        content_layout.addLayout(price_range_layout)
         
         # Tomorrow's prices info
-        if datetime.now().hour < 13:
-            tomorrow_info_layout = QHBoxLayout()
-            clock_label = StatLabel("🕐", font_size=14)
-            tomorrow_text = StatLabel(
-                "Morgondagens elpris kommer tidigast kl 13 idag",
-                color="#666666",
-                font_size=14
-            )
-            tomorrow_info_layout.addWidget(clock_label)
-            tomorrow_info_layout.addWidget(tomorrow_text)
-            tomorrow_info_layout.addStretch()
-            layout.addLayout(tomorrow_info_layout)
-
-    def show_error_state(self):
-        error_layout = QVBoxLayout()
+        self.tomorrow_info = QWidget()
+        tomorrow_info_layout = QHBoxLayout(self.tomorrow_info)
+        tomorrow_info_layout.setContentsMargins(0, 0, 0, 0)
+        clock_label = StatLabel("🕐", font_size=14)
+        tomorrow_text = StatLabel(
+            f"Morgondagens elpris kommer tidigast kl {PUBLISH_HOUR} idag",
+            color="#666666",
+            font_size=14
+        )
+        tomorrow_info_layout.addWidget(clock_label)
+        tomorrow_info_layout.addWidget(tomorrow_text)
+        tomorrow_info_layout.addStretch()
+        content_layout.addWidget(self.tomorrow_info)
+        
+        # Cheapest upcoming block for load scheduling
+        self.cheapest_label = StatLabel("", color="#2e7d32", font_size=14, is_bold=True)
+        content_layout.addWidget(self.cheapest_label)
+        
+        self.setup_loading_state(layout)
+        self.setup_error_state(layout)
+        
+        self._view_setters = {
+            'state': self._set_state,
+            'status': self.status_label.setText,
+            'title': self.title_label.setText,
+            'current_price': self.price_value_label.setText,
+            'comparison': self._set_comparison,
+            'max_price': self.max_price_label.setText,
+            'min_price': self.min_price_label.setText,
+            'avg_price': self.avg_label.setText,
+            'cheapest_window': self.cheapest_label.setText,
+            'tomorrow_info': self.tomorrow_info.setVisible,
+            'stale': self._set_stale,
+        }
+
+    def setup_loading_state(self, layout):
+        self.loading_label = StatLabel("Hämtar prisdata…", 
+                                     color="#666666", 
+                                     font_size=14)
+        self.loading_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.loading_label.hide()
+        layout.addWidget(self.loading_label)
+
+    def setup_error_state(self, layout):
+        self.error_widget = QWidget()
+        error_layout = QVBoxLayout(self.error_widget)
         error_label = StatLabel("Kunde inte hämta prisdata", 
                               color="#e74c3c", 
                               is_bold=True, 
                               font_size=14)
         retry_button = QPushButton("Försök igen")
-        retry_button.clicked.connect(self.refresh_data)
+        retry_button.clicked.connect(lambda: self.refresh_data(revalidate=True))
         retry_button.setStyleSheet("""
             QPushButton {
                 background-color: #e74c3c;
@@ -344,11 +672,15 @@ class ElprisWidget(QWidget):
         error_layout.addWidget(retry_button)
         error_layout.setAlignment(Qt.AlignmentFlag.AlignCenter)
         
-        self.container_layout.addLayout(error_layout)
+        self.error_widget.hide()
+        layout.addWidget(self.error_widget)
 
     def change_region(self, index):
         self.current_region = index + 1
-        self.refresh_data()
+        if self.current_region in self.region_prices:
+            self.show_region(self.current_region)
+        else:
+            self.refresh_data()
 
     def mousePressEvent(self, event):
         if event.button() == Qt.MouseButton.LeftButton:
@@ -373,28 +705,105 @@ class ElprisWidget(QWidget):
         self.animation.setStartValue(self.size())
         self.animation.setEndValue(target_size)
         
+        # Animate a static image; the live graph would re-render at every step
         if not self.expanded and self.prices_today:
-            self.price_graph.update_graph(self.prices_today, self.prices_tomorrow)
-            if self.price_graph.parent() != self:
-                self.price_graph.setParent(self)
-            self.container_layout.addWidget(self.price_graph)
-            self.price_graph.show()
+            if self.graph_pixmap is None:
+                self.prerender_graph()
+            self.show_graph_preview(self.graph_pixmap)
+        elif self.expanded and self.price_graph is not None and self.price_graph.isVisible():
+            self.graph_pixmap = self.price_graph.grab()
+            self.show_graph_preview(self.graph_pixmap)
+        
+        # Blurring the shadow of the whole frame costs most of a frame's budget
+        self.container.graphicsEffect().setEnabled(False)
         
         self.expanded = not self.expanded
         self.animation.start()
 
-    def on_animation_finished(self):
-        if not self.expanded:
+    def create_price_graph(self):
+        """The graph widget, created on first use"""
+        if self.price_graph is None:
+            # Importing the matplotlib graph is slow, so wait until it is needed
+            if self.graph_backend == 'painter':
+                from .painter_graph import PainterPriceGraph as graph_class
+            else:
+                from .price_graph import PriceGraph as graph_class
+            self.price_graph = graph_class(self, clock=self.clock)
+            self.price_graph.hide()
+        return self.price_graph
+
+    def can_prerender(self):
+        """Whether an off-screen render is cheap enough to do before the user expands"""
+        return self.price_graph is not None or self.graph_backend == 'painter'
+
+    def prerender_graph(self):
+        """Render the graph off-screen at its expanded size for the next expand"""
+        if self.expanded or not self.prices_today:
+            return
+        graph = self.create_price_graph()
+        graph.resize(self.expanded_graph_size())
+        graph.update_graph(self.prices_today, self.prices_tomorrow,
+                           highlight=self.cheapest_window, outlook=self.outlook)
+        self.graph_pixmap = graph.grab()
+
+    def expanded_graph_size(self):
+        """Size the graph gets in the expanded layout, below the compact content"""
+        frame = self.container.contentsMargins()
+        margins = self.container_layout.contentsMargins()
+        width = (self.expanded_size.width() - frame.left() - frame.right()
+                 - margins.left() - margins.right())
+        height = (self.expanded_size.height() - self.container.sizeHint().height()
+                  - self.container_layout.spacing())
+        return QSize(width, max(height, 200))
+
+    def show_graph_preview(self, pixmap):
+        """Put the scaled pre-rendered image in place of the graph"""
+        if self.price_graph is not None and self.container_layout.indexOf(self.price_graph) >= 0:
             self.price_graph.hide()
             self.container_layout.removeWidget(self.price_graph)
+        self.graph_preview.set_pixmap(pixmap)
+        if self.container_layout.indexOf(self.graph_preview) < 0:
+            self.container_layout.addWidget(self.graph_preview)
+        self.graph_preview.show()
+
+    def show_price_graph(self):
+        """Update the graph, creating it and adding it to the layout if needed"""
+        self.create_price_graph()
+        self.price_graph.update_graph(self.prices_today, self.prices_tomorrow,
+                                      highlight=self.cheapest_window, outlook=self.outlook)
+        if self.container_layout.indexOf(self.price_graph) < 0:
+            self.container_layout.addWidget(self.price_graph)
+        self.price_graph.show()
+
+    def on_animation_finished(self):
+        self.graph_preview.hide()
+        self.container_layout.removeWidget(self.graph_preview)
+        self.container.graphicsEffect().setEnabled(True)
+        
+        # The only full-resolution render of an expand
+        if self.expanded and self.prices_today:
+            self.show_price_graph()
 
     def closeEvent(self, event):
         """Handle application shutdown properly"""
-        if hasattr(self, 'update_timer'):
-            self.update_timer.stop()
+        if hasattr(self, 'scheduler'):
+            self.scheduler.stop()
+        
+        if getattr(self, 'hub_listener', None):
+            self.hub_listener.stop()
+        
+        if getattr(self, 'alerts', None):
+            self.alerts.stop()
         
-        if hasattr(self, 'price_graph'):
+        if hasattr(self, 'fetcher'):
+            self.fetcher.shutdown()
+            self.api.close()
+        
+        if getattr(self, 'price_graph', None) is not None:
             self.price_graph.close()
         
+        if getattr(self, 'metrics_path', None):
+            self.export_metrics()
+        
         QApplication.quit()
         event.accept()
\ No newline at end of file
@@ -0,0 +1,129 @@
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+from utils.metrics import metrics
+from utils.price_series import PriceSeries
+
+
+class _FetchSignals(QObject):
+    # generation, region, day, prices
+    done = pyqtSignal(int, int, str, object)
+
+
+class _FetchTask(QRunnable):
+    """Fetches and parses a single price day on a pool thread"""
+
+    def __init__(self, signals, generation, api, region, day, fetch):
+        super().__init__()
+        self.signals = signals
+        self.api = api
+        self.generation = generation
+        self.region = region
+        self.day = day
+        self.fetch = fetch
+
+    def run(self):
+        try:
+            records = self.fetch(self.api, self.region)
+            # Parse once here so the GUI thread only sees ready-made arrays
+            with metrics.span('parse'):
+                prices = PriceSeries.from_json(records) if records else None
+        except Exception as e:
+            print(f"Error fetching {self.day} prices: {e}")
+            prices = None
+        self.signals.done.emit(self.generation, self.region, self.day, prices)
+
+
+class PriceFetcher(QObject):
+    """Runs the day fetches concurrently off the GUI thread
+
+    Results are collected on the GUI thread and delivered per region
+    through region_ready once all days for that region have arrived.
+    A fetch may cover several regions, in which case batch_finished is
+    emitted with all of them once the whole batch is done. Whether the
+    upstream was unavailable for any part of the batch is available as
+    last_batch_failed at that point.
+    """
+
+    # region, {'yesterday': PriceSeries, 'today': PriceSeries, 'tomorrow': PriceSeries}
+    region_ready = pyqtSignal(int, object)
+    # {region: {'yesterday': ..., 'today': ..., 'tomorrow': ...}}
+    batch_finished = pyqtSignal(object)
+
+    # Upper bound on concurrent requests against the upstream API
+    MAX_WORKERS = 6
+
+    DAYS = {
+        'yesterday': lambda api, region: api.fetch_yesterday_prices(region=region),
+        'today': lambda api, region: api.fetch_prices(region=region),
+        'tomorrow': lambda api, region: api.fetch_prices_tomorrow(region=region),
+    }
+    # Same days, with the current ones confirmed by conditional requests
+    REVALIDATE_DAYS = {
+        'yesterday': DAYS['yesterday'],
+        'today': lambda api, region: api.fetch_prices(region=region, revalidate=True),
+        'tomorrow': lambda api, region: api.fetch_prices_tomorrow(region=region, revalidate=True),
+    }
+
+    def __init__(self, api, parent=None):
+        super().__init__(parent)
+        self.api = api
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(self.MAX_WORKERS)
+
+        self._signals = _FetchSignals(self)
+        self._signals.done.connect(self._on_task_done)
+
+        self.generation = 0
+        self._pending = {}
+        self._batch = {}
+        self._failures_before = 0
+        self.last_batch_failed = False
+
+    def is_busy(self):
+        return bool(self._pending)
+
+    def fetch(self, regions, priority_region=None, revalidate=False):
+        """
+        Start fetching all days for one or more regions, superseding earlier requests
+
+        Args:
+            regions (int or iterable): Region or regions to fetch
+            priority_region (int, optional): Region whose fetches are queued first
+            revalidate (bool, optional): Confirm cached days with conditional
+                requests instead of serving them from the cache
+        """
+        if isinstance(regions, int):
+            regions = [regions]
+
+        self.generation += 1
+        self._pending = {region: {} for region in regions}
+        self._batch = {}
+        self._failures_before = self.api.total_failures
+        days = self.REVALIDATE_DAYS if revalidate else self.DAYS
+        for region in regions:
+            priority = 1 if region == priority_region else 0
+            for day, fetch in days.items():
+                task = _FetchTask(self._signals, self.generation, self.api, region, day, fetch)
+                self.pool.start(task, priority)
+
+    def _on_task_done(self, generation, region, day, prices):
+        # Drop results from requests that have been superseded
+        if generation != self.generation or region not in self._pending:
+            return
+
+        results = self._pending[region]
+        results[day] = prices
+        if len(results) == len(self.DAYS):
+            del self._pending[region]
+            self._batch[region] = results
+            self.region_ready.emit(region, results)
+            if not self._pending:
+                self.last_batch_failed = self.api.total_failures > self._failures_before
+                self.batch_finished.emit(self._batch)
+
+    def shutdown(self):
+        """Drop queued fetches and wait for running ones to finish"""
+        self.generation += 1
+        self._pending = {}
+        self._batch = {}
+        self.pool.clear()
+        self.pool.waitForDone()
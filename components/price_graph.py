@@ -1,156 +1,183 @@
+from PyQt6.QtCore import QTimer, Qt
+from PyQt6.QtGui import QImage, QPainter, QResizeEvent
 from PyQt6.QtWidgets import QWidget, QVBoxLayout
 from matplotlib import pyplot as plt
-import matplotlib.dates as mdates
-from matplotlib.figure import Figure
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
-from datetime import datetime, timedelta
+from utils.clock import system_clock
+from utils.metrics import metrics
+from .price_chart import PriceChart
+import time
+
+
+class ResizeAwareCanvas(FigureCanvas):
+    """Figure canvas that re-renders once when a resize has finished
+
+    The stock canvas renders the whole figure again at every intermediate
+    size of an animated or dragged resize. Here the last full render is kept
+    as an image and scaled into the new size instead, repainted at most once
+    per frame, and the figure is only resized and rendered crisply once no
+    resize has arrived for SETTLE_MS. Screen and DPI changes reach the canvas
+    as resize events and take the same path.
+    """
+
+    # Quiet period after the last resize before the full render
+    SETTLE_MS = 120
+    # Minimum time between two preview repaints, one 60 Hz frame
+    FRAME_MS = 16
+
+    def __init__(self, figure):
+        super().__init__(figure)
+        self._preview = None
+        # Number of full renders, for benchmarks
+        self.renders = 0
+
+        self._settle_timer = QTimer(self)
+        self._settle_timer.setSingleShot(True)
+        self._settle_timer.timeout.connect(self._finish_resize)
+
+        self._frame_timer = QTimer(self)
+        self._frame_timer.setSingleShot(True)
+        self._frame_timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self._frame_timer.timeout.connect(self.update)
+
+    @property
+    def resizing(self):
+        """Whether the canvas shows a scaled preview until the resize settles"""
+        return self._preview is not None
+
+    def resizeEvent(self, event):
+        # Nothing to scale yet, or nobody watching: resize the figure right away
+        if not self.isVisible() or not hasattr(self, 'renderer') or self.figure is None:
+            super().resizeEvent(event)
+            return
+
+        if self._preview is None:
+            width, height = self.renderer.width, self.renderer.height
+            self._preview = QImage(bytes(self.buffer_rgba()), int(width), int(height),
+                                   QImage.Format.Format_RGBA8888).copy()
+        QWidget.resizeEvent(self, event)
+        self._settle_timer.start(self.SETTLE_MS)
+        if not self._frame_timer.isActive():
+            self._frame_timer.start(self.FRAME_MS)
+
+    def _finish_resize(self):
+        """Resize the figure to the final size and render it once"""
+        self._frame_timer.stop()
+        self._preview = None
+        size = self.size()
+        super().resizeEvent(QResizeEvent(size, size))
+        self.update()
+
+    def paintEvent(self, event):
+        if self._preview is None:
+            super().paintEvent(event)
+            return
+        painter = QPainter(self)
+        try:
+            painter.drawImage(self.rect(), self._preview)
+        finally:
+            painter.end()
+
+    def draw(self):
+        self.renders += 1
+        super().draw()
+
 
 class PriceGraph(QWidget):
-    def __init__(self, parent=None):
+    """Retained-mode price graph
+
+    Shows a PriceChart on a Qt canvas. Updates only change artist data and
+    axis limits, and the moving "now" marker is blitted over a cached
+    background instead of redrawing the whole figure. While the graph is
+    being resized it shows a scaled image of the last render (see
+    ResizeAwareCanvas).
+    """
+
+    def __init__(self, parent=None, clock=None):
         super().__init__(parent)
-        
+        self.clock = clock or system_clock
+
         # Create permanent layout
         self._layout = QVBoxLayout(self)
         self._layout.setContentsMargins(0, 0, 0, 0)
-        
+
+        # Timings of the most recent full draw and blit, in milliseconds
+        self.last_draw_ms = None
+        self.last_blit_ms = None
+
+        self._background = None
+        self._data = None
+
         # Create initial matplotlib objects
         self._create_initial_plot()
 
     def _create_initial_plot(self):
-        """Creates the initial plot"""
-        self.figure = Figure(figsize=(10, 6), dpi=100)
-        self.canvas = FigureCanvas(self.figure)
+        """Creates the chart and its canvas once"""
+        self.chart = PriceChart()
+        self.figure = self.chart.figure
+        self.canvas = ResizeAwareCanvas(self.figure)
         self._layout.addWidget(self.canvas)
 
+        # Every full draw (including resizes) refreshes the blit background
+        self.canvas.mpl_connect('draw_event', self._on_draw)
+
     def clear_plot(self):
-        """Clears the plot without destroying canvas"""
-        self.figure.clear()
-
-    def update_graph(self, prices_today, prices_tomorrow=None):
-        """Updates the graph content"""
-        # Clear existing plot
-        self.clear_plot()
-        
-        # Create new subplot
-        ax = self.figure.add_subplot(111)
-        
-        # Configure background
-        ax.set_facecolor('white')
-        self.figure.patch.set_facecolor('#f8f9fa')
-        ax.grid(True, linestyle='-', alpha=0.1, color='gray')
-        
-        # Prepare data
-        today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
-        time_points = [today + timedelta(hours=i) for i in range(25)]
-        
-        # Today's prices
-        prices = [p['SEK_per_kWh'] for p in prices_today]
-        prices_extended = prices + [prices[-1]]
-        avg_price = sum(prices) / len(prices)
-        
-        # Plot today's prices
-        ax.step(time_points, prices_extended, where='post', color='#0066CC', 
-                linewidth=2, label='Idag', zorder=2)
-        ax.plot(time_points[:-1], prices, 'o', color='#0066CC', 
-                markersize=4, alpha=0.7, zorder=2)
-         # Average line for today
-        ax.axhline(y=avg_price, color='#0066CC', linestyle='--', 
-                  alpha=0.5, label='Idag snitt')
-        
-        # Plot tomorrow's prices if available
-        if prices_tomorrow:
-            tomorrow_prices = [p['SEK_per_kWh'] for p in prices_tomorrow]
-            tomorrow_prices_extended = tomorrow_prices + [tomorrow_prices[-1]]
-            tomorrow_avg = sum(tomorrow_prices) / len(tomorrow_prices)
-            
-            ax.step(time_points, tomorrow_prices_extended, where='post', 
-                   color='#CC0000', linewidth=2, label='Imorgon', alpha=0.7, zorder=2)
-            ax.plot(time_points[:-1], tomorrow_prices, 'o', 
-                   color='#CC0000', markersize=4, alpha=0.7, zorder=2)
-            
-            ax.axhline(y=tomorrow_avg, color='#CC0000', linestyle='--', 
-                      alpha=0.5, label='Imorgon snitt')
-        
-       
-        
-        # Mark current time and price
-        current_time = datetime.now()
-        current_hour = current_time.hour
-        current_price = prices[current_hour]
-        
-        ax.plot(current_time, current_price, 'o', 
-                color='#0066CC', markersize=10, zorder=3)
-        
-        # Price information at point
-        ax.annotate(f'{current_price:.2f} kr/kWh',
-                   xy=(current_time, current_price),
-                   xytext=(10, 10), textcoords='offset points',
-                   bbox=dict(boxstyle='round,pad=0.5', fc='none', ec='none', alpha=0.8),
-                   zorder=4)
-        
-        # X-axis formatting
-        ax.set_xlim(today, today + timedelta(days=1))
-        
-        def format_time(x, p):
-            time = mdates.num2date(x)
-            return time.strftime('%H')
-            
-        ax.xaxis.set_major_formatter(plt.FuncFormatter(format_time))
-        ax.xaxis.set_major_locator(mdates.HourLocator(interval=1))
-        
-        # Add "Hour" as x-axis label
-        ax.set_xlabel('Timme', fontsize=10, color='#444444', labelpad=10)
-        ax.tick_params(axis='x', labelsize=9, pad=5)
-        ax.grid(True, which='major', linestyle='--', alpha=0.2)
-        
-        # Y-axis formatting
-        ax.set_ylabel('kr/kWh', fontsize=10, color='#444444')
-        ax.tick_params(axis='y', labelsize=9)
-        
-        # Adjust y-axis limits
-        all_prices = prices + (tomorrow_prices if prices_tomorrow else [])
-        y_min = max(0, min(all_prices) * 0.9)
-        y_max = max(all_prices) * 1.1
-        ax.set_ylim(y_min, y_max)
-        
-        # Add vertical line for current time
-        ax.axvline(x=current_time, color='#666666', linestyle='--', alpha=0.3)
-        
-        # Remove excess frames
-        ax.spines['top'].set_visible(False)
-        ax.spines['right'].set_visible(False)
-        ax.spines['left'].set_color('#CCCCCC')
-        ax.spines['bottom'].set_color('#CCCCCC')
-        
-        # Create legend with more space
-        leg = ax.legend(
-            bbox_to_anchor=(1.05, 0.5),
-            loc='center left',
-            facecolor='white',
-            edgecolor='none',
-            fontsize=9,
-            framealpha=0.9
-        )
-        
-        # Ensure legend is visible
-        leg.set_visible(True)
-        
-        # Adjust figure size and margins - ONLY ONCE
-        self.figure.subplots_adjust(
-            left=0.1,    # More space on the left
-            right=0.8,   # More space on the right for the legend
-            bottom=0.1,
-            top=0.9
-        )
-        
-        # Draw canvas LAST, after all adjustments
+        """Hides all data without destroying the axes"""
+        self.chart.clear()
+        self._data = None
+
+    def update_graph(self, prices_today, prices_tomorrow=None, highlight=None, outlook=None):
+        """
+        Updates the graph content
+
+        Args:
+            prices_today (PriceSeries): Today's prices
+            prices_tomorrow (PriceSeries, optional): Tomorrow's prices if published
+            highlight (dict, optional): Window with 'start' and 'end' Unix
+                timestamps to highlight, e.g. the cheapest block
+            outlook (Outlook, optional): Forecast of the following days
+        """
+        # Same data as last time: only the current time has moved
+        if (self._data is not None and self._background is not None
+                and self._data[0] is prices_today and self._data[1] is prices_tomorrow
+                and self._data[2] == highlight and self._data[3] is outlook):
+            self.update_now()
+            return
+        self._data = (prices_today, prices_tomorrow, highlight, outlook)
+
+        self.chart.update(prices_today, prices_tomorrow, highlight=highlight, outlook=outlook)
+        self.chart.set_now(self.clock.timestamp())
+        # The render when the resize settles shows the new data
+        if self.canvas.resizing:
+            return
+
+        # Full draw; _on_draw caches the background and blits the marker
+        start = time.perf_counter()
         self.canvas.draw()
+        self.last_draw_ms = (time.perf_counter() - start) * 1000
+        metrics.observe('graph_draw', self.last_draw_ms)
+
+    def _on_draw(self, event):
+        self._background = self.canvas.copy_from_bbox(self.figure.bbox)
+        if self.chart.series is not None:
+            self.chart.draw_animated()
+
+    def update_now(self):
+        """Redraw only the current time marker over the cached background"""
+        if self.chart.series is None or self._background is None or self.canvas.resizing:
+            return
+        start = time.perf_counter()
+        self.canvas.restore_region(self._background)
+        self.chart.set_now(self.clock.timestamp())
+        self.chart.draw_animated()
+        self.canvas.blit(self.figure.bbox)
+        self.last_blit_ms = (time.perf_counter() - start) * 1000
 
     def closeEvent(self, event):
         plt.close(self.figure)
         super().closeEvent(event)
-    
+
     def close(self):
         """Clean up matplotlib resources"""
         plt.close(self.figure)
-        super().close()
\ No newline at end of file
+        super().close()
@@ -0,0 +1,170 @@
+import random
+import time
+from datetime import timedelta
+from PyQt6.QtCore import QObject, QTimer, Qt, pyqtSignal
+from utils.clock import system_clock
+from utils.schedule import PUBLISH_HOUR, backoff
+
+
+class RefreshScheduler(QObject):
+    """Decides when the widget re-renders and when it goes to the network
+
+    Two independent schedules are kept:
+
+    - boundary_reached fires exactly at every price-interval boundary so the
+      displayed price flips on time. It never needs the network.
+    - poll_due fires only when data is expected but missing: at midnight when
+      a new day starts, around 13:00 when tomorrow's prices are published,
+      and with exponential backoff plus jitter while they are still missing.
+
+    A watchdog compares wall-clock and monotonic time to detect suspend/resume
+    and clock changes, and re-plans both schedules when they happen.
+    """
+
+    boundary_reached = pyqtSignal()
+    poll_due = pyqtSignal()
+
+    # Spread first publication polls so a fleet does not hit the API at once
+    PUBLISH_SPREAD = 300
+
+    WATCHDOG_INTERVAL = 60
+    CLOCK_JUMP_TOLERANCE = 5
+
+    def __init__(self, parent=None, interval_minutes=60, clock=None, poll_missing=True):
+        """
+        Args:
+            parent (QObject, optional): Parent object
+            interval_minutes (int, optional): Price resolution in minutes
+            clock (Clock, optional): Defaults to the system clock
+            poll_missing (bool, optional): Poll for missing data around the
+                publication and with backoff. Off when a price hub pushes new
+                days; the midnight poll_due still fires
+        """
+        super().__init__(parent)
+        self.clock = clock or system_clock
+        self.poll_missing = poll_missing
+        self.interval_minutes = interval_minutes
+        self.failures = 0
+        self.has_today = False
+        self.has_tomorrow = False
+
+        self.boundary_timer = QTimer(self)
+        self.boundary_timer.setSingleShot(True)
+        self.boundary_timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self.boundary_timer.timeout.connect(self._on_boundary)
+
+        self.poll_timer = QTimer(self)
+        self.poll_timer.setSingleShot(True)
+        self.poll_timer.timeout.connect(self._on_poll)
+
+        self.watchdog = QTimer(self)
+        self.watchdog.timeout.connect(self._check_clock)
+
+        # Clock timestamps the two timers are set for, None while not scheduled
+        self.boundary_at = None
+        self.poll_at = None
+
+        self._last_day = self.clock.now().date()
+        self._last_wall = self.clock.timestamp()
+        self._last_mono = time.monotonic()
+
+    def start(self):
+        self._schedule_boundary()
+        self.watchdog.start(self.WATCHDOG_INTERVAL * 1000)
+
+    def stop(self):
+        self.boundary_timer.stop()
+        self.poll_timer.stop()
+        self.watchdog.stop()
+        self.boundary_at = None
+        self.poll_at = None
+
+    def set_interval_minutes(self, minutes):
+        """Change the price resolution, e.g. 60 for hourly or 15 for quarter-hourly"""
+        if minutes != self.interval_minutes:
+            self.interval_minutes = minutes
+            self._schedule_boundary()
+
+    def next_boundary(self, now=None):
+        """Start of the next price interval after now"""
+        now = now or self.clock.now()
+        midnight = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        interval = timedelta(minutes=self.interval_minutes)
+        elapsed = (now - midnight) // interval
+        return midnight + (elapsed + 1) * interval
+
+    def data_updated(self, has_today, has_tomorrow):
+        """
+        Report the outcome of a fetch so the next poll can be planned
+
+        Args:
+            has_today (bool): Whether today's prices are available
+            has_tomorrow (bool): Whether tomorrow's prices are available
+        """
+        if has_today and (has_tomorrow or not self._tomorrow_expected()):
+            self.failures = 0
+        elif has_today == self.has_today and has_tomorrow == self.has_tomorrow:
+            # Nothing new arrived since the last attempt
+            self.failures += 1
+        self.has_today = has_today
+        self.has_tomorrow = has_tomorrow
+        self._schedule_poll()
+
+    def _tomorrow_expected(self, now=None):
+        now = now or self.clock.now()
+        return now.hour >= PUBLISH_HOUR
+
+    def _schedule_boundary(self):
+        now = self.clock.now()
+        # Land slightly after the boundary so the new interval is current
+        delay = (self.next_boundary(now) - now).total_seconds() + 0.05
+        self.boundary_at = self.clock.timestamp() + max(0, delay)
+        self.boundary_timer.start(max(0, int(delay * 1000)))
+
+    def _schedule_poll(self):
+        self.poll_timer.stop()
+        self.poll_at = None
+        if not self.poll_missing:
+            return
+        now = self.clock.now()
+
+        if not self.has_today or (self._tomorrow_expected(now) and not self.has_tomorrow):
+            delay = backoff(self.failures)
+        elif not self.has_tomorrow:
+            # Wait for the publication, then poll with a little spread
+            publish = now.replace(hour=PUBLISH_HOUR, minute=0, second=0, microsecond=0)
+            delay = (publish - now).total_seconds() + random.uniform(0, self.PUBLISH_SPREAD)
+        else:
+            # Everything is here; the day rollover in _on_boundary polls next
+            return
+
+        self.poll_at = self.clock.timestamp() + delay
+        self.poll_timer.start(int(delay * 1000))
+
+    def _on_boundary(self):
+        self.boundary_at = None
+        today = self.clock.now().date()
+        new_day = today != self._last_day
+        self._last_day = today
+
+        self.boundary_reached.emit()
+        if new_day:
+            # Yesterday and today rotate; tomorrow is no longer known
+            self.has_tomorrow = False
+            self.failures = 0
+            self.poll_due.emit()
+        self._schedule_boundary()
+
+    def _on_poll(self):
+        self.poll_at = None
+        self.poll_due.emit()
+
+    def _check_clock(self):
+        """Re-plan timers after suspend/resume or a wall-clock change"""
+        wall, mono = self.clock.timestamp(), time.monotonic()
+        drift = (wall - self._last_wall) - (mono - self._last_mono)
+        self._last_wall, self._last_mono = wall, mono
+
+        if abs(drift) > self.CLOCK_JUMP_TOLERANCE:
+            self._on_boundary()
+            self._schedule_poll()
@@ -1,9 +1,46 @@
 from PyQt6.QtWidgets import QApplication
 from PyQt6.QtCore import Qt
+import argparse
 import sys
 from components.price_display import ElprisWidget
+from utils.alerts import Rule
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Elpris widget")
+    parser.add_argument('--hub', metavar='URL',
+                        help="Fetch prices from a price hub (python cli.py hub) instead of elprisetjustnu.se")
+    parser.add_argument('--graph-backend', choices=ElprisWidget.GRAPH_BACKENDS, default='matplotlib',
+                        help="Library used to draw the price graph (painter avoids loading matplotlib)")
+    parser.add_argument('--metrics', metavar='PATH',
+                        help="Export timings and counters to PATH, a Prometheus textfile if it "
+                             "ends in .prom, JSON lines otherwise")
+    parser.add_argument('--debug-overlay', action='store_true',
+                        help="Show the most recent timings on the widget")
+    parser.add_argument('--outlook-days', type=int, default=7, metavar='DAYS',
+                        help="Show a price forecast up to DAYS days ahead in the expanded graph "
+                             "(0 turns it off)")
+    parser.add_argument('--alert', metavar='RULE', action='append', default=[],
+                        help='Notify when a rule matches, e.g. "SE3 below 0.20", '
+                             '"SE3 tomorrow above today by 30%%" or "SE3 cheapest 3h in 15 min". '
+                             'Can be given several times')
+    parser.add_argument('--alerts', metavar='FILE',
+                        help="Read alert rules from FILE, one per line; # starts a comment")
+    # Qt handles its own arguments, such as -platform
+    args, _ = parser.parse_known_args(argv)
+
+    # Compile the rules up front so mistakes are reported before the widget starts
+    texts = list(args.alert)
+    if args.alerts:
+        with open(args.alerts, encoding='utf-8') as f:
+            texts += [line.split('#')[0].strip() for line in f]
+    try:
+        args.alert_rules = [Rule.parse(text) for text in texts if text]
+    except ValueError as e:
+        parser.error(str(e))
+    return args
 
 def main():
+    args = parse_args(sys.argv[1:])
     app = QApplication(sys.argv)
     
     # Set global stylesheet for the application
@@ -14,7 +51,9 @@ def main():
         }
     """)
     
-    widget = ElprisWidget()
+    widget = ElprisWidget(hub_url=args.hub, graph_backend=args.graph_backend,
+                          metrics_path=args.metrics, debug_overlay=args.debug_overlay,
+                          outlook_days=args.outlook_days, alert_rules=args.alert_rules)
     
     # Set window properties
     widget.setWindowFlags(
@@ -0,0 +1,11 @@
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Local days, DST transitions and the 13:00 publication are Swedish time
+os.environ['TZ'] = 'Europe/Stockholm'
+if hasattr(time, 'tzset'):
+    time.tzset()
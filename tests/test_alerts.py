@@ -0,0 +1,109 @@
+from datetime import datetime, timedelta
+import numpy as np
+import pytest
+from benchmarks.fake_prices import make_day
+from utils.alerts import AlertEngine, Rule
+from utils.clock import SimulatedClock
+from utils.optimizer import cheapest_window
+from utils.price_series import PriceSeries
+
+DAY = datetime(2025, 3, 3)
+
+
+def flat_series(day, prices):
+    """Hourly series from local midnight of day with the given prices"""
+    first = int(day.timestamp())
+    return PriceSeries(first + 3600 * np.arange(len(prices)), np.asarray(prices, dtype=float))
+
+
+@pytest.mark.parametrize('text, kind, value', [
+    ("SE3 below 0.20", 'threshold', 0.2),
+    ("se3 above 2,5", None, None),
+    ("SE1  above   -0.5", 'threshold', -0.5),
+    ("SE4 tomorrow above today by 30%", 'tomorrow', 30.0),
+    ("SE2 cheapest 3h in 15 min", 'cheapest', 15.0),
+])
+def test_parse(text, kind, value):
+    if kind is None:
+        with pytest.raises(ValueError):
+            Rule.parse(text)
+        return
+    rule = Rule.parse(text)
+    assert rule.kind == kind and rule.value == value
+
+
+def test_thresholds_fire_on_crossing_only():
+    engine = AlertEngine()
+    below = engine.add("SE3 below 0.5")
+    engine.add("SE3 above 2.0")
+    prices = [1.0, 0.4, 0.3, 0.6, 0.45, 2.5, 2.6]
+    engine.on_prices(3, flat_series(DAY, prices), now=DAY.timestamp() + 1)
+    fired = [[alert.rule.text for alert in engine.on_interval(3, now=DAY.timestamp() + 3600 * hour + 1)]
+             for hour in range(1, len(prices))]
+    assert fired == [["SE3 below 0.5"], [], [], ["SE3 below 0.5"], ["SE3 above 2.0"], []]
+
+    engine.remove(below)
+    assert len(engine) == 1
+    assert engine.on_interval(3, now=DAY.timestamp() + 1) == []
+
+
+def test_first_price_checks_every_threshold():
+    engine = AlertEngine()
+    for level in (0.5, 1.5, 3.0):
+        engine.add(f"SE3 below {level}")
+    fired = engine.on_prices(3, flat_series(DAY, [1.0] * 24), now=DAY.timestamp() + 1)
+    assert sorted(alert.rule.value for alert in fired) == [1.5, 3.0]
+
+
+def test_tomorrow_rules_fire_once_per_publication():
+    engine = AlertEngine()
+    engine.add("SE3 tomorrow above today by 10%")
+    engine.add("SE3 tomorrow above today by 50%")
+    engine.add("SE3 tomorrow below today by 10%")
+    today = flat_series(DAY, [1.0] * 24)
+    tomorrow = flat_series(DAY + timedelta(days=1), [1.2] * 24)
+    now = DAY.timestamp() + 13 * 3600
+
+    fired = engine.on_prices(3, today, tomorrow, now=now)
+    assert [alert.rule.text for alert in fired] == ["SE3 tomorrow above today by 10%"]
+    assert engine.on_prices(3, today, tomorrow, now=now + 900) == []
+
+
+def test_cheapest_rules_fire_by_lead_time():
+    today = PriceSeries.from_json(make_day(DAY))
+    start = DAY.timestamp() + 1
+    window = cheapest_window(today, 2, after=datetime.fromtimestamp(today.ends[0]))
+    engine = AlertEngine()
+    received = []
+    engine.add("SE3 cheapest 2h in 30 min", callback=received.append)
+    engine.add("SE3 cheapest 2h in 10 min", callback=received.append)
+    engine.add("SE3 cheapest 2h in 5 min", callback=received.append)
+    assert engine.on_prices(3, today, now=start) == []
+
+    assert engine.next_due() == window['start'] - 1800
+    assert [a.rule.value for a in engine.on_due(now=window['start'] - 1800)] == [30.0]
+    assert engine.next_due() == window['start'] - 600
+    # Both remaining rules when the engine wakes late, longest lead first
+    assert [a.rule.value for a in engine.on_due(now=window['start'] - 60)] == [10.0, 5.0]
+    assert [a.rule.value for a in received] == [30.0, 10.0, 5.0]
+    assert engine.next_due() is None
+
+
+def test_cheapest_rule_added_after_prices_still_fires():
+    clock = SimulatedClock(DAY + timedelta(seconds=1))
+    today = PriceSeries.from_json(make_day(DAY))
+    window = cheapest_window(today, 1, after=datetime.fromtimestamp(today.ends[0]))
+    engine = AlertEngine(clock=clock)
+    engine.on_prices(3, today)
+
+    # A new group, and then a longer lead in the same group, both before their time
+    engine.add("SE3 cheapest 1h in 5 min")
+    engine.add("SE3 cheapest 1h in 30 min")
+    assert engine.next_due() == window['start'] - 1800
+    assert len(engine.on_due(now=window['start'] - 1800)) == 1
+    assert len(engine.on_due(now=window['start'] - 300)) == 1
+
+    # A lead time that has already passed waits for the next window
+    clock.set(window['start'] - 120)
+    engine.add("SE3 cheapest 1h in 10 min")
+    assert engine.next_due() is None
@@ -0,0 +1,134 @@
+import json
+from datetime import datetime, timedelta
+import pytest
+import requests
+from utils.api import ElprisAPI
+from utils.cache import PriceCache
+from utils.circuit_breaker import CircuitBreaker
+from utils.clock import SimulatedClock
+
+DAY = datetime(2025, 3, 3, 12)
+RECORDS = [{'SEK_per_kWh': 0.5, 'EUR_per_kWh': 0.04, 'EXR': 11.5,
+            'time_start': '2025-03-03T00:00:00+01:00', 'time_end': '2025-03-03T01:00:00+01:00'}]
+
+
+def make_response(status=200, body=RECORDS):
+    response = requests.Response()
+    response.status_code = status
+    response._content = json.dumps(body).encode()
+    response.headers['Content-Type'] = 'application/json'
+    return response
+
+
+class ScriptedSession(requests.Session):
+    """Session answering each GET with the next scripted response or exception"""
+
+    def __init__(self, script):
+        super().__init__()
+        self.script = list(script)
+        self.calls = 0
+
+    def get(self, url, **kwargs):
+        self.calls += 1
+        outcome = self.script.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+def make_api(script, **kwargs):
+    return ElprisAPI(base_url='http://stub/{year}/{date}_SE{region}.json',
+                     cache=PriceCache(':memory:'), session=ScriptedSession(script),
+                     clock=SimulatedClock(DAY), **kwargs)
+
+
+def test_retries_transient_failures():
+    api = make_api([requests.ConnectionError("reset"), make_response(503), make_response()],
+                   retries=2)
+    api.RETRY_BACKOFF = 0
+    assert api.fetch_prices(DAY) == RECORDS
+    assert api.session.calls == 3
+
+
+def test_serves_cache_after_first_download():
+    api = make_api([make_response()])
+    assert api.fetch_prices(DAY) == RECORDS
+    assert api.fetch_prices(DAY) == RECORDS
+    assert api.session.calls == 1
+
+
+def test_keeps_the_adapters_of_a_given_session():
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(max_retries=5)
+    session.mount('https://', adapter)
+    api = ElprisAPI(cache=PriceCache(':memory:'), session=session)
+    assert api.session is session
+    assert session.get_adapter('https://www.elprisetjustnu.se/') is adapter
+    assert ElprisAPI(cache=PriceCache(':memory:')).session.get_adapter('https://www.elprisetjustnu.se/')._pool_maxsize == 16
+
+
+@pytest.mark.parametrize('error', [requests.exceptions.ChunkedEncodingError("truncated"),
+                                   ValueError("unexpected")])
+def test_unexpected_error_in_half_open_trial_releases_breaker(error):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    api = make_api([requests.ConnectionError("down"), error, make_response()],
+                   retries=0, breaker=breaker)
+
+    assert api.fetch_prices(DAY) is None
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    # The trial fails with an error _get does not retry
+    assert api.fetch_prices(DAY) is None
+    # The next call is a new trial instead of "Upstream unavailable" forever
+    assert api.fetch_prices(DAY) == RECORDS
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert api.session.calls == 3
+
+
+@pytest.fixture
+def stub():
+    from benchmarks.stub_server import StubServer
+    with StubServer(points=96, clock=SimulatedClock(DAY)) as server:
+        yield server
+
+
+def make_stub_api(stub, **kwargs):
+    return ElprisAPI(base_url=stub.base_url, cache=PriceCache(':memory:'), clock=stub.clock, **kwargs)
+
+
+def test_stub_server_day_and_revalidation(stub):
+    api = make_stub_api(stub)
+    prices = api.fetch_prices(DAY, 3)
+    assert len(prices) == 96
+    # Revalidating sends the stored ETag and gets a 304 without a body
+    assert api.fetch_prices(DAY, 3, revalidate=True) == prices
+    assert [r['status'] for r in api.request_log] == [200, 304]
+    assert api.request_stats()['not_modified'] == 1
+    api.close()
+
+
+def test_stub_server_tomorrow_after_publication(stub):
+    api = make_stub_api(stub)
+    assert api.fetch_prices_tomorrow(3) is None
+    assert api.total_requests == 0
+    stub.clock.set(DAY.replace(hour=13, minute=5))
+    assert len(api.fetch_prices_tomorrow(3)) == 96
+    # More than a day ahead is never requested
+    assert api.fetch_prices(DAY + timedelta(days=2), 3) is None
+    api.close()
+
+
+def test_stub_server_fetch_range_into_archive(stub, tmp_path):
+    from utils.archive import PriceArchive
+    archive = PriceArchive(str(tmp_path))
+    api = make_stub_api(stub, archive=archive)
+    start = DAY - timedelta(days=9)
+
+    stats = api.fetch_range(start, DAY, regions=(1, 3), max_in_flight=4)
+    assert (stats['total'], stats['fetched'], stats['failed']) == (20, 20, 0)
+    assert len(archive.days(3)) == 10
+    assert len(archive.query(1, start, DAY)[0]) == 10 * 96
+
+    again = api.fetch_range(start, DAY, regions=(1, 3))
+    assert (again['fetched'], again['skipped']) == (0, 20)
+    assert stub.requests == 20
+    api.close()
@@ -0,0 +1,127 @@
+import multiprocessing
+import os
+from datetime import date, timedelta
+import numpy as np
+import pytest
+from utils.archive import PriceArchive
+from utils.price_series import PriceSeries
+
+START = date(2024, 1, 1)
+
+
+def make_series(day, points=24):
+    """A day of prices that identifies the day: every price is its ordinal"""
+    first = int(np.datetime64(day, 's').astype(np.int64))
+    starts = first + np.arange(points, dtype=np.int64) * (86400 // points)
+    return PriceSeries(starts, np.full(points, day.toordinal() % 1000, dtype=np.float64))
+
+
+def assert_day(archive, day, points=24):
+    timestamps, prices = archive.query(3, day, day)
+    assert len(prices) == points, day
+    assert timestamps[0] == make_series(day, points).starts[0]
+    assert (prices == day.toordinal() % 1000).all()
+
+
+def append_days(path, days):
+    archive = PriceArchive(path)
+    for day in days:
+        archive.append_day(day, 3, make_series(day))
+
+
+def test_query_returns_appended_days(tmp_path):
+    archive = PriceArchive(str(tmp_path))
+    for offset in (0, 2, 1):
+        assert archive.append_day(START + timedelta(days=offset), 3, make_series(START + timedelta(days=offset)))
+    assert not archive.append_day(START, 3, make_series(START))
+
+    assert not archive.is_sorted(3)
+    timestamps, prices = archive.query(3, START, START + timedelta(days=2))
+    assert len(prices) == 72
+    assert (np.diff(timestamps) > 0).all()
+
+
+def test_stale_instance_does_not_overwrite_other_writer(tmp_path):
+    first = PriceArchive(str(tmp_path))
+    first.append_day(START, 3, make_series(START))
+    assert_day(first, START)
+
+    second = PriceArchive(str(tmp_path))
+    for offset in (1, 2, 3):
+        second.append_day(START + timedelta(days=offset), 3, make_series(START + timedelta(days=offset)))
+    # first still has the one-day mapping from before
+    first.append_day(START + timedelta(days=10), 3, make_series(START + timedelta(days=10)))
+
+    for archive in (first, second, PriceArchive(str(tmp_path))):
+        for offset in (0, 1, 2, 3, 10):
+            assert_day(archive, START + timedelta(days=offset))
+
+
+def test_processes_append_concurrently(tmp_path):
+    days = [START + timedelta(days=offset) for offset in range(40)]
+    context = multiprocessing.get_context('spawn')
+    workers = [context.Process(target=append_days, args=(str(tmp_path), days[i::4])) for i in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(60)
+        assert worker.exitcode == 0
+
+    archive = PriceArchive(str(tmp_path))
+    assert sorted(archive.days(3)) == days
+    for day in days:
+        assert_day(archive, day)
+
+
+def test_interrupted_append_is_truncated(tmp_path):
+    archive = PriceArchive(str(tmp_path))
+    archive.append_day(START, 3, make_series(START))
+    # Columns of a day whose index row never got written
+    with open(archive._file(3, archive.TIMESTAMPS), 'ab') as f:
+        f.write(b'\0' * 80)
+    with open(archive._file(3, archive.INDEX), 'ab') as f:
+        f.write(b'\0' * 10)
+
+    archive.append_day(START + timedelta(days=1), 3, make_series(START + timedelta(days=1)))
+    reopened = PriceArchive(str(tmp_path))
+    assert reopened.days(3) == [START, START + timedelta(days=1)]
+    assert_day(reopened, START + timedelta(days=1))
+
+
+def test_compact_switches_generation_for_all_instances(tmp_path):
+    archive = PriceArchive(str(tmp_path))
+    other = PriceArchive(str(tmp_path))
+    for offset in (3, 1, 2, 0):
+        archive.append_day(START + timedelta(days=offset), 3, make_series(START + timedelta(days=offset)))
+    assert_day(other, START)
+
+    archive.compact()
+    assert archive.is_sorted(3)
+    assert sorted(os.listdir(tmp_path / 'SE3')) == ['.lock', 'CURRENT', 'gen1']
+
+    other.append_day(START + timedelta(days=4), 3, make_series(START + timedelta(days=4)))
+    archive.compact()
+    assert sorted(os.listdir(tmp_path / 'SE3')) == ['.lock', 'CURRENT', 'gen2']
+    for reader in (archive, other):
+        assert reader.days(3) == [START + timedelta(days=offset) for offset in range(5)]
+        timestamps, prices = reader.query(3, START, START + timedelta(days=4))
+        assert len(prices) == 120 and isinstance(prices, np.memmap)
+
+
+def test_interrupted_compaction_keeps_old_generation(tmp_path, monkeypatch):
+    archive = PriceArchive(str(tmp_path))
+    for offset in (1, 0):
+        archive.append_day(START + timedelta(days=offset), 3, make_series(START + timedelta(days=offset)))
+
+    def crash(src, dst):
+        raise OSError("crash")
+    monkeypatch.setattr(os, 'replace', crash)
+    with pytest.raises(OSError):
+        archive.compact()
+    monkeypatch.undo()
+
+    reopened = PriceArchive(str(tmp_path))
+    assert reopened.days(3) == [START + timedelta(days=1), START]
+    reopened.compact()
+    assert reopened.days(3) == [START, START + timedelta(days=1)]
+    assert_day(reopened, START)
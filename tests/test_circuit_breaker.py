@@ -0,0 +1,51 @@
+import pytest
+from utils.circuit_breaker import CircuitBreaker, CircuitOpenError
+
+
+def test_opens_after_threshold():
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=60)
+    for _ in range(2):
+        breaker.check()
+        breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+    breaker.check()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.check()
+
+
+def test_success_resets_failures():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_half_open_lets_one_trial_through():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+
+    breaker.check()
+    with pytest.raises(CircuitOpenError):
+        breaker.check()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.check()
+
+
+def test_failed_trial_opens_again(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr('utils.circuit_breaker.time.monotonic', lambda: now[0])
+    breaker = CircuitBreaker(failure_threshold=5, reset_timeout=30)
+    for _ in range(5):
+        breaker.record_failure()
+    now[0] += 30
+    breaker.check()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    now[0] += 30
+    assert breaker.state == CircuitBreaker.HALF_OPEN
@@ -0,0 +1,53 @@
+from datetime import datetime, timedelta
+from benchmarks.fake_prices import make_day
+from utils.alerts import AlertEngine
+from utils.api import ElprisAPI
+from utils.cache import PriceCache
+from utils.clock import SimulatedClock
+from utils.optimizer import cheapest_window
+from utils.price_series import PriceSeries
+
+START = datetime(2025, 3, 3, 0, 0, 30)
+
+
+def test_simulated_clock_moves_only_when_told():
+    clock = SimulatedClock(START)
+    assert clock.now() == START
+    assert clock.advance(3600) == START + timedelta(hours=1)
+    clock.set(START.timestamp())
+    assert clock.timestamp() == START.timestamp()
+
+
+def test_cache_dates_entries_with_its_clock():
+    clock = SimulatedClock(START)
+    cache = PriceCache(':memory:', clock=clock)
+    cache.put(START, 3, make_day(START))
+    clock.advance(86400)
+    cache.touch(START, 3)
+    [fetched_at] = cache._conn.execute("SELECT fetched_at FROM prices").fetchone()
+    assert datetime.fromisoformat(fetched_at) == START + timedelta(days=1)
+
+
+def test_api_shares_its_clock_with_the_default_cache(tmp_path, monkeypatch):
+    monkeypatch.setenv('XDG_CACHE_HOME', str(tmp_path))
+    clock = SimulatedClock(START)
+    api = ElprisAPI(clock=clock)
+    assert api.cache.clock is clock
+    api.close()
+
+
+def test_alert_engine_uses_its_clock_when_no_time_is_given():
+    clock = SimulatedClock(START)
+    today = PriceSeries.from_json(make_day(START, points=24))
+    window = cheapest_window(today, 1, after=datetime.fromtimestamp(today.ends[0]))
+    engine = AlertEngine(clock=clock)
+    fired = []
+    engine.add("SE3 cheapest 1h in 2 min", callback=fired.append)
+    engine.on_prices(3, today)
+
+    assert engine.next_due() == window['start'] - 120
+    clock.set(window['start'] - 180)
+    assert engine.on_due() == []
+    clock.set(window['start'] - 120)
+    engine.on_due()
+    assert len(fired) == 1
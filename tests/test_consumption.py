@@ -0,0 +1,87 @@
+import io
+from datetime import date, datetime, timedelta
+import numpy as np
+import pytest
+from benchmarks.fake_prices import make_day
+from utils.archive import PriceArchive
+from utils.consumption import CostCalculator
+from utils.price_series import PriceSeries
+
+
+def make_archive(path, days):
+    """Archive with fake prices for (day, points per day) pairs"""
+    archive = PriceArchive(str(path))
+    for day, points in days:
+        archive.append_day(day, 3, make_day(day, points=points))
+    return archive
+
+
+def readings(first, days, minutes=60, kwh=1.0):
+    """Constant consumption from local midnight of first for a number of days"""
+    start = datetime.combine(first, datetime.min.time())
+    end = datetime.combine(first + timedelta(days=days), datetime.min.time())
+    starts = np.arange(int(start.timestamp()), int(end.timestamp()), minutes * 60)
+    return starts, np.full(len(starts), kwh)
+
+
+def day_mean(day, points):
+    return PriceSeries.from_json(make_day(day, points=points)).prices.mean()
+
+
+def test_hourly_readings_against_hourly_prices(tmp_path):
+    day = date(2025, 3, 3)
+    calculator = CostCalculator(make_archive(tmp_path, [(day, 24)]))
+    calculator.add_readings(*readings(day, 1))
+
+    [row] = calculator.daily()
+    assert row['kwh'] == 24 and row['unpriced_kwh'] == 0
+    assert row['cost'] == pytest.approx(24 * day_mean(day, 24), rel=1e-6)
+    assert row['savings'] == pytest.approx(0, abs=1e-6)
+
+
+def test_mixed_resolution_range(tmp_path):
+    # The API switched from hourly to quarter-hourly prices on 2025-10-01
+    days = [(date(2025, 9, 29), 24), (date(2025, 9, 30), 24),
+            (date(2025, 10, 1), 96), (date(2025, 10, 2), 96)]
+    calculator = CostCalculator(make_archive(tmp_path, days))
+    # One chunk of hourly readings across the switch
+    calculator.add_readings(*readings(date(2025, 9, 29), 4))
+
+    rows = calculator.daily()
+    assert [row['day'] for row in rows] == [day.isoformat() for day, _ in days]
+    for row, (day, points) in zip(rows, days):
+        assert row['kwh'] == 24 and row['unpriced_kwh'] == 0, row
+        assert row['cost'] == pytest.approx(24 * day_mean(day, points), rel=1e-5)
+
+
+def test_dst_day_and_missing_day(tmp_path):
+    # 2025-10-26 has 25 hours; 2025-10-27 is not archived
+    days = [(date(2025, 10, 25), 96), (date(2025, 10, 26), 96), (date(2025, 10, 28), 96)]
+    calculator = CostCalculator(make_archive(tmp_path, days), interval_minutes=15)
+    calculator.add_readings(*readings(date(2025, 10, 25), 4, minutes=15, kwh=0.25))
+
+    rows = {row['day']: row for row in calculator.daily()}
+    assert rows['2025-10-26']['kwh'] == 25 and rows['2025-10-26']['unpriced_kwh'] == 0
+    assert rows['2025-10-27']['kwh'] == 0 and rows['2025-10-27']['unpriced_kwh'] == 24
+    assert rows['2025-10-28']['kwh'] == 24
+    assert rows['2025-10-26']['cost'] == pytest.approx(
+        0.25 * PriceSeries.from_json(make_day(date(2025, 10, 26), points=96)).prices.sum(), rel=1e-5)
+
+
+def test_csv_in_chunks_matches_single_chunk(tmp_path):
+    day = date(2025, 10, 1)
+    archive = make_archive(tmp_path, [(day, 96), (day + timedelta(days=1), 96)])
+    lines = ["meter;time;kwh"]
+    for meter in ('a', 'b'):
+        start = datetime.combine(day, datetime.min.time())
+        for hour in range(48):
+            lines.append(f"{meter};{(start + timedelta(hours=hour)).isoformat()};{hour % 5},5")
+    text = "\n".join(lines) + "\n"
+
+    whole = CostCalculator(archive).process_csv(io.StringIO(text)).daily()
+    chunked = CostCalculator(archive).process_csv(io.StringIO(text), chunk_size=7).daily()
+    assert len(whole) == 4
+    for a, b in zip(whole, chunked):
+        assert a['meter'] == b['meter'] and a['day'] == b['day']
+        assert a['cost'] == pytest.approx(b['cost'])
+        assert a['kwh'] == pytest.approx(b['kwh'])
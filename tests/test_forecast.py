@@ -0,0 +1,108 @@
+from datetime import date, timedelta
+import numpy as np
+import pytest
+from benchmarks.fake_prices import make_day
+from utils.archive import PriceArchive
+from utils.forecast import HOURS, PriceForecaster, hourly_profile
+from utils.price_series import PriceSeries
+
+START = date(2025, 1, 6)
+# Weekday-dependent daily shape: the weekly model can predict it exactly
+PATTERN = np.array([[1.0 + 0.1 * weekday + 0.5 * np.sin(hour / 24 * 2 * np.pi) for hour in range(HOURS)]
+                    for weekday in range(7)])
+
+
+def profile_of(day):
+    series = PriceSeries.from_json(make_day(day, points=96))
+    return hourly_profile(series.starts, series.prices)
+
+
+def test_hourly_profile_of_hourly_and_quarter_hourly_days():
+    day = date(2025, 3, 3)
+    hourly = PriceSeries.from_json(make_day(day, points=24))
+    quarters = PriceSeries.from_json(make_day(day, points=96))
+    assert np.allclose(hourly_profile(hourly.starts, hourly.prices), hourly.prices)
+    assert np.allclose(hourly_profile(quarters.starts, quarters.prices),
+                       quarters.prices.reshape(HOURS, 4).mean(axis=1))
+    assert np.isnan(hourly_profile([], [])).all()
+
+
+def test_hourly_profile_of_dst_days():
+    # 23 hours: 02:00 is missing and interpolated
+    spring = PriceSeries.from_json(make_day(date(2025, 3, 30), points=24))
+    profile = hourly_profile(spring.starts, spring.prices)
+    assert not np.isnan(profile).any()
+    assert profile[2] == pytest.approx((profile[1] + profile[3]) / 2)
+    # 25 hours: the repeated 02:00 is averaged
+    autumn = PriceSeries.from_json(make_day(date(2025, 10, 26), points=24))
+    profile = hourly_profile(autumn.starts, autumn.prices)
+    assert profile[2] == pytest.approx(autumn.prices[2:4].mean())
+    assert profile[3] == pytest.approx(autumn.prices[4])
+
+
+def test_update_only_accepts_later_complete_days():
+    forecaster = PriceForecaster()
+    assert forecaster.update(START, PATTERN[0])
+    assert not forecaster.update(START, PATTERN[0])
+    assert not forecaster.update(START - timedelta(days=1), PATTERN[0])
+    assert not forecaster.update(START + timedelta(days=1), np.full(HOURS, np.nan))
+    assert forecaster.last_day == START.toordinal()
+
+
+def test_weekly_pattern_is_learnt():
+    forecaster = PriceForecaster(horizon=3)
+    for offset in range(60):
+        day = START + timedelta(days=offset)
+        forecaster.update(day, PATTERN[day.weekday()])
+
+    outlook = forecaster.forecast()
+    assert len(outlook) == 3 * HOURS
+    assert outlook.days == [START + timedelta(days=60 + step) for step in range(3)]
+    for step, day in enumerate(outlook.days):
+        expected = PATTERN[day.weekday()]
+        assert np.allclose(outlook.mean[step * HOURS:(step + 1) * HOURS], expected, atol=0.05)
+    assert (outlook.lower <= outlook.mean).all() and (outlook.mean <= outlook.upper).all()
+    # Repeating yesterday misses the weekday effect; the other two do not
+    assert 'daily' not in outlook.models
+
+
+def test_forecast_needs_a_day():
+    forecaster = PriceForecaster()
+    assert forecaster.forecast() is None
+    forecaster.update(START, PATTERN[0])
+    outlook = forecaster.forecast(days=2)
+    assert outlook.models == ['weekly', 'weekly']
+    assert np.allclose(outlook.mean[:HOURS], PATTERN[0])
+
+
+@pytest.mark.parametrize('last_day, hours, local_hours', [
+    # 02:00 is skipped, or repeated
+    (date(2025, 3, 29), 23, [0, 1, 3]),
+    (date(2025, 10, 25), 25, [0, 1, 2, 2, 3]),
+])
+def test_forecast_follows_the_hours_of_dst_days(last_day, hours, local_hours):
+    forecaster = PriceForecaster()
+    forecaster.update(last_day, PATTERN[0])
+    outlook = forecaster.forecast(days=2)
+    assert len(outlook) == hours + HOURS
+    assert outlook.days == [last_day + timedelta(days=1), last_day + timedelta(days=2)]
+    assert (np.diff(outlook.starts) == 3600).all() and (outlook.ends - outlook.starts == 3600).all()
+    assert outlook.day_starts[1] == outlook.starts[hours]
+    assert np.allclose(outlook.mean[:len(local_hours)], PATTERN[0][local_hours])
+
+
+def test_update_from_archive_is_incremental(tmp_path):
+    archive = PriceArchive(str(tmp_path))
+    days = [START + timedelta(days=offset) for offset in range(30)]
+    for day in days[:20]:
+        archive.append_day(day, 3, make_day(day, points=96))
+
+    forecaster = PriceForecaster()
+    assert forecaster.update_from_archive(archive, 3) == 20
+    assert forecaster.update_from_archive(archive, 3) == 0
+    for day in days[20:]:
+        archive.append_day(day, 3, make_day(day, points=96))
+    assert forecaster.update_from_archive(archive, 3) == 10
+    assert forecaster.days_trained == 29
+    assert np.allclose(forecaster._history[days[-1].toordinal()], profile_of(days[-1]))
+    assert 'ridge' in forecaster._predict(1)
@@ -0,0 +1,138 @@
+import os
+import threading
+import time
+from datetime import datetime
+import pytest
+import requests
+from benchmarks.stub_server import StubServer
+from utils.api import ElprisAPI
+from utils.cache import PriceCache
+from utils.clock import SimulatedClock
+from utils.hub import PriceHub, hub_base_url, serve
+from utils.schedule import MAX_BACKOFF, MIN_BACKOFF, PUBLISH_HOUR
+
+MORNING = datetime(2025, 3, 3, 9, 0)
+AFTERNOON = datetime(2025, 3, 3, PUBLISH_HOUR, 5)
+
+
+@pytest.fixture
+def hub():
+    """A hub on a free localhost port, fetching from a local stub of the upstream API"""
+    clock = SimulatedClock(MORNING)
+    with StubServer(clock=clock) as stub:
+        price_hub = PriceHub(ElprisAPI(base_url=stub.base_url, cache=PriceCache(':memory:'),
+                                       clock=clock), regions=(3,))
+        server = serve(price_hub, port=0)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        price_hub.url = f"http://127.0.0.1:{server.server_address[1]}"
+        yield price_hub
+        price_hub.stop()
+        server.shutdown()
+        server.server_close()
+        price_hub.api.close()
+
+
+def test_days_to_poll_follow_the_clock(hub):
+    assert [day.date() for day in hub.days_to_poll()] == [datetime(2025, 3, 2).date(), MORNING.date()]
+    hub.api.clock.set(AFTERNOON)
+    assert len(hub.days_to_poll()) == 3
+
+
+def test_next_poll_delay(hub):
+    # Complete before the publication: sleep until it, an hour at a time
+    assert hub.next_poll_delay(True) == hub.MAX_SLEEP
+    hub.api.clock.set(datetime(2025, 3, 3, PUBLISH_HOUR - 1, 30))
+    assert hub.next_poll_delay(True) == 1800
+    delays = [hub.next_poll_delay(False) for _ in range(10)]
+    assert MIN_BACKOFF * 0.8 <= delays[0] <= MIN_BACKOFF * 1.2
+    assert max(delays) <= MAX_BACKOFF * 1.2
+    assert hub.failures == 10
+
+
+def test_serves_prices_and_publishes_tomorrow(hub):
+    assert hub.poll_once()
+    assert hub.version == 1
+
+    client = ElprisAPI(base_url=hub_base_url(hub.url), cache=PriceCache(':memory:'),
+                       clock=hub.api.clock)
+    assert len(client.fetch_prices(MORNING, 3)) == 24
+    assert client.fetch_prices_tomorrow(3) is None
+    client.close()
+
+    hub.api.clock.set(AFTERNOON)
+    assert hub.poll_once()
+    updates = requests.get(f"{hub.url}/api/v1/updates", params={'since': 1, 'timeout': 0}).json()
+    assert updates['version'] == 2
+    assert [update['date'] for update in updates['updates']] == ['2025-03-04']
+
+
+def test_clients_never_reach_the_upstream_for_unpublished_days(hub):
+    hub.poll_once()
+    upstream = hub.api.request_stats()['requests']
+    hub.api.clock.set(AFTERNOON)
+    clients = [ElprisAPI(base_url=hub_base_url(hub.url), cache=PriceCache(':memory:'),
+                         clock=hub.api.clock) for _ in range(4)]
+    for _ in range(5):
+        for client in clients:
+            assert client.fetch_prices_tomorrow(3) is None
+    assert hub.api.request_stats()['requests'] == upstream
+
+    # Once the hub's poller has stored the day, it is served
+    hub.poll_once()
+    assert hub.api.request_stats()['requests'] == upstream + 1
+    assert len(clients[0].fetch_prices_tomorrow(3)) == 24
+    for client in clients:
+        client.close()
+
+
+@pytest.mark.parametrize('query', ['since=abc', 'since=1&timeout=x', 'since=1&timeout=-1'])
+def test_malformed_update_queries_are_rejected(hub, query):
+    response = requests.get(f"{hub.url}/api/v1/updates?{query}")
+    assert response.status_code == 400
+    assert 'error' in response.json()
+
+
+def test_scheduler_leaves_missing_data_to_the_hub():
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    from PyQt6.QtCore import QCoreApplication
+    from components.refresh_scheduler import RefreshScheduler
+
+    app = QCoreApplication.instance() or QCoreApplication([])
+    clock = SimulatedClock(AFTERNOON)
+    polling = RefreshScheduler(clock=clock)
+    pushed = RefreshScheduler(clock=clock, poll_missing=False)
+    for scheduler in (polling, pushed):
+        scheduler.data_updated(has_today=True, has_tomorrow=False)
+    assert polling.poll_at is not None
+    assert pushed.poll_at is None and not pushed.poll_timer.isActive()
+    polling.stop()
+
+
+def test_listener_receives_push_and_stops_promptly(hub):
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    from PyQt6.QtCore import QCoreApplication
+    from components.hub_listener import HubListener
+
+    app = QCoreApplication.instance() or QCoreApplication([])
+    hub.poll_once()
+    listener = HubListener(hub.url)
+    received = []
+    listener.updated.connect(received.append)
+    listener.start()
+    # Let the listener learn the current version before there is news
+    time.sleep(0.5)
+
+    hub.api.clock.set(AFTERNOON)
+    hub.poll_once()
+    deadline = time.monotonic() + 10
+    while not received and time.monotonic() < deadline:
+        app.processEvents()
+        time.sleep(0.01)
+    assert received == [2]
+
+    # stop() returns at once while a long-poll is pending, and the thread is a daemon
+    started = time.monotonic()
+    listener.stop()
+    assert time.monotonic() - started < 0.5
+    assert listener._thread.daemon
@@ -0,0 +1,47 @@
+import json
+from utils.metrics import Metrics
+
+
+def make_metrics():
+    metrics = Metrics()
+    metrics.enable()
+    return metrics
+
+
+def test_jsonl_appends_new_spans_and_counters(tmp_path):
+    metrics = make_metrics()
+    path = str(tmp_path / 'metrics.jsonl')
+    metrics.observe('fetch', 12.5)
+    metrics.increment('requests')
+    metrics.write_jsonl(path)
+    metrics.observe('draw', 3.0)
+    metrics.write_jsonl(path)
+
+    lines = [json.loads(line) for line in open(path)]
+    assert [(line['type'], line.get('name')) for line in lines] == [
+        ('span', 'fetch'), ('counters', None), ('span', 'draw'), ('counters', None)]
+    assert lines[-1]['requests'] == 1
+
+
+def test_jsonl_is_rotated_at_the_size_cap(tmp_path):
+    metrics = make_metrics()
+    metrics.JSONL_MAX_BYTES = 1000
+    path = tmp_path / 'metrics.jsonl'
+    for _ in range(200):
+        metrics.increment('requests')
+        metrics.write_jsonl(str(path))
+
+    assert path.stat().st_size < 2 * metrics.JSONL_MAX_BYTES
+    assert (tmp_path / 'metrics.jsonl.1').stat().st_size >= metrics.JSONL_MAX_BYTES
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['metrics.jsonl', 'metrics.jsonl.1']
+    assert json.loads(path.read_text().splitlines()[-1])['requests'] == 200
+
+
+def test_prometheus_export(tmp_path):
+    metrics = make_metrics()
+    metrics.observe('fetch', 7)
+    metrics.increment('bytes', 100)
+    text = metrics.to_prometheus()
+    assert 'elpriser_bytes_total 100' in text
+    assert 'elpriser_span_duration_seconds_bucket{span="fetch",le="0.01"} 1' in text
+    assert 'elpriser_span_duration_seconds_count{span="fetch"} 1' in text
@@ -0,0 +1,59 @@
+from datetime import datetime
+import numpy as np
+import pytest
+from benchmarks.fake_prices import make_day
+from utils.optimizer import cheapest_intervals, cheapest_window, cheapest_windows
+from utils.price_series import PriceSeries
+
+
+def brute_force(row, length):
+    sums = [row[i:i + length].sum() for i in range(len(row) - length + 1)]
+    return int(np.argmin(sums)), min(sums) / length
+
+
+def test_windows_match_brute_force():
+    rng = np.random.default_rng(1)
+    prices = rng.normal(1.0, 0.5, size=(4, 96))
+    lengths = [1, 4, 12, 96]
+    starts, means = cheapest_windows(prices, lengths)
+    assert starts.shape == means.shape == (4, 4)
+    for i, length in enumerate(lengths):
+        for region in range(4):
+            start, mean = brute_force(prices[region], length)
+            assert starts[i, region] == start
+            assert means[i, region] == pytest.approx(mean)
+
+
+def test_window_longer_than_series():
+    starts, means = cheapest_windows([1.0, 2.0, 3.0], [2, 4])
+    assert starts[:, 0].tolist() == [0, -1]
+    assert means[0, 0] == 1.5 and np.isnan(means[1, 0])
+
+
+def test_cheapest_intervals_in_time_order():
+    prices = np.array([[5, 1, 4, 0, 3, 2], [0, 1, 2, 3, 4, 5]], dtype=float)
+    assert cheapest_intervals(prices, 3).tolist() == [[1, 3, 5], [0, 1, 2]]
+    assert cheapest_intervals(prices[0], 10).tolist() == [[0, 1, 2, 3, 4, 5]]
+    assert cheapest_intervals(prices, 0).shape == (2, 0)
+
+
+@pytest.mark.parametrize('points', [24, 96])
+def test_cheapest_window_in_series(points):
+    day = datetime(2025, 10, 1)
+    series = PriceSeries.from_json(make_day(day, points=points))
+    window = cheapest_window(series, 3)
+    length = points // 8
+    start, mean = brute_force(series.prices, length)
+    assert window['index'] == start
+    assert window['mean'] == pytest.approx(mean)
+    assert window['end'] - window['start'] == 3 * 3600
+
+
+def test_cheapest_window_after():
+    series = PriceSeries.from_json(make_day(datetime(2025, 3, 3)))
+    evening = datetime(2025, 3, 3, 20, 30)
+    window = cheapest_window(series, 2, after=evening)
+    assert window['index'] >= 20
+    # Only blocks that still fit in the series
+    assert cheapest_window(series, 5, after=evening) is None
+    assert cheapest_window(series, 1, after=datetime(2025, 3, 4, 0, 0)) is None
@@ -0,0 +1,75 @@
+import os
+from datetime import datetime, timedelta
+import pytest
+from benchmarks.fake_prices import make_day
+from benchmarks.stub_server import StubServer
+from utils.api import ElprisAPI
+from utils.cache import PriceCache
+from utils.clock import SimulatedClock
+from utils.price_series import PriceSeries
+
+NOW = datetime(2025, 3, 3, 9, 0)
+
+
+@pytest.fixture
+def make_widget():
+    """Compact widgets on a memory cache that holds the current days of region 3"""
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    from PyQt6.QtWidgets import QApplication
+    from components.price_display import ElprisWidget
+
+    app = QApplication.instance() or QApplication([])
+    widgets = []
+    with StubServer(clock=SimulatedClock(NOW)) as stub:
+        def make(graph_backend='matplotlib'):
+            clock = SimulatedClock(NOW)
+            cache = PriceCache(':memory:')
+            for offset in (-1, 0, 1):
+                day = NOW + timedelta(days=offset)
+                cache.put(day, 3, make_day(day))
+            api = ElprisAPI(base_url=stub.base_url, cache=cache, clock=clock)
+            widget = ElprisWidget(api=api, prefetch_all_regions=False,
+                                  graph_backend=graph_backend)
+            widget.scheduler.stop()
+            widgets.append(widget)
+            return widget
+        yield make
+        for widget in widgets:
+            widget.fetcher.pool.waitForDone()
+            widget.close()
+
+
+def refreshed(widget):
+    """Deliver the same days again, as a poll that found nothing new would"""
+    widget.prerender_timer.stop()
+    widget.on_prices_ready(3, {day: PriceSeries.from_json(make_day(NOW + timedelta(days=offset)))
+                               for day, offset in (('yesterday', -1), ('today', 0),
+                                                   ('tomorrow', 1))})
+
+
+def test_compact_widget_leaves_the_matplotlib_graph_unloaded(make_widget):
+    widget = make_widget()
+    widget.load_cached_prices()
+    assert widget.prices_today is not None
+    assert widget.price_graph is None
+    assert not widget.prerender_timer.isActive()
+
+
+def test_painter_graph_is_prerendered_on_data_changes_only(make_widget):
+    widget = make_widget('painter')
+    widget.load_cached_prices()
+    assert widget.prerender_timer.isActive()
+    widget.prerender_timer.stop()
+    widget.prerender_graph()
+    pixmap = widget.graph_pixmap
+    assert pixmap is not None
+
+    widget.update_content(data_changed=False)
+    refreshed(widget)
+    assert widget.graph_pixmap is pixmap
+    assert not widget.prerender_timer.isActive()
+
+    widget.api.cache.put(NOW, 3, make_day(NOW + timedelta(days=7)))
+    widget.load_cached_prices()
+    assert widget.graph_pixmap is None
+    assert widget.prerender_timer.isActive()
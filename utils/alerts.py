@@ -0,0 +1,369 @@
+"""Price alerts evaluated when prices change, not by polling
+
+Rules are written as short text and compiled once:
+
+    SE3 below 0.20                     current price drops below 0.20 kr/kWh
+    SE3 above 2.5                      current price rises above 2.50 kr/kWh
+    SE3 tomorrow above today by 30%    tomorrow's average is 30 % over today's
+    SE3 tomorrow below today by 20%    tomorrow's average is 20 % under today's
+    SE3 cheapest 3h in 15 min          the cheapest 3 hour block starts in 15 min
+
+The engine is driven by two events: a new price interval starting
+(on_interval) and new prices for a region (on_prices). Rules are kept in
+per-region lists sorted by their level, so an event only bisects to the
+rules it affects:
+
+    threshold  Edge-triggered. When the price moves from p0 to p, the rules
+               whose level lies between the two are the ones that became
+               true; everything outside that range is never looked at.
+    tomorrow   Checked once per published day; the rules whose percentage is
+               exceeded form a prefix of the sorted list.
+    cheapest   Rules with the same region and block length share one window,
+               found when new prices arrive. As its start approaches, rules
+               fire from the longest lead time down, so each group only keeps
+               a position in its sorted list. next_due() tells the caller
+               when to wake up next.
+"""
+import re
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from itertools import count
+
+from utils.clock import system_clock
+from utils.optimizer import cheapest_window
+from utils.price_series import PriceSeries
+
+_RULE_PATTERNS = (
+    ('threshold', re.compile(
+        r'^SE(?P<region>[1-4])\s+(?P<direction>below|above)\s+(?P<level>-?\d+(?:[.,]\d+)?)$')),
+    ('tomorrow', re.compile(
+        r'^SE(?P<region>[1-4])\s+tomorrow\s+(?P<direction>below|above)\s+today\s+by\s+'
+        r'(?P<percent>\d+(?:[.,]\d+)?)\s*%$')),
+    ('cheapest', re.compile(
+        r'^SE(?P<region>[1-4])\s+cheapest\s+(?P<hours>\d+(?:[.,]\d+)?)\s*h\s+in\s+'
+        r'(?P<minutes>\d+)\s*min$')),
+)
+
+
+class Rule:
+    """One compiled alert rule"""
+
+    _ids = count(1)
+
+    def __init__(self, kind, region, direction=None, value=None, hours=None, text=None,
+                 callback=None, owner=None):
+        """
+        Args:
+            kind (str): 'threshold', 'tomorrow' or 'cheapest'
+            region (int): Price region (1-4)
+            direction (str, optional): 'below' or 'above'
+            value (float): Price level in SEK/kWh, percentage, or lead time in minutes
+            hours (float, optional): Block length of a cheapest rule
+            text (str, optional): Source text of the rule
+            callback (callable, optional): Called with each Alert of this rule
+            owner (optional): Whoever the rule belongs to, passed through untouched
+        """
+        self.id = next(self._ids)
+        self.kind = kind
+        self.region = region
+        self.direction = direction
+        self.value = value
+        self.hours = hours
+        self.text = text
+        self.callback = callback
+        self.owner = owner
+
+    @classmethod
+    def parse(cls, text, callback=None, owner=None):
+        """Compile a rule from text; raises ValueError if it is not understood"""
+        normalized = ' '.join(text.split())
+        for kind, pattern in _RULE_PATTERNS:
+            match = pattern.match(normalized)
+            if match is None:
+                continue
+            fields = {name: value.replace(',', '.') for name, value in match.groupdict().items()}
+            region = int(fields['region'])
+            if kind == 'threshold':
+                return cls(kind, region, fields['direction'], float(fields['level']),
+                           text=normalized, callback=callback, owner=owner)
+            if kind == 'tomorrow':
+                return cls(kind, region, fields['direction'], float(fields['percent']),
+                           text=normalized, callback=callback, owner=owner)
+            return cls(kind, region, value=float(fields['minutes']), hours=float(fields['hours']),
+                       text=normalized, callback=callback, owner=owner)
+        raise ValueError(f"Unknown alert rule: {text!r}")
+
+    def __repr__(self):
+        return f"Rule({self.text!r})"
+
+
+class Alert:
+    """A rule that fired"""
+
+    def __init__(self, rule, time, message):
+        self.rule = rule
+        self.time = time
+        self.message = message
+
+    def __repr__(self):
+        return f"Alert({self.rule.text!r}, {self.message!r})"
+
+
+class _SortedRules:
+    """Rules sorted by a key, with bisect lookups of key ranges"""
+
+    def __init__(self):
+        self.keys = []
+        self.rules = []
+
+    def __len__(self):
+        return len(self.keys)
+
+    def add(self, key, rule):
+        """Insert a rule; keys are (value, rule id) so they are unique. Returns the position"""
+        index = bisect_right(self.keys, key)
+        self.keys.insert(index, key)
+        self.rules.insert(index, rule)
+        return index
+
+    def remove(self, key):
+        """Remove the rule with a key. Returns its former position"""
+        index = bisect_left(self.keys, key)
+        del self.keys[index]
+        del self.rules[index]
+        return index
+
+    def between(self, low, high, low_inclusive, high_inclusive):
+        """Rules with low < key < high, with either end optionally inclusive"""
+        start = (bisect_left if low_inclusive else bisect_right)(self.keys, low)
+        stop = (bisect_right if high_inclusive else bisect_left)(self.keys, high)
+        return self.rules[start:stop]
+
+
+class _CheapestGroup:
+    """Rules sharing a region and block length, and the window they watch"""
+
+    def __init__(self, hours):
+        self.hours = hours
+        self.leads = _SortedRules()
+        self.window = None
+        # Rules from this position on have fired for the current window
+        self.fired_from = 0
+
+
+class AlertEngine:
+    """Compiled alert rules indexed by region and level"""
+
+    def __init__(self, callback=None, clock=None):
+        """
+        Args:
+            callback (callable, optional): Called with every Alert, in addition
+                to the callback of the rule that fired
+            clock (Clock, optional): Time used when an event gives none.
+                Defaults to the system clock
+        """
+        self.callback = callback
+        self.clock = clock or system_clock
+        self._threshold = {}   # (region, direction) -> _SortedRules by level
+        self._tomorrow = {}    # (region, direction) -> _SortedRules by percent
+        self._cheapest = {}    # (region, hours) -> _CheapestGroup
+        self._prices = {}      # region -> price at the last evaluated interval
+        self._published = {}   # region -> start of the last evaluated tomorrow
+        self._series = {}      # region -> today and tomorrow joined
+
+    def __len__(self):
+        return (sum(len(rules) for rules in self._threshold.values())
+                + sum(len(rules) for rules in self._tomorrow.values())
+                + sum(len(group.leads) for group in self._cheapest.values()))
+
+    def add(self, rule, callback=None, owner=None):
+        """
+        Add a rule
+
+        Args:
+            rule (Rule or str): Compiled rule or rule text
+            callback (callable, optional): Called with each Alert of a rule given as text
+            owner (optional): Owner of a rule given as text
+
+        Returns:
+            Rule: The compiled rule, for remove()
+        """
+        if isinstance(rule, str):
+            rule = Rule.parse(rule, callback, owner)
+        if rule.kind == 'threshold':
+            self._threshold.setdefault((rule.region, rule.direction), _SortedRules()).add(
+                (rule.value, rule.id), rule)
+        elif rule.kind == 'tomorrow':
+            self._tomorrow.setdefault((rule.region, rule.direction), _SortedRules()).add(
+                (rule.value, rule.id), rule)
+        else:
+            now = self.clock.timestamp()
+            group = self._cheapest.get((rule.region, rule.hours))
+            if group is None:
+                group = self._cheapest[(rule.region, rule.hours)] = _CheapestGroup(rule.hours)
+                series = self._series.get(rule.region)
+                if series is not None:
+                    self._set_window(group, series, now)
+            index = group.leads.add((rule.value, rule.id), rule)
+            # Keep the fired rules fired. A rule whose lead time has already
+            # passed for the current window waits for the next one; past
+            # every fired rule, only the lead time itself tells.
+            if (group.window is None or index < group.fired_from
+                    or (index == group.fired_from and group.window['start'] - now > rule.value * 60)):
+                group.fired_from += 1
+        return rule
+
+    def remove(self, rule):
+        key = (rule.value, rule.id)
+        if rule.kind == 'threshold':
+            self._threshold[(rule.region, rule.direction)].remove(key)
+        elif rule.kind == 'tomorrow':
+            self._tomorrow[(rule.region, rule.direction)].remove(key)
+        else:
+            group = self._cheapest[(rule.region, rule.hours)]
+            index = group.leads.remove(key)
+            if index < group.fired_from:
+                group.fired_from -= 1
+
+    def on_prices(self, region, today, tomorrow=None, now=None):
+        """
+        New prices for a region: check tomorrow rules and move cheapest windows
+
+        Args:
+            region (int): Price region (1-4)
+            today (PriceSeries): Today's prices
+            tomorrow (PriceSeries, optional): Tomorrow's prices if published
+            now (float, optional): Unix time, defaults to the engine's clock
+
+        Returns:
+            list: Alerts fired
+        """
+        now = self.clock.timestamp() if now is None else now
+        fired = []
+        if not today:
+            return fired
+        previous = self._series.get(region)
+        series = self._series[region] = PriceSeries.concat([today, tomorrow])
+        # Refreshes that bring no new prices keep the windows being watched
+        changed = (previous is None or len(previous) != len(series)
+                   or previous.starts[0] != series.starts[0])
+
+        if tomorrow and self._published.get(region) != int(tomorrow.starts[0]) and today.mean:
+            self._published[region] = int(tomorrow.starts[0])
+            change = (tomorrow.mean - today.mean) / abs(today.mean) * 100
+            above = self._tomorrow.get((region, 'above'))
+            if above and change > 0:
+                for rule in above.between((float('-inf'),), (change, float('inf')), True, True):
+                    fired.append(Alert(rule, now, f"SE{region}: morgondagens snitt "
+                                                  f"{tomorrow.mean:.2f} kr är {change:.0f} % "
+                                                  f"över dagens"))
+            below = self._tomorrow.get((region, 'below'))
+            if below and change < 0:
+                for rule in below.between((float('-inf'),), (-change, float('inf')), True, True):
+                    fired.append(Alert(rule, now, f"SE{region}: morgondagens snitt "
+                                                  f"{tomorrow.mean:.2f} kr är {-change:.0f} % "
+                                                  f"under dagens"))
+
+        if changed:
+            for (group_region, _), group in self._cheapest.items():
+                if group_region == region:
+                    self._set_window(group, series, now)
+        self._dispatch(fired)
+        return fired + self.on_interval(region, now)
+
+    def on_interval(self, region, now=None):
+        """
+        A price interval started: check threshold and cheapest window rules
+
+        Args:
+            region (int): Price region (1-4)
+            now (float, optional): Unix time, defaults to the engine's clock
+
+        Returns:
+            list: Alerts fired
+        """
+        now = self.clock.timestamp() if now is None else now
+        series = self._series.get(region)
+        if series is None:
+            return []
+        fired = []
+
+        price = series.price_at(now)
+        if price is not None:
+            previous = self._prices.get(region)
+            self._prices[region] = price
+            # Became true: below rules with price < level <= previous, above
+            # rules with previous <= level < price. The first price checks all.
+            below = self._threshold.get((region, 'below'))
+            if below and (previous is None or price < previous):
+                high = (float('inf'),) if previous is None else (previous, float('inf'))
+                for rule in below.between((price, float('inf')), high, False, True):
+                    fired.append(Alert(rule, now, f"SE{region}: priset {price:.2f} kr/kWh "
+                                                  f"är under {rule.value:.2f} kr"))
+            above = self._threshold.get((region, 'above'))
+            if above and (previous is None or price > previous):
+                low = (float('-inf'),) if previous is None else (previous, float('-inf'))
+                for rule in above.between(low, (price, float('-inf')), True, False):
+                    fired.append(Alert(rule, now, f"SE{region}: priset {price:.2f} kr/kWh "
+                                                  f"är över {rule.value:.2f} kr"))
+
+        for (group_region, _), group in self._cheapest.items():
+            if group_region == region:
+                fired.extend(self._due_window_alerts(region, group, now))
+        self._dispatch(fired)
+        return fired
+
+    def on_due(self, now=None):
+        """Fire the cheapest window rules that are due; call at next_due()"""
+        now = self.clock.timestamp() if now is None else now
+        fired = []
+        for (region, _), group in self._cheapest.items():
+            fired.extend(self._due_window_alerts(region, group, now))
+        self._dispatch(fired)
+        return fired
+
+    def next_due(self):
+        """Unix time when the next cheapest window rule fires, or None"""
+        due = None
+        for group in self._cheapest.values():
+            if group.window is None or group.fired_from == 0:
+                continue
+            lead = group.leads.keys[group.fired_from - 1][0]
+            time = group.window['start'] - lead * 60
+            due = time if due is None else min(due, time)
+        return due
+
+    def _set_window(self, group, series, now):
+        """Cheapest block starting after the current interval"""
+        index = series.index_at(now)
+        after = series.ends[index] if index is not None else now
+        window = cheapest_window(series, group.hours, after=datetime.fromtimestamp(after))
+        previous = group.window
+        if window is None or previous is None or window['start'] != previous['start']:
+            group.fired_from = len(group.leads)
+        group.window = window
+
+    def _due_window_alerts(self, region, group, now):
+        window = group.window
+        if window is None or group.fired_from == 0:
+            return []
+        remaining = window['start'] - now
+        if remaining < 0:
+            return []
+        # Every rule whose lead time has been reached, longest leads first
+        first = bisect_left(group.leads.keys, (remaining / 60,))
+        if first >= group.fired_from:
+            return []
+        rules = group.leads.rules[first:group.fired_from]
+        group.fired_from = first
+        start = datetime.fromtimestamp(window['start'])
+        message = (f"SE{region}: billigaste {group.hours:g} h börjar kl {start:%H:%M} "
+                   f"(om {remaining / 60:.0f} min), {window['mean']:.2f} kr snitt")
+        return [Alert(rule, now, message) for rule in reversed(rules)]
+
+    def _dispatch(self, alerts):
+        for alert in alerts:
+            if alert.rule.callback is not None:
+                alert.rule.callback(alert)
+            if self.callback is not None:
+                self.callback(alert)
@@ -1,61 +1,417 @@
+import random
+import threading
+import time
 import requests
-from datetime import datetime, timedelta
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import date as date_type, datetime, timedelta
+from requests.adapters import HTTPAdapter
+from .cache import PriceCache
+from .circuit_breaker import CircuitBreaker, CircuitOpenError
+from .clock import system_clock
+from .metrics import metrics
+from .rate_limit import HostRateLimiter
+from .schedule import PUBLISH_HOUR
 
 class ElprisAPI:
     """API client for fetching electricity prices from elprisetjustnu.se"""
-    
+
     BASE_URL = "https://www.elprisetjustnu.se/api/v1/prices/{year}/{date}_SE{region}.json"
-    
-    @staticmethod
-    def fetch_prices(date=None, region=3):
+
+    # Swedish bidding zones SE1-SE4
+    REGIONS = (1, 2, 3, 4)
+
+    # (connect, read) timeout in seconds
+    TIMEOUT = (3.05, 10)
+
+    # Number of per-request records kept for request_stats()
+    REQUEST_LOG_SIZE = 500
+
+    # Time budget of one fetch_prices call including retries, in seconds
+    DEADLINE = 10.0
+
+    # Retries of transient failures (connection errors, timeouts, 5xx, 429)
+    RETRIES = 2
+    RETRY_BACKOFF = 0.5
+    RETRY_MAX_BACKOFF = 4.0
+
+    # Threads available for hedged requests
+    HEDGE_WORKERS = 8
+
+    def __init__(self, base_url=None, cache=None, timeout=None, session=None, rate_limit=None,
+                 archive=None, deadline=None, retries=None, hedge_after=None, breaker=None,
+                 clock=None):
+        """
+        Args:
+            base_url (str, optional): URL template with {year}, {date} and {region}.
+                Defaults to the public elprisetjustnu.se API
+            cache (PriceCache, optional): Price cache. Defaults to the on-disk cache
+            timeout (tuple, optional): (connect, read) timeout in seconds
+            session (requests.Session, optional): Session to reuse for all requests
+            rate_limit (float, optional): Maximum requests per second per host
+            archive (PriceArchive, optional): Archive that every downloaded day
+                is appended to
+            deadline (float, optional): Seconds one fetch_prices call may take
+                including retries
+            retries (int, optional): Retries of transient failures
+            hedge_after (float, optional): Send a second, identical request when
+                the first has not answered after this many seconds and use
+                whichever answers first. Disabled by default
+            breaker (CircuitBreaker, optional): Circuit breaker shared by all
+                requests. Defaults to one opening after 5 consecutive failures
+            clock (Clock, optional): Decides which day is today and whether
+                tomorrow's prices are published. Defaults to the system clock
+        """
+        self.base_url = base_url or self.BASE_URL
+        self.clock = clock or system_clock
+        self.cache = cache if cache is not None else PriceCache(clock=self.clock)
+        self.timeout = timeout or self.TIMEOUT
+        self.rate_limiter = HostRateLimiter(rate_limit) if rate_limit else None
+        self.archive = archive
+        self.deadline = deadline or self.DEADLINE
+        self.retries = self.RETRIES if retries is None else retries
+        self.hedge_after = hedge_after
+        self.breaker = breaker or CircuitBreaker()
+        self._hedge_pool = None
+        self._hedge_lock = threading.Lock()
+
+        # One keep-alive session shared by all fetch workers. A caller's session
+        # keeps its own adapters, with their retries and pool sizes
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+        self.session = session
+        self.session.headers.update({
+            'Accept': 'application/json',
+            'Accept-Encoding': 'gzip, deflate',
+        })
+
+        self._log_lock = threading.Lock()
+        self.request_log = deque(maxlen=self.REQUEST_LOG_SIZE)
+        # Running totals, unlike request_log they are never truncated
+        self.total_requests = 0
+        self.total_bytes = 0
+        # fetch_prices calls that failed because the upstream was unavailable
+        self.total_failures = 0
+
+    def url_for(self, date, region):
+        return self.base_url.format(
+            year=date.year,
+            date=date.strftime("%m-%d"),
+            region=region
+        )
+
+    def fetch_prices(self, date=None, region=3, revalidate=False, deadline=None):
         """
         Fetch electricity prices for a specific date and region
-        
+
+        Transient failures are retried until the deadline. When the upstream
+        cannot be reached, the cached day is returned if there is one.
+
         Args:
             date (datetime, optional): Date to fetch prices for. Defaults to today
             region (int, optional): Price region (1-4). Defaults to 3 (Stockholm)
+            revalidate (bool, optional): Confirm a cached day with a conditional
+                request instead of serving it straight from the cache
+            deadline (float, optional): Seconds this call may take. Defaults to
+                the client's deadline
         """
         if date is None:
-          date = datetime.now()
-        
-     # Check if date is more than one day in the future
-        today = datetime.now()
+          date = self.clock.now()
+
+        # Check if date is more than one day in the future
+        today = self.clock.now()
         tomorrow = today + timedelta(days=1)
         if date.date() > tomorrow.date():
             return None
-        
+
+        # Published days never change, only missing days go to the network
+        entry = self.cache.get_entry(date, region)
+        if entry is not None and not revalidate:
+            metrics.increment('cache_hits')
+            return entry['prices']
+        metrics.increment('cache_misses')
+
+        headers = {}
+        if entry is not None:
+            if entry['etag']:
+                headers['If-None-Match'] = entry['etag']
+            if entry['last_modified']:
+                headers['If-Modified-Since'] = entry['last_modified']
+
+        url = self.url_for(date, region)
         try:
-            response = requests.get(ElprisAPI.BASE_URL.format(
-                year=date.year,
-                date=date.strftime("%m-%d"),
-                region=region
-            ))
+            response = self._get(url, headers, deadline or self.deadline)
+
+            # 304 confirms the cached copy without transferring the body again
+            if response.status_code == 304 and entry is not None:
+                metrics.increment('not_modified')
+                self.cache.touch(date, region)
+                return entry['prices']
+
             response.raise_for_status()
-            return response.json()
+            with metrics.span('json_decode'):
+                prices = response.json()
+            self.cache.put(
+                date, region, prices,
+                etag=response.headers.get('ETag'),
+                last_modified=response.headers.get('Last-Modified')
+            )
+            if self.archive is not None:
+                self.archive.append_day(date, region, prices)
+            return prices
         except Exception as e:
+            metrics.increment('errors')
+            if self.is_unavailable(e):
+                with self._log_lock:
+                    self.total_failures += 1
             print(f"Error fetching prices: {e}")
-            return None     
-    
-    @staticmethod
-    def fetch_prices_tomorrow(region=3):
+            # A failed revalidation still leaves us with the cached day
+            return entry['prices'] if entry is not None else None
+
+    def fetch_prices_tomorrow(self, region=3, revalidate=False):
         """
         Fetch electricity prices for tomorrow if available
         Note: Tomorrow's prices are typically published around 13:00
-        
+
         Args:
             region (int): Price region (1-4)
+            revalidate (bool, optional): Confirm a cached day with a conditional request
         """
-        tomorrow = datetime.now() + timedelta(days=1)
-        
-        # Only try to fetch tomorrow's prices after 13:00
-        if datetime.now().hour >= 13:
-            return ElprisAPI.fetch_prices(tomorrow, region)
+        now = self.clock.now()
+        tomorrow = now + timedelta(days=1)
+
+        # Only try to fetch tomorrow's prices after they are published
+        if now.hour >= PUBLISH_HOUR:
+            return self.fetch_prices(tomorrow, region, revalidate=revalidate)
         return None
-    
-    @staticmethod
-    def fetch_yesterday_prices(region=3):
+
+    def fetch_yesterday_prices(self, region=3):
         """
         Fetch electricity prices for yesterday
         """
-        yesterday = datetime.now() - timedelta(days=1)
-        return ElprisAPI.fetch_prices(yesterday, region)
\ No newline at end of file
+        yesterday = self.clock.now() - timedelta(days=1)
+        return self.fetch_prices(yesterday, region)
+
+    def fetch_range(self, start, end, regions=REGIONS, max_in_flight=8, on_day=None,
+                    progress=None, progress_interval=2.0):
+        """
+        Download every day in a date range for several regions concurrently
+
+        Days already in the cache are skipped (and copied into the archive if
+        it lacks them), and every downloaded day is
+        written to the cache as soon as it arrives, so an interrupted run
+        resumes where it stopped. Nothing is kept in memory after it has been
+        stored.
+
+        Args:
+            start (date or datetime): First day to fetch
+            end (date or datetime): Last day to fetch, inclusive
+            regions (iterable, optional): Price regions. Defaults to SE1-SE4
+            max_in_flight (int, optional): Maximum number of concurrent requests
+            on_day (callable, optional): Called as on_day(date, region, prices)
+                for every downloaded day. Calls are serialized
+            progress (callable, optional): Called with the counters dict while
+                running and once at the end
+            progress_interval (float, optional): Seconds between progress calls
+
+        Returns:
+            dict: Counters for total, fetched, skipped and failed days, bytes,
+                elapsed seconds and throughput
+        """
+        if isinstance(start, date_type) and not isinstance(start, datetime):
+            start = datetime.combine(start, datetime.min.time())
+        if isinstance(end, date_type) and not isinstance(end, datetime):
+            end = datetime.combine(end, datetime.min.time())
+        regions = list(regions)
+        days = (end.date() - start.date()).days + 1
+
+        stats = {
+            'total': max(days, 0) * len(regions),
+            'fetched': 0,
+            'skipped': 0,
+            'failed': 0,
+            'bytes': 0,
+            'elapsed': 0.0,
+            'days_per_second': 0.0,
+        }
+        lock = threading.Lock()
+        sink_lock = threading.Lock()
+        slots = threading.BoundedSemaphore(max_in_flight)
+        bytes_before = self.total_bytes
+        started = time.perf_counter()
+        last_report = started
+
+        def update_rates():
+            stats['elapsed'] = time.perf_counter() - started
+            stats['bytes'] = self.total_bytes - bytes_before
+            if stats['elapsed'] > 0:
+                stats['days_per_second'] = stats['fetched'] / stats['elapsed']
+
+        def work(date, region):
+            try:
+                prices = self.fetch_prices(date, region)
+                with lock:
+                    stats['fetched' if prices else 'failed'] += 1
+                if prices and on_day is not None:
+                    with sink_lock:
+                        on_day(date, region, prices)
+            finally:
+                slots.release()
+
+        with ThreadPoolExecutor(max_workers=max_in_flight) as executor:
+            for offset in range(days):
+                date = start + timedelta(days=offset)
+                for region in regions:
+                    if self.cache.contains(date, region):
+                        if self.archive is not None and not self.archive.has_day(region, date):
+                            self.archive.append_day(date, region, self.cache.get(date, region))
+                        stats['skipped'] += 1
+                        continue
+
+                    # Bound the number of queued days, not just running ones
+                    slots.acquire()
+                    executor.submit(work, date, region)
+
+                    if progress is not None and time.perf_counter() - last_report >= progress_interval:
+                        last_report = time.perf_counter()
+                        with lock:
+                            update_rates()
+                            progress(dict(stats))
+
+        update_rates()
+        if progress is not None:
+            progress(dict(stats))
+        return stats
+
+    @staticmethod
+    def is_unavailable(error):
+        """Whether an error means the upstream could not serve us, unlike e.g. a 404
+        for a day that has not been published yet"""
+        if isinstance(error, (requests.ConnectionError, requests.Timeout, CircuitOpenError)):
+            return True
+        response = getattr(error, 'response', None)
+        return response is not None and (response.status_code >= 500 or response.status_code == 429)
+
+    def _get(self, url, headers, deadline):
+        """
+        GET within a deadline, retrying transient failures
+
+        Retries wait with exponential backoff and full jitter, and honour a
+        Retry-After header. The circuit breaker turns a failing upstream into
+        an immediate CircuitOpenError.
+        """
+        expires = time.monotonic() + deadline
+        attempt = 0
+        while True:
+            self.breaker.check()
+            delay = None
+            try:
+                response = self._attempt(url, headers, expires)
+                if response.status_code >= 500 or response.status_code == 429:
+                    retry_after = response.headers.get('Retry-After', '')
+                    if retry_after.isdigit():
+                        delay = float(retry_after)
+                    raise requests.HTTPError(
+                        f"{response.status_code} Server Error for url: {url}", response=response
+                    )
+                self.breaker.record_success()
+                return response
+            except (requests.ConnectionError, requests.Timeout, requests.HTTPError):
+                self.breaker.record_failure()
+                attempt += 1
+                if delay is None:
+                    delay = random.uniform(
+                        0, min(self.RETRY_MAX_BACKOFF, self.RETRY_BACKOFF * 2 ** (attempt - 1))
+                    )
+                if attempt > self.retries or time.monotonic() + delay >= expires:
+                    raise
+            except Exception:
+                # Not worth a retry, but the breaker must still hear about it:
+                # a half-open trial that never reports would keep it open for good
+                self.breaker.record_failure()
+                raise
+            metrics.increment('retries')
+            time.sleep(delay)
+
+    def _attempt(self, url, headers, expires):
+        """One request, plus a hedged duplicate if it is slow and hedging is enabled"""
+        remaining = expires - time.monotonic()
+        if remaining <= 0:
+            raise requests.Timeout(f"Deadline exceeded for url: {url}")
+        if self.hedge_after is None or remaining <= self.hedge_after:
+            return self._send(url, headers, remaining)
+
+        pool = self._hedge_executor()
+        first = pool.submit(self._send, url, headers, remaining)
+        done, _ = wait([first], timeout=self.hedge_after)
+        if done:
+            return first.result()
+
+        metrics.increment('hedged_requests')
+        pending = {first, pool.submit(self._send, url, headers, expires - time.monotonic())}
+        error = None
+        while pending:
+            done, pending = wait(pending, timeout=max(0, expires - time.monotonic()),
+                                 return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            for future in done:
+                if future.exception() is None:
+                    # The slower request finishes in the background and is dropped
+                    return future.result()
+                error = future.exception()
+        raise error or requests.Timeout(f"Deadline exceeded for url: {url}")
+
+    def _send(self, url, headers, remaining):
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire(url)
+        timeout = tuple(min(limit, remaining) for limit in self.timeout)
+        start = time.perf_counter()
+        with metrics.span('fetch'):
+            response = self.session.get(url, headers=headers, timeout=timeout)
+        self._record(url, response, time.perf_counter() - start)
+        return response
+
+    def _hedge_executor(self):
+        with self._hedge_lock:
+            if self._hedge_pool is None:
+                self._hedge_pool = ThreadPoolExecutor(max_workers=self.HEDGE_WORKERS,
+                                                      thread_name_prefix='elpris-hedge')
+            return self._hedge_pool
+
+    def _record(self, url, response, elapsed):
+        # Wire size when the server tells us, otherwise the decoded body size
+        size = response.headers.get('Content-Length')
+        size = int(size) if size is not None else len(response.content)
+        metrics.increment('requests')
+        metrics.increment('bytes', size)
+        with self._log_lock:
+            self.total_requests += 1
+            self.total_bytes += size
+            self.request_log.append({
+                'url': url,
+                'status': response.status_code,
+                'latency_ms': elapsed * 1000,
+                'bytes': size,
+            })
+
+    def request_stats(self):
+        """Summary of the recorded requests: count, 304s, bytes and latency"""
+        with self._log_lock:
+            log = list(self.request_log)
+        latencies = sorted(r['latency_ms'] for r in log)
+        return {
+            'requests': len(log),
+            'not_modified': sum(1 for r in log if r['status'] == 304),
+            'bytes': sum(r['bytes'] for r in log),
+            'avg_latency_ms': sum(latencies) / len(latencies) if latencies else 0.0,
+            'max_latency_ms': latencies[-1] if latencies else 0.0,
+        }
+
+    def close(self):
+        if self._hedge_pool is not None:
+            self._hedge_pool.shutdown(wait=False)
+        self.session.close()
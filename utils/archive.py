@@ -0,0 +1,322 @@
+import os
+import shutil
+import threading
+from contextlib import contextmanager
+from datetime import date as date_type, datetime
+import numpy as np
+from .cache import default_data_dir
+from .price_series import PriceSeries
+
+if os.name == 'nt':
+    import msvcrt
+else:
+    import fcntl
+
+
+def default_archive_path():
+    """Platform-independent location of the price archive"""
+    return os.path.join(default_data_dir(), 'archive')
+
+
+@contextmanager
+def _file_lock(path):
+    """Exclusive lock on a file, held against other processes and other open handles"""
+    with open(path, 'a+b') as f:
+        if os.name == 'nt':
+            f.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    # LK_LOCK gives up after ten seconds; keep waiting
+                    pass
+            try:
+                yield
+            finally:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def _sync(f):
+    f.flush()
+    os.fsync(f.fileno())
+
+
+class PriceArchive:
+    """Append-only columnar archive of price history, one directory per region
+
+    Each region stores two column files, int64 interval start timestamps and
+    float32 prices, plus a small index of (day ordinal, offset, count) rows.
+    Reads go through numpy.memmap, so querying years of history is a slice of
+    the mapped files instead of parsing hundreds of JSON documents, and memory
+    use does not grow with the size of the archive.
+
+    Days are appended in any order. While they arrive in date order, range
+    queries return zero-copy views; after out-of-order appends (for example a
+    concurrent backfill) compact() restores that by rewriting the region
+    sorted by day.
+
+    Several processes may share an archive (the widget, backfill and the
+    hub all default to the same one). Appends and compactions take a lock
+    file per region and re-read the files under it, and compact() writes a
+    new generation directory that replaces the old one in a single rename of
+    the CURRENT file.
+    """
+
+    TIMESTAMPS = 'timestamps.i64'
+    PRICES = 'prices.f32'
+    INDEX = 'index.i64'
+    LOCK = '.lock'
+    # Names the generation directory holding the columns; without it they
+    # live in the region directory itself, as before the first compaction
+    CURRENT = 'CURRENT'
+
+    def __init__(self, path=None):
+        self.path = path or default_archive_path()
+        os.makedirs(self.path, exist_ok=True)
+        self._lock = threading.RLock()
+        # Open memmaps per region, keyed by the generation and index size they were mapped at
+        self._maps = {}
+
+    def _region_dir(self, region):
+        return os.path.join(self.path, f"SE{region}")
+
+    def _generation(self, region):
+        """Current generation directory of a region, '' for the region directory itself"""
+        try:
+            with open(os.path.join(self._region_dir(region), self.CURRENT)) as f:
+                return f.read().strip()
+        except FileNotFoundError:
+            return ''
+
+    def _file(self, region, name, generation=''):
+        return os.path.join(self._region_dir(region), generation, name)
+
+    @contextmanager
+    def _locked(self, region):
+        """Hold the region's lock against other threads and processes"""
+        with self._lock:
+            os.makedirs(self._region_dir(region), exist_ok=True)
+            with _file_lock(os.path.join(self._region_dir(region), self.LOCK)):
+                yield
+
+    @staticmethod
+    def _ordinal(day):
+        if isinstance(day, datetime):
+            day = day.date()
+        return day.toordinal()
+
+    @staticmethod
+    def _map(path, dtype, shape=()):
+        """Map the whole records of a file; a record still being written is left out"""
+        itemsize = np.dtype(dtype).itemsize * int(np.prod(shape))
+        count = os.path.getsize(path) // itemsize if os.path.exists(path) else 0
+        if not count:
+            return np.empty((0,) + shape, dtype=dtype)
+        return np.memmap(path, dtype=dtype, mode='r', shape=(count,) + shape)
+
+    def _region(self, region):
+        """Memmapped (index, timestamps, prices) of a region
+
+        The mapping is reused until another writer, in this or another
+        process, has appended to or compacted the region.
+        """
+        with self._lock:
+            generation = self._generation(region)
+            index_path = self._file(region, self.INDEX, generation)
+            key = (generation, os.path.getsize(index_path) if os.path.exists(index_path) else 0)
+            cached = self._maps.get(region)
+            if cached is not None and cached[0] == key:
+                return cached[1]
+
+            index = self._map(index_path, np.int64, (3,))
+            timestamps = self._map(self._file(region, self.TIMESTAMPS, generation), np.int64)
+            prices = self._map(self._file(region, self.PRICES, generation), np.float32)
+
+            # A crash between writes can leave column data the index never
+            # got to reference; ignore it
+            rows = int((index[:, 1] + index[:, 2]).max()) if len(index) else 0
+            maps = (index, timestamps[:rows], prices[:rows])
+            self._maps[region] = (key, maps)
+            return maps
+
+    @staticmethod
+    def _sorted(index):
+        return bool((np.diff(index[:, 0]) > 0).all())
+
+    def days(self, region):
+        """Archived days of a region, in storage order"""
+        index, _, _ = self._region(region)
+        return [date_type.fromordinal(int(ordinal)) for ordinal in index[:, 0]]
+
+    def has_day(self, region, day):
+        index, _, _ = self._region(region)
+        return bool(len(index)) and bool((index[:, 0] == self._ordinal(day)).any())
+
+    def is_sorted(self, region):
+        """Whether the region is stored in strictly increasing day order"""
+        index, _, _ = self._region(region)
+        return self._sorted(index)
+
+    def append_day(self, day, region, prices):
+        """
+        Append one published day. Days already in the archive are left untouched.
+
+        Args:
+            day (date or datetime): Date of the price day
+            region (int): Price region (1-4)
+            prices (list or PriceSeries): API records or a parsed series
+        """
+        if not prices:
+            return False
+        series = prices if isinstance(prices, PriceSeries) else PriceSeries.from_json(prices)
+
+        with self._locked(region):
+            # Under the lock the files on disk are the truth, whatever was mapped before
+            self._maps.pop(region, None)
+            if self.has_day(region, day):
+                return False
+            generation = self._generation(region)
+            index, timestamps, _ = self._region(region)
+            offset = len(timestamps)
+            # Nobody else is writing, so anything past the index is from an interrupted append
+            self._truncate(region, generation, len(index), offset)
+
+            # Columns first, index last: the day only exists once it is indexed
+            with open(self._file(region, self.TIMESTAMPS, generation), 'ab') as f:
+                f.write(series.starts.astype(np.int64).tobytes())
+            with open(self._file(region, self.PRICES, generation), 'ab') as f:
+                f.write(series.prices.astype(np.float32).tobytes())
+            with open(self._file(region, self.INDEX, generation), 'ab') as f:
+                f.write(np.array([self._ordinal(day), offset, len(series)], dtype=np.int64).tobytes())
+
+            self._maps.pop(region, None)
+        return True
+
+    def _truncate(self, region, generation, days, rows):
+        """Drop data past the indexed days and rows; only call with the region locked"""
+        for name, size in ((self.INDEX, days * 24), (self.TIMESTAMPS, rows * 8), (self.PRICES, rows * 4)):
+            path = self._file(region, name, generation)
+            if os.path.exists(path) and os.path.getsize(path) > size:
+                self._maps.pop(region, None)
+                with open(path, 'r+b') as f:
+                    f.truncate(size)
+
+    def query(self, region, start, end):
+        """
+        Prices of a region for a range of days
+
+        Returns zero-copy views of the memmapped columns when the region is
+        stored in day order, otherwise the matching days are gathered into
+        new arrays (run compact() to avoid that).
+
+        Args:
+            region (int): Price region (1-4)
+            start (date or datetime): First day, inclusive
+            end (date or datetime): Last day, inclusive
+
+        Returns:
+            tuple: (timestamps, prices) as int64 Unix seconds and float32 SEK/kWh
+        """
+        index, timestamps, prices = self._region(region)
+        first, last = self._ordinal(start), self._ordinal(end)
+
+        if self._sorted(index):
+            lo = int(np.searchsorted(index[:, 0], first, side='left'))
+            hi = int(np.searchsorted(index[:, 0], last, side='right'))
+            if lo >= hi:
+                return timestamps[:0], prices[:0]
+            begin = int(index[lo, 1])
+            stop = int(index[hi - 1, 1] + index[hi - 1, 2])
+            return timestamps[begin:stop], prices[begin:stop]
+
+        rows = index[(index[:, 0] >= first) & (index[:, 0] <= last)]
+        rows = rows[np.argsort(rows[:, 0], kind='stable')]
+        if not len(rows):
+            return timestamps[:0], prices[:0]
+        selected = np.concatenate([np.arange(offset, offset + count) for _, offset, count in rows])
+        return timestamps[selected], prices[selected]
+
+    def query_series(self, region, start, end):
+        """Like query(), but wrapped in a PriceSeries"""
+        timestamps, prices = self.query(region, start, end)
+        return PriceSeries(timestamps, prices)
+
+    def compact(self, region=None):
+        """
+        Rewrite regions sorted by day, dropping duplicate and unreferenced data
+
+        Data is copied day by day from the memmaps, so compaction also runs in
+        constant memory. The result goes to a new generation directory that
+        only takes over once CURRENT names it, so a crash at any point leaves
+        either the old or the new region, never a mix.
+        """
+        regions = [region] if region is not None else self.regions()
+        for region in regions:
+            with self._locked(region):
+                self._maps.pop(region, None)
+                old = self._generation(region)
+                index, timestamps, prices = self._region(region)
+                if not len(index):
+                    continue
+
+                order = np.argsort(index[:, 0], kind='stable')
+                _, unique = np.unique(index[order, 0], return_index=True)
+                rows = index[order[unique]]
+
+                new = f"gen{int(old[3:]) + 1 if old else 1}"
+                directory = os.path.join(self._region_dir(region), new)
+                # Left behind by an interrupted compaction
+                shutil.rmtree(directory, ignore_errors=True)
+                os.makedirs(directory)
+                offset = 0
+                with open(self._file(region, self.TIMESTAMPS, new), 'wb') as f_ts, \
+                        open(self._file(region, self.PRICES, new), 'wb') as f_prices, \
+                        open(self._file(region, self.INDEX, new), 'wb') as f_index:
+                    for ordinal, start, count in rows:
+                        f_ts.write(np.asarray(timestamps[start:start + count]).tobytes())
+                        f_prices.write(np.asarray(prices[start:start + count]).tobytes())
+                        f_index.write(np.array([ordinal, offset, count], dtype=np.int64).tobytes())
+                        offset += int(count)
+                    for f in (f_ts, f_prices, f_index):
+                        _sync(f)
+
+                current = os.path.join(self._region_dir(region), self.CURRENT)
+                with open(current + '.tmp', 'w') as f:
+                    f.write(new)
+                    _sync(f)
+                os.replace(current + '.tmp', current)
+
+                # Release the old mappings before removing the files; readers in
+                # other processes keep theirs until they notice the new generation
+                self._maps.pop(region, None)
+                del index, timestamps, prices
+                self._remove_old_generations(region, new)
+
+    def _remove_old_generations(self, region, keep):
+        region_dir = self._region_dir(region)
+        for name in os.listdir(region_dir):
+            path = os.path.join(region_dir, name)
+            if name.startswith('gen') and name != keep:
+                # Fails on Windows while still mapped elsewhere; retried by the next compaction
+                shutil.rmtree(path, ignore_errors=True)
+            elif name in (self.TIMESTAMPS, self.PRICES, self.INDEX):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def regions(self):
+        """Regions that have an archive directory"""
+        regions = []
+        for name in sorted(os.listdir(self.path)):
+            if name.startswith('SE') and name[2:].isdigit():
+                regions.append(int(name[2:]))
+        return regions
@@ -0,0 +1,134 @@
+import json
+import os
+import sqlite3
+import threading
+from .clock import system_clock
+
+
+def default_data_dir():
+    """Platform-independent directory for locally stored price data"""
+    if os.name == 'nt':
+        base = os.environ.get('LOCALAPPDATA') or os.path.expanduser('~')
+    else:
+        base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'elpriser')
+
+
+def default_cache_path():
+    """Platform-independent location of the price cache database"""
+    return os.path.join(default_data_dir(), 'prices.sqlite3')
+
+
+class PriceCache:
+    """Persistent cache of daily price responses, keyed by (date, region)
+
+    A day that has been published never changes, so every stored entry is
+    treated as final and is served without touching the network again.
+    """
+
+    def __init__(self, path=None, clock=None):
+        self.path = path or default_cache_path()
+        # Stamps fetched_at, so a simulated clock also dates the stored days
+        self.clock = clock or system_clock
+        if self.path != ':memory:':
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+
+        self.hits = 0
+        self.misses = 0
+
+        # The connection is shared between the GUI thread and fetch workers
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS prices (
+                day TEXT NOT NULL,
+                region INTEGER NOT NULL,
+                payload TEXT NOT NULL,
+                fetched_at TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                PRIMARY KEY (day, region)
+            )
+        """)
+        # Databases created before conditional requests lack the validator columns
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(prices)")}
+        for column in ('etag', 'last_modified'):
+            if column not in columns:
+                self._conn.execute(f"ALTER TABLE prices ADD COLUMN {column} TEXT")
+        self._conn.commit()
+
+    @staticmethod
+    def _key(date):
+        return date.strftime('%Y-%m-%d')
+
+    def get(self, date, region):
+        """
+        Return cached prices for a date and region, or None if missing
+
+        Args:
+            date (datetime): Date of the price day
+            region (int): Price region (1-4)
+        """
+        entry = self.get_entry(date, region)
+        return entry['prices'] if entry is not None else None
+
+    def get_entry(self, date, region):
+        """Like get(), but also returns the HTTP validators stored with the day"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload, etag, last_modified FROM prices WHERE day = ? AND region = ?",
+                (self._key(date), region)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return {
+            'prices': json.loads(row[0]),
+            'etag': row[1],
+            'last_modified': row[2],
+        }
+
+    def put(self, date, region, prices, etag=None, last_modified=None):
+        """Store a published price day. Empty responses are never cached."""
+        if not prices:
+            return
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO prices (day, region, payload, fetched_at, etag, last_modified) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (self._key(date), region, json.dumps(prices), self.clock.now().isoformat(),
+                 etag, last_modified)
+            )
+            self._conn.commit()
+
+    def touch(self, date, region):
+        """Mark a stored day as confirmed by the server (HTTP 304)"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE prices SET fetched_at = ? WHERE day = ? AND region = ?",
+                (self.clock.now().isoformat(), self._key(date), region)
+            )
+            self._conn.commit()
+
+    def contains(self, date, region):
+        """Check for a stored day without touching the hit/miss counters"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM prices WHERE day = ? AND region = ?",
+                (self._key(date), region)
+            ).fetchone()
+        return row is not None
+
+    def stats(self):
+        """Hit/miss counters since the cache was opened"""
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,67 @@
+import threading
+import time
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of sending a request while the circuit is open"""
+
+
+class CircuitBreaker:
+    """Stops sending requests to an upstream that keeps failing
+
+    closed     Requests pass. After `failure_threshold` consecutive failures
+               the circuit opens.
+    open       Requests fail immediately with CircuitOpenError until
+               `reset_timeout` seconds have passed.
+    half-open  A single trial request is let through; its success closes the
+               circuit and its failure opens it again.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half-open'
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state()
+
+    def _state(self):
+        if self.opened_at is None:
+            return self.CLOSED
+        if time.monotonic() - self.opened_at < self.reset_timeout:
+            return self.OPEN
+        return self.HALF_OPEN
+
+    def check(self):
+        """Raise CircuitOpenError unless a request may be sent now"""
+        with self._lock:
+            state = self._state()
+            if state == self.CLOSED:
+                return
+            if state == self.HALF_OPEN and not self._trial_running:
+                self._trial_running = True
+                return
+            retry_in = max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at))
+        raise CircuitOpenError(f"Upstream unavailable, next attempt in {retry_in:.0f} s")
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial_running or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self._trial_running = False
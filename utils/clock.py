@@ -0,0 +1,58 @@
+import threading
+import time
+from datetime import datetime
+
+
+class Clock:
+    """Wall clock of the API client and the widget
+
+    Everything that depends on the time of day (which day is today, whether
+    tomorrow's prices are due, the current price) asks its clock instead of
+    calling datetime.now(), so a simulated clock can be passed in to run the
+    widget through days, DST transitions and publication times in seconds.
+    """
+
+    def now(self):
+        """Current local time as a naive datetime"""
+        return datetime.now()
+
+    def timestamp(self):
+        """Current time as Unix seconds"""
+        return time.time()
+
+
+class SimulatedClock(Clock):
+    """Clock that only moves when it is told to
+
+    Safe to read from fetch threads while the GUI thread advances it.
+    """
+
+    def __init__(self, start):
+        """
+        Args:
+            start (datetime or float): Initial local time or Unix seconds
+        """
+        self._lock = threading.Lock()
+        self._time = start.timestamp() if isinstance(start, datetime) else float(start)
+
+    def now(self):
+        return datetime.fromtimestamp(self.timestamp())
+
+    def timestamp(self):
+        with self._lock:
+            return self._time
+
+    def set(self, when):
+        """Jump to a local time or Unix timestamp; the clock may move backwards"""
+        with self._lock:
+            self._time = when.timestamp() if isinstance(when, datetime) else float(when)
+
+    def advance(self, seconds):
+        """Move the clock forward and return the new local time"""
+        with self._lock:
+            self._time += seconds
+        return self.now()
+
+
+# Used wherever no clock is passed in
+system_clock = Clock()
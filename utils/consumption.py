@@ -0,0 +1,262 @@
+"""What consumption actually cost, from meter readings and the price archive
+
+Meter readings are streamed from CSV in fixed-size chunks. Each chunk is
+joined against the archived SEK_per_kWh prices with searchsorted over
+prefix sums of price x time, so a reading that spans several price intervals
+(an hourly reading against quarter-hourly prices) is charged the
+time-weighted mean price of its interval. Only the per-meter, per-day totals
+are kept between chunks, so memory use does not depend on the size of the
+input.
+
+The CSV needs a time column (ISO 8601 interval start, as in the API's
+time_start; naive times are local time) and a kWh column, and may have a
+meter column. Comma- and semicolon-separated files with decimal commas work.
+"""
+import csv
+import io
+from datetime import date as date_type, datetime
+import numpy as np
+
+# Row columns of the per-day accumulators
+_KWH, _COST, _PRICE_TIME, _DURATION, _UNPRICED = range(5)
+
+
+class CostCalculator:
+    """Accumulates the cost of meter readings per meter and day"""
+
+    CHUNK_SIZE = 100_000
+
+    def __init__(self, archive, region=3, api=None, interval_minutes=None):
+        """
+        Args:
+            archive (PriceArchive): Price history to join against
+            region (int, optional): Price region (1-4) of the meters
+            api (ElprisAPI, optional): Used to download days missing from the
+                archive. Without it, readings on missing days are left unpriced
+            interval_minutes (int, optional): Length of one reading. Detected
+                from the first chunk by default
+        """
+        self.archive = archive
+        self.region = region
+        self.api = api
+        self.interval_minutes = interval_minutes
+        self.rows = 0
+
+        self._meters = {}
+        # (meter index, day ordinal) -> accumulator row, see _KWH etc.
+        self._totals = {}
+        self._archived_days = set(archive.days(region))
+        self._missing_days = set()
+
+    def process_csv(self, source, chunk_size=None, time_column='time', value_column='kwh',
+                    meter_column='meter'):
+        """
+        Add every reading in a CSV file
+
+        Args:
+            source (str or file): Path or open text file
+            chunk_size (int, optional): Rows parsed and joined at a time
+            time_column (str, optional): Column with the interval start
+            value_column (str, optional): Column with the consumption in kWh
+            meter_column (str, optional): Column identifying the meter, if any
+        """
+        chunk_size = chunk_size or self.CHUNK_SIZE
+        f = open(source, newline='') if isinstance(source, str) else source
+        try:
+            header_line = f.readline()
+            delimiter = ';' if header_line.count(';') > header_line.count(',') else ','
+            header = next(csv.reader(io.StringIO(header_line), delimiter=delimiter))
+            header = [name.strip() for name in header]
+            try:
+                time_index = header.index(time_column)
+                value_index = header.index(value_column)
+            except ValueError:
+                raise ValueError(f"CSV needs the columns {time_column!r} and {value_column!r}, "
+                                 f"found {header}")
+            meter_index = header.index(meter_column) if meter_column in header else None
+
+            times, values, meters = [], [], []
+            for row in csv.reader(f, delimiter=delimiter):
+                if not row:
+                    continue
+                times.append(row[time_index])
+                values.append(row[value_index])
+                meters.append(row[meter_index] if meter_index is not None else '')
+                if len(times) >= chunk_size:
+                    self._add_chunk(times, values, meters)
+                    times, values, meters = [], [], []
+            if times:
+                self._add_chunk(times, values, meters)
+        finally:
+            if f is not source:
+                f.close()
+        return self
+
+    def _add_chunk(self, times, values, meters):
+        starts = np.empty(len(times), dtype=np.int64)
+        ordinals = np.empty(len(times), dtype=np.int64)
+        for i, text in enumerate(times):
+            moment = datetime.fromisoformat(text.strip())
+            if moment.tzinfo is not None:
+                moment = moment.astimezone()
+            starts[i] = int(moment.timestamp())
+            ordinals[i] = moment.toordinal()
+        kwh = np.array([float(value.replace(',', '.')) for value in values])
+        self.add_readings(starts, kwh, meters, ordinals)
+
+    def add_readings(self, starts, kwh, meters=None, ordinals=None):
+        """
+        Add a chunk of readings
+
+        Args:
+            starts (np.ndarray): Interval starts as Unix timestamps
+            kwh (np.ndarray): Consumption per interval
+            meters (sequence, optional): Meter id per reading
+            ordinals (np.ndarray, optional): Local day ordinal per reading,
+                computed from starts if not given
+        """
+        starts = np.asarray(starts, dtype=np.int64)
+        kwh = np.asarray(kwh, dtype=np.float64)
+        if not len(starts):
+            return
+        if ordinals is None:
+            ordinals = np.array([date_type.fromtimestamp(int(t)).toordinal() for t in starts])
+        if self.interval_minutes is None:
+            self.interval_minutes = self._detect_interval(starts)
+        ends = starts + self.interval_minutes * 60
+
+        mean_price = self._mean_prices(starts, ends, int(ordinals.min()), int(ordinals.max()))
+        priced = ~np.isnan(mean_price)
+        duration = (ends - starts).astype(np.float64)
+
+        # One accumulator row per (meter, day) present in the chunk
+        if meters is None:
+            meters = [''] * len(starts)
+        names, inverse = np.unique(np.asarray(meters), return_inverse=True)
+        lookup = np.array([self._meters.setdefault(str(name), len(self._meters))
+                           for name in names], dtype=np.int64)
+        meter_ids = lookup[inverse]
+        keys = meter_ids * 10_000_000 + ordinals
+        groups, group_of = np.unique(keys, return_inverse=True)
+
+        price = np.where(priced, mean_price, 0.0)
+        columns = np.empty((len(groups), 5))
+        columns[:, _KWH] = np.bincount(group_of, np.where(priced, kwh, 0.0), len(groups))
+        columns[:, _COST] = np.bincount(group_of, kwh * price, len(groups))
+        columns[:, _PRICE_TIME] = np.bincount(group_of, price * duration * priced, len(groups))
+        columns[:, _DURATION] = np.bincount(group_of, duration * priced, len(groups))
+        columns[:, _UNPRICED] = np.bincount(group_of, np.where(priced, 0.0, kwh), len(groups))
+
+        for key, row in zip(groups.tolist(), columns):
+            total = self._totals.get(key)
+            if total is None:
+                self._totals[key] = row
+            else:
+                total += row
+        self.rows += len(starts)
+
+    @staticmethod
+    def _detect_interval(starts):
+        steps = np.diff(np.unique(starts))
+        steps = steps[steps > 0]
+        return int(steps.min()) // 60 if len(steps) else 60
+
+    def _ensure_days(self, first, last):
+        """Download days missing from the archive, once per day, if an api was given"""
+        if self.api is None:
+            return
+        for ordinal in range(first, last + 1):
+            day = date_type.fromordinal(ordinal)
+            if day in self._archived_days or day in self._missing_days:
+                continue
+            prices = self.api.fetch_prices(datetime.combine(day, datetime.min.time()), self.region)
+            if prices:
+                self.archive.append_day(day, self.region, prices)
+                self._archived_days.add(day)
+            else:
+                self._missing_days.add(day)
+
+    def _mean_prices(self, starts, ends, first, last):
+        """Time-weighted mean price over [start, end) per reading, NaN where prices are missing"""
+        self._ensure_days(first, last)
+        # One day of margin for readings that cross midnight
+        price_starts, prices = self.archive.query(
+            self.region, date_type.fromordinal(first - 1), date_type.fromordinal(last + 1))
+        if len(price_starts) == 0:
+            return np.full(len(starts), np.nan)
+        price_starts = np.asarray(price_starts, dtype=np.int64)
+        prices = np.asarray(prices, dtype=np.float64)
+
+        # Each interval lasts until the next one starts, but never past the end
+        # of its own day: days may differ in resolution and may be missing
+        midnights = np.array([datetime.combine(date_type.fromordinal(ordinal), datetime.min.time())
+                              .timestamp() for ordinal in range(first - 1, last + 3)], dtype=np.int64)
+        day_of = np.clip(np.searchsorted(midnights, price_starts, side='right') - 1,
+                         0, len(midnights) - 2)
+        day_ends = midnights[day_of + 1]
+        next_starts = np.append(price_starts[1:], day_ends[-1])
+        widths = np.minimum(next_starts, day_ends) - price_starts
+
+        # Running integrals of price x time and of covered time
+        price_integral = np.concatenate(([0.0], np.cumsum(prices * widths)))
+        time_integral = np.concatenate(([0], np.cumsum(widths)))
+
+        def integrate(t):
+            k = np.clip(np.searchsorted(price_starts, t, side='right') - 1, 0, len(price_starts) - 1)
+            inside = np.clip(t - price_starts[k], 0, widths[k])
+            return price_integral[k] + prices[k] * inside, time_integral[k] + inside
+
+        price_start, covered_start = integrate(starts)
+        price_end, covered_end = integrate(ends)
+        span = (ends - starts).astype(np.float64)
+        covered = (covered_end - covered_start == ends - starts) & (starts >= price_starts[0])
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = (price_end - price_start) / span
+        return np.where(covered, mean, np.nan)
+
+    def _rows(self, period):
+        """Accumulated totals grouped per meter and day or month"""
+        meter_names = {index: name for name, index in self._meters.items()}
+        grouped = {}
+        for key, row in self._totals.items():
+            meter, ordinal = divmod(key, 10_000_000)
+            day = date_type.fromordinal(ordinal)
+            label = day.isoformat() if period == 'day' else day.strftime('%Y-%m')
+            group = (meter_names.get(meter, ''), label)
+            if group in grouped:
+                grouped[group] = grouped[group] + row
+            else:
+                grouped[group] = row.copy()
+
+        results = []
+        for (meter, label), row in sorted(grouped.items()):
+            row = row.tolist()
+            kwh, cost = row[_KWH], row[_COST]
+            flat_price = row[_PRICE_TIME] / row[_DURATION] if row[_DURATION] else float('nan')
+            results.append({
+                'meter': meter,
+                period: label,
+                'kwh': kwh,
+                'cost': cost,
+                'avg_price': cost / kwh if kwh else float('nan'),
+                'flat_price': flat_price,
+                'savings': kwh * flat_price - cost if row[_DURATION] else 0.0,
+                'unpriced_kwh': row[_UNPRICED],
+            })
+        return results
+
+    def daily(self):
+        """
+        Cost per meter and day
+
+        Returns:
+            list: Dicts with meter, day, kwh, cost (SEK), avg_price (paid SEK/kWh),
+                flat_price (time-average spot price over the same intervals),
+                savings (SEK compared with paying flat_price for every kWh) and
+                unpriced_kwh (consumption without a known price, not in cost)
+        """
+        return self._rows('day')
+
+    def monthly(self):
+        """Cost per meter and month, with the same fields as daily()"""
+        return self._rows('month')
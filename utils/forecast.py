@@ -0,0 +1,327 @@
+"""Price outlook for the days after the last published one
+
+Prices are only published one day ahead, so anything further out has to be
+forecast from history. Every model works on hourly profiles, the mean price
+of each local hour of a day:
+
+    daily    seasonal naive, the last known day repeated
+    weekly   seasonal naive, the same weekday one week earlier
+    ridge    ridge regression on hour of day, weekday and the prices one
+             day and one week earlier, applied recursively day by day
+
+Training is incremental. A new day adds its 24 rows to the regression's
+running XᵀX and Xᵀy, with exponential forgetting so the model follows
+changing price levels, and refitting solves one small linear system. Each
+model's squared error is tracked per horizon and hour by scoring its own
+earlier forecasts as the actual days arrive; the outlook uses the model with
+the lowest recent error at each horizon, with bands from that error.
+"""
+from collections import deque
+from datetime import date as date_type, datetime, timedelta
+from statistics import NormalDist
+import numpy as np
+
+HOURS = 24
+MODELS = ('daily', 'weekly', 'ridge')
+
+
+def hourly_profile(starts, prices):
+    """
+    Mean price of each local hour of one day
+
+    Works for hourly and quarter-hourly days. On the 23-hour DST day the
+    missing hour is interpolated; on the 25-hour day the repeated hour is
+    averaged.
+
+    Args:
+        starts (np.ndarray): Interval starts as Unix seconds
+        prices (np.ndarray): Prices in SEK/kWh
+
+    Returns:
+        np.ndarray: 24 prices, NaN only if the day has no prices at all
+    """
+    starts = np.asarray(starts, dtype=np.int64)
+    prices = np.asarray(prices, dtype=np.float64)
+    if not len(starts):
+        return np.full(HOURS, np.nan)
+    first = datetime.fromtimestamp(int(starts[0])).astimezone().utcoffset().total_seconds()
+    last = datetime.fromtimestamp(int(starts[-1])).astimezone().utcoffset().total_seconds()
+    if first == last:
+        hours = (starts + int(first)) // 3600 % HOURS
+    else:
+        hours = np.array([datetime.fromtimestamp(int(t)).hour for t in starts])
+
+    counts = np.bincount(hours, minlength=HOURS)
+    sums = np.bincount(hours, prices, minlength=HOURS)
+    with np.errstate(invalid='ignore'):
+        profile = sums / counts
+    missing = counts == 0
+    if missing.any() and not missing.all():
+        known = np.flatnonzero(~missing)
+        profile[missing] = np.interp(np.flatnonzero(missing), known, profile[known])
+    return profile
+
+
+def day_hours(day):
+    """
+    Hour starts of one local day and the local hour each one has
+
+    Args:
+        day (date): Local day
+
+    Returns:
+        tuple: Starts as Unix seconds and hour indices, 23 or 25 of each on DST days
+    """
+    midnight = datetime(day.year, day.month, day.day).timestamp()
+    following = day + timedelta(days=1)
+    next_midnight = datetime(following.year, following.month, following.day).timestamp()
+    starts = np.arange(int(midnight), int(next_midnight), 3600, dtype=np.int64)
+    hours = np.array([datetime.fromtimestamp(int(t)).hour for t in starts])
+    return starts, hours
+
+
+class Outlook:
+    """Forecast hourly prices for whole days, with an uncertainty band"""
+
+    def __init__(self, starts, ends, mean, lower, upper, models, day_starts):
+        """
+        Args:
+            starts, ends (np.ndarray): Hour starts and ends as Unix seconds
+            mean (np.ndarray): Forecast price per hour in SEK/kWh
+            lower, upper (np.ndarray): Band around the forecast
+            models (list): Model used for each forecast day
+            day_starts (np.ndarray): Local midnight of each forecast day as Unix seconds
+        """
+        self.starts = starts
+        self.ends = ends
+        self.mean = mean
+        self.lower = lower
+        self.upper = upper
+        self.models = models
+        self.day_starts = day_starts
+
+    def __len__(self):
+        return len(self.starts)
+
+    @property
+    def days(self):
+        """Local dates of the forecast days"""
+        return [datetime.fromtimestamp(int(t)).date() for t in self.day_starts]
+
+
+class PriceForecaster:
+    """Incrementally trained forecaster for one price region"""
+
+    # Days of history used when training from an archive for the first time
+    HISTORY_DAYS = 365
+
+    # Days of training data before the regression is used
+    MIN_TRAINING_DAYS = 14
+
+    # Days at the end of a bulk load whose forecasts are scored; the errors of
+    # older ones would have decayed away by the end anyway
+    SCORED_DAYS = 60
+
+    # Features: hour of day (24), weekday (7), lag 1 day, lag 7 days, lag 1 day mean
+    FEATURES = HOURS + 7 + 3
+
+    def __init__(self, horizon=7, ridge=1.0, forgetting=0.995, error_decay=0.9, coverage=0.8):
+        """
+        Args:
+            horizon (int, optional): Most days forecast past the last known day
+            ridge (float, optional): Regularization strength of the regression
+            forgetting (float, optional): Weight kept by older training days
+                each time a new day is added
+            error_decay (float, optional): Weight kept by older errors in the
+                per-horizon error estimates
+            coverage (float, optional): Share of actual prices the band should
+                contain, assuming normally distributed errors
+        """
+        self.horizon = horizon
+        self.ridge = ridge
+        self.forgetting = forgetting
+        self.error_decay = error_decay
+        self.z = NormalDist().inv_cdf(0.5 + coverage / 2)
+
+        self.last_day = None
+        self.days_trained = 0
+        self._xtx = np.zeros((self.FEATURES, self.FEATURES))
+        self._xty = np.zeros(self.FEATURES)
+        self._coef = None
+        # Day ordinal -> hourly profile, only as far back as the lags reach
+        self._history = {}
+        # Squared error per model, horizon and hour; NaN until first scored
+        self._errors = {model: np.full((horizon, HOURS), np.nan) for model in MODELS}
+        # Forecasts from recent days, scored once the actual days arrive
+        self._pending = deque(maxlen=horizon)
+
+        # Hour and weekday indicator columns, the same for every day of a weekday
+        self._calendar = np.zeros((7, HOURS, self.FEATURES))
+        for weekday in range(7):
+            self._calendar[weekday, np.arange(HOURS), np.arange(HOURS)] = 1.0
+            self._calendar[weekday, :, HOURS + weekday] = 1.0
+
+    def update(self, day, profile, score=True):
+        """
+        Add one actual day. Days must arrive in order; earlier days are ignored.
+
+        Args:
+            day (date or datetime): Date of the prices
+            profile (np.ndarray): 24 hourly prices, see hourly_profile()
+            score (bool, optional): Forecast from this day so the forecasts
+                can be scored against the following days
+
+        Returns:
+            bool: Whether the day was added
+        """
+        ordinal = day.toordinal()
+        profile = np.asarray(profile, dtype=np.float64)
+        if (self.last_day is not None and ordinal <= self.last_day) or np.isnan(profile).any():
+            return False
+
+        # Score the forecasts earlier days made for this one
+        decay = self.error_decay
+        for origin, forecasts in self._pending:
+            step = ordinal - origin - 1
+            if 0 <= step < self.horizon:
+                for model, forecast in forecasts.items():
+                    squared = (profile - forecast[step]) ** 2
+                    errors = self._errors[model][step]
+                    self._errors[model][step] = np.where(
+                        np.isnan(errors), squared, decay * errors + (1 - decay) * squared)
+
+        features = self._features(ordinal, self._history.get)
+        if features is not None:
+            self._xtx = self.forgetting * self._xtx + features.T @ features
+            self._xty = self.forgetting * self._xty + features.T @ profile
+            self.days_trained += 1
+            self._coef = None
+
+        self._history[ordinal] = profile
+        for old in [o for o in self._history if o <= ordinal - 7]:
+            del self._history[old]
+        self.last_day = ordinal
+        if score:
+            self._pending.append((ordinal, self._predict(self.horizon)))
+        else:
+            self._pending.clear()
+        return True
+
+    def update_from_archive(self, archive, region):
+        """
+        Add the archived days after the last one seen
+
+        Args:
+            archive (PriceArchive): Price history
+            region (int): Price region (1-4)
+
+        Returns:
+            int: Number of days added
+        """
+        days = sorted(archive.days(region))
+        if self.last_day is not None:
+            days = [day for day in days if day.toordinal() > self.last_day]
+        elif days:
+            first = days[-1] - timedelta(days=self.HISTORY_DAYS - 1)
+            days = [day for day in days if day >= first]
+
+        added = 0
+        for index, day in enumerate(days):
+            starts, prices = archive.query(region, day, day)
+            added += self.update(day, hourly_profile(starts, prices),
+                                 score=index >= len(days) - self.SCORED_DAYS)
+        return added
+
+    def _features(self, ordinal, lookup):
+        """Design matrix for one day, or None without the previous day's prices"""
+        previous = lookup(ordinal - 1)
+        if previous is None:
+            return None
+        week_ago = lookup(ordinal - 7)
+        if week_ago is None:
+            week_ago = previous
+
+        # Ordinal 1 (0001-01-01) was a Monday
+        features = self._calendar[(ordinal - 1) % 7].copy()
+        features[:, HOURS + 7] = previous
+        features[:, HOURS + 8] = week_ago
+        features[:, HOURS + 9] = previous.mean()
+        return features
+
+    def _coefficients(self):
+        if self.days_trained < self.MIN_TRAINING_DAYS:
+            return None
+        if self._coef is None:
+            penalty = self.ridge * np.eye(self.FEATURES)
+            self._coef = np.linalg.solve(self._xtx + penalty, self._xty)
+        return self._coef
+
+    def _predict(self, days):
+        """Forecasts of every available model for the days after last_day"""
+        last = self._history[self.last_day]
+        forecasts = {'daily': np.tile(last, (days, 1))}
+
+        weekly = np.empty((days, HOURS))
+        for step in range(days):
+            weekly[step] = self._history.get(self.last_day + step + 1 - 7, last)
+        forecasts['weekly'] = weekly
+
+        coef = self._coefficients()
+        if coef is not None:
+            # Recursive: later days use the forecasts of the days before them
+            known = dict(self._history)
+            ridge = np.empty((days, HOURS))
+            for step in range(days):
+                ordinal = self.last_day + step + 1
+                ridge[step] = self._features(ordinal, known.get) @ coef
+                known[ordinal] = ridge[step]
+            forecasts['ridge'] = ridge
+        return forecasts
+
+    def _best_model(self, step, forecasts):
+        """Model with the lowest recent error at a horizon, and its error per hour"""
+        scored = {model: self._errors[model][step] for model in forecasts
+                  if not np.isnan(self._errors[model][step]).all()}
+        if scored:
+            model = min(scored, key=lambda m: float(np.nanmean(scored[m])))
+            return model, scored[model]
+        # Nothing scored yet: prefer the richest model and guess the error
+        # from the spread of the last known day
+        model = 'ridge' if 'ridge' in forecasts else 'weekly'
+        return model, np.full(HOURS, float(np.var(self._history[self.last_day])))
+
+    def forecast(self, days=None):
+        """
+        Outlook for the days after the last known day
+
+        Args:
+            days (int, optional): Number of days, at most the horizon
+
+        Returns:
+            Outlook: None if no day has been added yet
+        """
+        if self.last_day is None:
+            return None
+        days = min(days or self.horizon, self.horizon)
+        if days <= 0:
+            return None
+        forecasts = self._predict(days)
+
+        starts, midnights, mean, spread, models = [], [], [], [], []
+        for step in range(days):
+            day = date_type.fromordinal(self.last_day + step + 1)
+            model, squared_error = self._best_model(step, forecasts)
+            # The actual hours of the day, so DST days repeat or skip a local hour
+            day_starts, hours = day_hours(day)
+            starts.append(day_starts)
+            midnights.append(day_starts[0])
+            mean.append(forecasts[model][step][hours])
+            spread.append(self.z * np.sqrt(squared_error)[hours])
+            models.append(model)
+
+        starts = np.concatenate(starts)
+        ends = starts + 3600
+        mean = np.concatenate(mean)
+        spread = np.concatenate(spread)
+        return Outlook(starts, ends, mean, mean - spread, mean + spread, models,
+                       np.array(midnights, dtype=np.int64))
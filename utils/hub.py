@@ -0,0 +1,266 @@
+"""Headless price hub that lets many widgets share one upstream fetcher
+
+The hub runs the fetch/cache layer once and serves prices over HTTP with the
+same URL layout as elprisetjustnu.se, so an ElprisAPI pointed at the hub works
+unchanged. Clients learn about newly published days through long-polling
+(/api/v1/updates) or server-sent events (/api/v1/events) instead of polling
+the upstream API themselves. Today and later days are only served once the
+hub's own poller has stored them, so however many clients ask, the upstream
+sees one poller. Timings and counters of the upstream fetches
+are served in the Prometheus format on /metrics. No Qt is needed.
+"""
+import json
+import re
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+from .api import ElprisAPI
+from .metrics import metrics
+from .schedule import PUBLISH_HOUR, backoff
+
+# Path of the price endpoint, identical to the upstream API
+PRICE_PATH = "/api/v1/prices/{year}/{date}_SE{region}.json"
+
+
+def hub_base_url(hub_url):
+    """ElprisAPI base_url for a hub running at hub_url"""
+    return hub_url.rstrip('/') + PRICE_PATH
+
+
+class PriceHub:
+    """Polls the upstream API for all regions and publishes changes to clients"""
+
+    # Longest sleep between polls, so clock changes are noticed eventually
+    MAX_SLEEP = 3600
+
+    # Number of recent updates returned to long-polling clients
+    UPDATE_LOG_SIZE = 64
+
+    def __init__(self, api=None, regions=ElprisAPI.REGIONS):
+        self.api = api or ElprisAPI()
+        self.regions = tuple(regions)
+
+        self.version = 0
+        self.updates = deque(maxlen=self.UPDATE_LOG_SIZE)
+        self.failures = 0
+        self._changed = threading.Condition()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def days_to_poll(self, now=None):
+        """Days the hub should hold right now"""
+        now = now or self.api.clock.now()
+        days = [now - timedelta(days=1), now]
+        if now.hour >= PUBLISH_HOUR:
+            days.append(now + timedelta(days=1))
+        return days
+
+    def poll_once(self):
+        """
+        Fetch every expected day that is not cached yet
+
+        Returns:
+            bool: Whether every expected day is now available
+        """
+        jobs = [(day, region)
+                for day in self.days_to_poll()
+                for region in self.regions
+                if not self.api.cache.contains(day, region)]
+        if not jobs:
+            return True
+
+        with ThreadPoolExecutor(max_workers=min(len(jobs), 6)) as executor:
+            results = list(executor.map(lambda job: self.api.fetch_prices(*job), jobs))
+
+        arrived = [job for job, prices in zip(jobs, results) if prices]
+        if arrived:
+            self.publish(arrived)
+        return len(arrived) == len(jobs)
+
+    def publish(self, days):
+        """Record newly available days and wake up waiting clients"""
+        with self._changed:
+            self.version += 1
+            for day, region in days:
+                self.updates.append({
+                    'version': self.version,
+                    'date': day.strftime('%Y-%m-%d'),
+                    'region': region,
+                })
+            self._changed.notify_all()
+
+    def wait_for_update(self, since, timeout):
+        """Block until the version is newer than since or the timeout passes"""
+        with self._changed:
+            self._changed.wait_for(lambda: self.version > since or self._stop.is_set(), timeout)
+            return self.version
+
+    def updates_since(self, since):
+        with self._changed:
+            return [update for update in self.updates if update['version'] > since]
+
+    def next_poll_delay(self, complete, now=None):
+        """Seconds until the next poll, given whether the last poll was complete"""
+        now = now or self.api.clock.now()
+        if not complete:
+            self.failures += 1
+            return backoff(self.failures)
+
+        self.failures = 0
+        if now.hour < PUBLISH_HOUR:
+            wake = now.replace(hour=PUBLISH_HOUR, minute=0, second=0, microsecond=0)
+        else:
+            # Everything is here until the day rolls over
+            wake = (now + timedelta(days=1)).replace(hour=0, minute=0, second=5, microsecond=0)
+        return min(self.MAX_SLEEP, max(1.0, (wake - now).total_seconds()))
+
+    def run(self):
+        """Poll loop, runs until stop() is called"""
+        while not self._stop.is_set():
+            try:
+                complete = self.poll_once()
+            except Exception as e:
+                print(f"Error polling prices: {e}")
+                complete = False
+            self._stop.wait(self.next_poll_delay(complete))
+
+    def is_stopped(self):
+        return self._stop.is_set()
+
+    def start(self):
+        self._thread = threading.Thread(target=self.run, name='price-hub-poller', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        with self._changed:
+            self._changed.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+
+
+class HubRequestHandler(BaseHTTPRequestHandler):
+    """HTTP front end of a PriceHub, available as self.server.hub"""
+
+    PRICE_RE = re.compile(r'^/api/v1/prices/(\d{4})/(\d{2}-\d{2})_SE(\d)\.json$')
+
+    # Longest long-poll and the keep-alive interval of the event stream
+    MAX_WAIT = 60
+    KEEPALIVE = 15
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, data, status=200, headers=None):
+        body = json.dumps(data).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        hub = self.server.hub
+
+        match = self.PRICE_RE.match(url.path)
+        if match:
+            return self._serve_prices(hub, *match.groups())
+        if url.path == '/api/v1/updates':
+            return self._serve_updates(hub, query)
+        if url.path == '/api/v1/events':
+            return self._serve_events(hub)
+        if url.path == '/metrics':
+            return self._serve_metrics()
+        if url.path == '/healthz':
+            return self._send_json({
+                'version': hub.version,
+                'cache': hub.api.cache.stats(),
+                'upstream': hub.api.request_stats(),
+            })
+        self._send_json({'error': 'not found'}, status=404)
+
+    def _serve_metrics(self):
+        """Upstream fetch timings and counters in the Prometheus text format"""
+        body = metrics.to_prometheus().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _serve_prices(self, hub, year, month_day, region):
+        try:
+            day = datetime.strptime(f"{year}-{month_day}", "%Y-%m-%d")
+        except ValueError:
+            return self._send_json({'error': 'bad date'}, status=400)
+
+        # Today and later are only served once the poller has stored them, so
+        # clients asking early never turn into upstream requests of their own
+        if day.date() >= hub.api.clock.now().date():
+            prices = hub.api.cache.get(day, int(region))
+        else:
+            prices = hub.api.fetch_prices(day, int(region))
+        if not prices:
+            return self._send_json({'error': 'not available'}, status=404)
+
+        # Published days never change, so the day and region identify the content
+        etag = f'"{year}-{month_day}-SE{region}-{len(prices)}"'
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+        self._send_json(prices, headers={'ETag': etag})
+
+    def _serve_updates(self, hub, query):
+        """Long-poll: answer once the hub version is newer than ?since="""
+        if 'since' not in query:
+            return self._send_json({'version': hub.version, 'updates': []})
+        try:
+            since = int(query['since'][0])
+            timeout = min(float(query.get('timeout', [30])[0]), self.MAX_WAIT)
+            if not timeout >= 0:
+                raise ValueError(timeout)
+        except ValueError:
+            return self._send_json({'error': 'since must be an integer, timeout a non-negative number'},
+                                   status=400)
+        version = hub.wait_for_update(since, timeout)
+        self._send_json({'version': version, 'updates': hub.updates_since(since)})
+
+    def _serve_events(self, hub):
+        """Server-sent events: one "update" event per new hub version"""
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.end_headers()
+
+        seen = hub.version
+        try:
+            self.wfile.write(f"event: version\ndata: {seen}\n\n".encode('utf-8'))
+            self.wfile.flush()
+            while not hub.is_stopped():
+                version = hub.wait_for_update(seen, self.KEEPALIVE)
+                if version > seen:
+                    data = json.dumps({'version': version, 'updates': hub.updates_since(seen)})
+                    self.wfile.write(f"event: update\ndata: {data}\n\n".encode('utf-8'))
+                    seen = version
+                else:
+                    self.wfile.write(b": keepalive\n\n")
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+
+def serve(hub, host='127.0.0.1', port=8765):
+    """Create the HTTP server for a hub; call serve_forever() on the result"""
+    server = ThreadingHTTPServer((host, port), HubRequestHandler)
+    server.daemon_threads = True
+    server.hub = hub
+    return server
@@ -0,0 +1,196 @@
+"""Timing spans and counters for the refresh path
+
+A single process-wide registry, `metrics`, is shared by the API client, the
+widget and the graphs. It is disabled by default, in which case span() hands
+out a shared no-op context manager and increment() returns immediately, so
+instrumented code costs one attribute check per call.
+
+    from utils.metrics import metrics
+
+    metrics.enable()
+    with metrics.span('fetch'):
+        ...
+    metrics.increment('bytes', 1234)
+    metrics.export('/var/lib/node_exporter/textfile/elpriser.prom')
+"""
+import json
+import os
+import threading
+import time
+from collections import deque
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ('metrics', 'name', 'start')
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.observe(self.name, (time.perf_counter() - self.start) * 1000)
+        return False
+
+
+class Metrics:
+    """Registry of timing spans and counters"""
+
+    # Histogram bucket bounds of the Prometheus export, in milliseconds
+    BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+    # Number of recent span timings kept for the debug overlay and JSON lines
+    HISTORY_SIZE = 1000
+
+    # Prefix of every exported metric name
+    PREFIX = 'elpriser'
+
+    # Size at which a JSON lines file is rotated to <path>.1
+    JSONL_MAX_BYTES = 5 * 1024 * 1024
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self.reset()
+
+    def enable(self, enabled=True):
+        self.enabled = enabled
+
+    def reset(self):
+        with self._lock:
+            self.counters = {}
+            self.spans = {}
+            self.recent = deque(maxlen=self.HISTORY_SIZE)
+            self._sequence = 0
+            self._exported = 0
+
+    def span(self, name):
+        """Context manager timing the enclosed block as one observation of name"""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name)
+
+    def observe(self, name, ms):
+        """Record one timing of name in milliseconds"""
+        if not self.enabled:
+            return
+        with self._lock:
+            stats = self.spans.get(name)
+            if stats is None:
+                stats = self.spans[name] = {
+                    'count': 0, 'sum_ms': 0.0, 'max_ms': 0.0,
+                    'buckets': [0] * len(self.BUCKETS_MS),
+                }
+            stats['count'] += 1
+            stats['sum_ms'] += ms
+            stats['max_ms'] = max(stats['max_ms'], ms)
+            for i, bound in enumerate(self.BUCKETS_MS):
+                if ms <= bound:
+                    stats['buckets'][i] += 1
+                    break
+            self._sequence += 1
+            self.recent.append((self._sequence, time.time(), name, ms))
+
+    def increment(self, name, amount=1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def last(self, count):
+        """The count most recent timings as (wall time, name, ms), newest last"""
+        with self._lock:
+            return [entry[1:] for entry in list(self.recent)[-count:]]
+
+    def snapshot(self):
+        """Counters and per-span count, mean and max as plain dicts"""
+        with self._lock:
+            return {
+                'counters': dict(self.counters),
+                'spans': {
+                    name: {
+                        'count': stats['count'],
+                        'mean_ms': stats['sum_ms'] / stats['count'],
+                        'max_ms': stats['max_ms'],
+                    }
+                    for name, stats in self.spans.items()
+                },
+            }
+
+    def to_prometheus(self):
+        """Prometheus text exposition format"""
+        prefix = self.PREFIX
+        lines = []
+        with self._lock:
+            for name, value in sorted(self.counters.items()):
+                lines.append(f"# TYPE {prefix}_{name}_total counter")
+                lines.append(f"{prefix}_{name}_total {value}")
+
+            metric = f"{prefix}_span_duration_seconds"
+            if self.spans:
+                lines.append(f"# TYPE {metric} histogram")
+            for name, stats in sorted(self.spans.items()):
+                cumulative = 0
+                for bound, count in zip(self.BUCKETS_MS, stats['buckets']):
+                    cumulative += count
+                    lines.append(f'{metric}_bucket{{span="{name}",le="{bound / 1000:g}"}} {cumulative}')
+                lines.append(f'{metric}_bucket{{span="{name}",le="+Inf"}} {stats["count"]}')
+                lines.append(f'{metric}_sum{{span="{name}"}} {stats["sum_ms"] / 1000:.6f}')
+                lines.append(f'{metric}_count{{span="{name}"}} {stats["count"]}')
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path):
+        """Replace path with the current values, for the node_exporter textfile collector"""
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            f.write(self.to_prometheus())
+        # Atomic, so the collector never reads a half-written file
+        os.replace(tmp_path, path)
+
+    def write_jsonl(self, path):
+        """
+        Append the timings recorded since the previous call, then the counters
+
+        Every line is one JSON object with a "type" of "span" or "counters".
+        Timings that fell out of the history between two calls are lost.
+        Once the file reaches JSONL_MAX_BYTES it replaces <path>.1 and a new
+        file is started, so at most two files' worth is kept.
+        """
+        if os.path.exists(path) and os.path.getsize(path) >= self.JSONL_MAX_BYTES:
+            os.replace(path, f"{path}.1")
+
+        with self._lock:
+            events = [entry for entry in self.recent if entry[0] > self._exported]
+            self._exported = self._sequence
+            counters = dict(self.counters)
+
+        with open(path, 'a') as f:
+            for _, wall_time, name, ms in events:
+                f.write(json.dumps({'type': 'span', 'time': wall_time, 'name': name,
+                                    'ms': round(ms, 3)}) + "\n")
+            f.write(json.dumps({'type': 'counters', 'time': time.time(), **counters}) + "\n")
+
+    def export(self, path):
+        """Write a Prometheus textfile if path ends in .prom, JSON lines otherwise"""
+        if path.endswith('.prom'):
+            self.write_prometheus(path)
+        else:
+            self.write_jsonl(path)
+
+
+# Process-wide registry, disabled until enable() is called
+metrics = Metrics()
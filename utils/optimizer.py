@@ -0,0 +1,104 @@
+"""Find the cheapest times to run loads such as EV charging or heat pumps
+
+All functions take prices as a 1-D array for one region or a 2-D array with
+one row per region, and run in O(n) per window length using prefix sums, so
+they are cheap enough to re-run on every price interval, even over
+multi-day archives.
+"""
+import numpy as np
+
+
+def _as_rows(prices):
+    prices = np.asarray(prices, dtype=np.float64)
+    return prices.reshape(1, -1) if prices.ndim == 1 else prices
+
+
+def cheapest_windows(prices, lengths):
+    """
+    Cheapest contiguous block for several block lengths at once
+
+    Args:
+        prices (np.ndarray): Prices, shape (n,) or (regions, n)
+        lengths (iterable): Block lengths in number of intervals
+
+    Returns:
+        tuple: (starts, means), each of shape (len(lengths), regions). A start
+            of -1 and a mean of NaN mark lengths longer than the series
+    """
+    rows = _as_rows(prices)
+    lengths = np.asarray(list(lengths), dtype=np.int64)
+    regions, n = rows.shape
+
+    # Prefix sums with a leading zero: sum(i, i+N) = c[i+N] - c[i]
+    prefix = np.zeros((regions, n + 1))
+    np.cumsum(rows, axis=1, out=prefix[:, 1:])
+
+    # Window sums for every (length, region, start) in one broadcast
+    starts = np.arange(n)
+    ends = starts[None, :] + lengths[:, None]
+    valid = ends <= n
+    sums = prefix[:, np.minimum(ends, n)] - prefix[:, starts][:, None, :]
+    sums = np.where(valid[None, :, :], sums, np.inf).transpose(1, 0, 2)
+
+    best = sums.argmin(axis=2)
+    best_sums = np.take_along_axis(sums, best[:, :, None], axis=2)[:, :, 0]
+    found = np.isfinite(best_sums)
+    means = np.where(found, best_sums / lengths[:, None], np.nan)
+    return np.where(found, best, -1), means
+
+
+def cheapest_intervals(prices, k):
+    """
+    The k cheapest intervals, not necessarily contiguous
+
+    Args:
+        prices (np.ndarray): Prices, shape (n,) or (regions, n)
+        k (int): Number of intervals to pick
+
+    Returns:
+        np.ndarray: Interval indices in time order, shape (regions, k)
+    """
+    rows = _as_rows(prices)
+    k = min(k, rows.shape[1])
+    if k == 0:
+        return np.empty((rows.shape[0], 0), dtype=np.int64)
+    # argpartition is O(n); only the k picked indices get sorted
+    picked = np.argpartition(rows, k - 1, axis=1)[:, :k]
+    return np.sort(picked, axis=1)
+
+
+def cheapest_window(series, hours, after=None):
+    """
+    Cheapest block of a given length in a PriceSeries
+
+    Args:
+        series (PriceSeries): Prices to search, e.g. today and tomorrow joined
+        hours (float): Length of the block in hours
+        after (datetime, optional): Only consider blocks starting in or after
+            the interval containing this instant
+
+    Returns:
+        dict: start and end as Unix timestamps, the mean price and the index of
+            the first interval, or None if the block does not fit
+    """
+    first = 0
+    if after is not None:
+        index = series.index_at(after)
+        if index is None:
+            if after.timestamp() >= series.ends[-1]:
+                return None
+        else:
+            first = index
+
+    length = max(1, int(round(hours * 60 / series.resolution)))
+    starts, means = cheapest_windows(series.prices[first:], [length])
+    if starts[0, 0] < 0:
+        return None
+
+    start = first + int(starts[0, 0])
+    return {
+        'start': int(series.starts[start]),
+        'end': int(series.ends[start + length - 1]),
+        'mean': float(means[0, 0]),
+        'index': start,
+    }
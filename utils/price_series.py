@@ -0,0 +1,162 @@
+from datetime import datetime
+from functools import cached_property
+import numpy as np
+
+
+class PriceSeries:
+    """Prices of one day as NumPy arrays
+
+    Built once per fetch from the JSON records returned by ElprisAPI. The
+    summary statistics are computed lazily, and only once, so the display
+    and the graph can share them without rescanning the data.
+
+    The series is indexed by the time_start/time_end of every interval, so it
+    works the same for hourly and quarter-hourly data and for DST days with
+    23 or 25 hours.
+    """
+
+    def __init__(self, starts, prices, ends=None):
+        """
+        Args:
+            starts (np.ndarray): Interval start times as int64 Unix seconds
+            prices (np.ndarray): Prices in SEK/kWh
+            ends (np.ndarray, optional): Interval end times as int64 Unix seconds.
+                Defaults to the next start, with the last interval as long as
+                the one before it
+        """
+        self.starts = np.asarray(starts, dtype=np.int64)
+        self.prices = np.asarray(prices, dtype=np.float64)
+        if ends is None:
+            ends = np.empty_like(self.starts)
+            ends[:-1] = self.starts[1:]
+            step = self.starts[-1] - self.starts[-2] if len(self.starts) > 1 else 3600
+            ends[-1:] = self.starts[-1:] + step
+        self.ends = np.asarray(ends, dtype=np.int64)
+
+    @classmethod
+    def from_json(cls, records):
+        """Build a series from the list of dicts returned by the API"""
+        count = len(records)
+        starts = np.empty(count, dtype=np.int64)
+        ends = np.empty(count, dtype=np.int64)
+        prices = np.empty(count, dtype=np.float64)
+        for i, record in enumerate(records):
+            starts[i] = datetime.fromisoformat(record['time_start']).timestamp()
+            ends[i] = datetime.fromisoformat(record['time_end']).timestamp()
+            prices[i] = record['SEK_per_kWh']
+        return cls(starts, prices, ends)
+
+    @classmethod
+    def concat(cls, series):
+        """
+        Join consecutive series, e.g. today and tomorrow, into one
+
+        Series with different resolutions are first split to the finest one.
+        """
+        series = [s for s in series if s]
+        resolution = min(s.resolution for s in series)
+        series = [s if s.resolution == resolution else s.resample(resolution) for s in series]
+        return cls(
+            np.concatenate([s.starts for s in series]),
+            np.concatenate([s.prices for s in series]),
+            np.concatenate([s.ends for s in series])
+        )
+
+    def __len__(self):
+        return len(self.prices)
+
+    @cached_property
+    def argmin(self):
+        return int(self.prices.argmin())
+
+    @cached_property
+    def argmax(self):
+        return int(self.prices.argmax())
+
+    @cached_property
+    def min(self):
+        return float(self.prices[self.argmin])
+
+    @cached_property
+    def max(self):
+        return float(self.prices[self.argmax])
+
+    @cached_property
+    def mean(self):
+        return float(self.prices.mean())
+
+    @cached_property
+    def resolution(self):
+        """Length of the price intervals in minutes, e.g. 60 or 15"""
+        return int(np.median(self.ends - self.starts)) // 60
+
+    def index_at(self, t):
+        """
+        Index of the interval containing an instant, or None if outside the series
+
+        Args:
+            t (datetime or float): Instant as a datetime or Unix timestamp
+        """
+        ts = t.timestamp() if isinstance(t, datetime) else t
+        # Binary search on the sorted start times, O(log n)
+        index = int(np.searchsorted(self.starts, ts, side='right')) - 1
+        if index < 0 or ts >= self.ends[index]:
+            return None
+        return index
+
+    def price_at(self, t):
+        """Price at an instant, or None if outside the series"""
+        index = self.index_at(t)
+        return float(self.prices[index]) if index is not None else None
+
+    def next_boundary(self, t):
+        """End of the interval containing an instant, as a Unix timestamp"""
+        index = self.index_at(t)
+        return int(self.ends[index]) if index is not None else None
+
+    def start_time(self, index):
+        """Local start time of the interval at index"""
+        return datetime.fromtimestamp(int(self.starts[index]))
+
+    def end_time(self, index):
+        """Local end time of the interval at index"""
+        return datetime.fromtimestamp(int(self.ends[index]))
+
+    def interval_label(self, index):
+        """Clock label for an interval, "14-15" for hours and "14:15-14:30" otherwise"""
+        start, end = self.start_time(index), self.end_time(index)
+        if self.resolution >= 60:
+            return f"{start.hour:02d}-{end.hour:02d}"
+        return f"{start:%H:%M}-{end:%H:%M}"
+
+    def resample(self, minutes):
+        """
+        Convert the series to another resolution
+
+        Coarser resolutions are time-weighted averages of the intervals that
+        fall inside each bucket; finer resolutions repeat the price of the
+        interval they split. Buckets are aligned to Unix time, which matches
+        whole local hours in Swedish time.
+
+        Args:
+            minutes (int): Target interval length in minutes, e.g. 15 or 60
+        """
+        width = minutes * 60
+        durations = self.ends - self.starts
+
+        if width >= durations.max():
+            # Aggregate: group intervals by the bucket they start in
+            buckets = self.starts // width
+            boundaries = np.flatnonzero(np.diff(buckets)) + 1
+            first = np.concatenate(([0], boundaries))
+            weighted = np.add.reduceat(self.prices * durations, first)
+            total = np.add.reduceat(durations, first)
+            starts = buckets[first] * width
+            return PriceSeries(starts, weighted / total, starts + width)
+
+        # Split: every interval becomes duration / width sub-intervals
+        counts = durations // width
+        starts = np.repeat(self.starts, counts)
+        offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        starts = starts + offsets * width
+        return PriceSeries(starts, np.repeat(self.prices, counts), starts + width)
@@ -0,0 +1,16 @@
+"""When published prices are expected, shared by the widget's scheduler and the price hub"""
+import random
+
+# Tomorrow's prices are published around this hour
+PUBLISH_HOUR = 13
+
+# Backoff while expected data is missing, in seconds
+MIN_BACKOFF = 60
+MAX_BACKOFF = 1800
+JITTER = 0.2
+
+
+def backoff(failures):
+    """Seconds to wait after a number of consecutive polls that found nothing new, with jitter"""
+    delay = min(MAX_BACKOFF, MIN_BACKOFF * 2 ** max(failures - 1, 0))
+    return delay * random.uniform(1 - JITTER, 1 + JITTER)